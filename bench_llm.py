@@ -0,0 +1,136 @@
+"""
+Load test for the model request path.
+
+Drives main_fixed.py's schedule job route (job queue, gateway, streaming
+parser, result cache) with concurrent simulated students against
+fake_llm.FakeAnthropic, and reports end-to-end job latency and the
+gateway's retry and rate-limit counters. Nothing here calls the Anthropic
+API.
+
+Usage:
+    python bench_llm.py
+    python bench_llm.py --students 200 --concurrency 10 50 --latency 2 --rate-limit-rate 0.1
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from student_session import save_student
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_student(app, codes: List[str], rng: random.Random, lock: threading.Lock) -> Dict:
+    """One student: submit a schedule job and poll it to completion."""
+    with lock:
+        completed = rng.sample(codes, rng.randint(0, 4))
+        target = rng.choice([12, 15, 18])
+    http = app.test_client()
+    with http.session_transaction() as session:
+        save_student(session, {"major": "Computer Science"}, completed=completed)
+    started = time.perf_counter()
+    response = http.post('/api/jobs/schedules', json={"credit_hours": target, "semester": "Spring 2026"})
+    if response.status_code != 202:
+        return {"status": f"http_{response.status_code}", "seconds": time.perf_counter() - started}
+
+    job_id = response.json['job_id']
+    first_event = None
+    cursor = 0
+    while True:
+        job = http.get(f'/api/jobs/{job_id}?cursor={cursor}').json
+        cursor = job['next_cursor']
+        if job['events'] and first_event is None:
+            first_event = time.perf_counter() - started
+        if job['status'] in ('succeeded', 'failed', 'timed_out'):
+            return {"status": job['status'], "seconds": time.perf_counter() - started,
+                    "first_event": first_event}
+        time.sleep(0.02)
+
+
+def bench(app, codes: List[str], students: int, concurrency: int):
+    import main_fixed
+
+    main_fixed.schedule_cache.invalidate()
+    before = main_fixed.client.status()
+    rng = random.Random(concurrency)
+    lock = threading.Lock()
+
+    started = time.perf_counter()
+    # The app logs every request; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: run_student(app, codes, rng, lock), range(students)))
+    elapsed = time.perf_counter() - started
+
+    after = main_fixed.client.status()
+    outcomes = {}
+    for result in results:
+        outcomes[result["status"]] = outcomes.get(result["status"], 0) + 1
+    latencies = [result["seconds"] for result in results if result["status"] == "succeeded"]
+    first_events = [result["first_event"] for result in results if result.get("first_event") is not None]
+
+    print(f"  {concurrency:>11} {students:>8} {students / elapsed:>8.1f}/s "
+          f"{percentile(latencies, 0.50) if latencies else 0:>8.2f} "
+          f"{percentile(latencies, 0.99) if latencies else 0:>8.2f} "
+          f"{statistics.mean(first_events) if first_events else 0:>12.2f} "
+          f"{after['calls'] - before['calls']:>6} {after['retries'] - before['retries']:>8} "
+          f"{after['rate_limited'] - before['rate_limited']:>6}  {outcomes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the schedule job path against a mock model backend.")
+    parser.add_argument("--students", type=int, default=100, help="Schedule requests per scenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50], help="Concurrent students")
+    parser.add_argument("--latency", type=float, default=1.0, help="Mock seconds to first token")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of mock calls failing with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock calls failing with 529")
+    parser.add_argument("--requests-per-minute", type=float, default=None, help="Gateway request budget")
+    parser.add_argument("--tokens-per-minute", type=float, default=None, help="Gateway token budget")
+    parser.add_argument("--job-workers", type=int, default=None, help="Background job workers")
+    args = parser.parse_args()
+
+    # Configure before main_fixed builds its gateway, caches and job queue
+    cache_dir = tempfile.mkdtemp(prefix="llm-bench-")
+    os.environ['LLM_BACKEND'] = 'mock'
+    os.environ['LLM_MOCK_LATENCY'] = str(args.latency)
+    os.environ['LLM_CACHE_PATH'] = os.path.join(cache_dir, 'llm_results.sqlite3')
+    os.environ['DARS_CACHE_PATH'] = os.path.join(cache_dir, 'dars_results.sqlite3')
+    if args.requests_per_minute:
+        os.environ['LLM_REQUESTS_PER_MINUTE'] = str(args.requests_per_minute)
+    if args.tokens_per_minute:
+        os.environ['LLM_TOKENS_PER_MINUTE'] = str(args.tokens_per_minute)
+    if args.job_workers:
+        os.environ['LLM_JOB_WORKERS'] = str(args.job_workers)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main_fixed
+    main_fixed.client.backend.rate_limit_rate = args.rate_limit_rate
+    main_fixed.client.backend.error_rate = args.error_rate
+    codes = [course['code'] for course in main_fixed.MOCK_UW_COURSES]
+
+    print(f"=== mock latency {args.latency:.1f}s, {args.rate_limit_rate:.0%} 429s, {args.error_rate:.0%} 529s, "
+          f"{main_fixed.jobs.workers} job workers ===")
+    print(f"  {'concurrency':>11} {'students':>8} {'throughput':>10} {'p50 s':>8} {'p99 s':>8} "
+          f"{'first event s':>12} {'calls':>6} {'retries':>8} {'429s':>6}  outcomes")
+    try:
+        for concurrency in args.concurrency:
+            bench(main_fixed.app, codes, args.students, concurrency)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark suite for the UW-Madison course clients.
+
+Runs UWMadisonAPI, AsyncUWMadisonAPI and UWMadisonScraper against a local
+FakeEnrollServer and reports throughput, p50/p99 latency and memory for
+several catalog sizes. Nothing here touches enroll.wisc.edu.
+
+Usage:
+    python bench_uw_api.py
+    python bench_uw_api.py --sizes 1000 10000 --latency 0.02 > bench_output.txt
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from fake_enroll_server import FakeEnrollServer
+from uw_api import CatalogCache, UWMadisonAPI
+from uw_api_async import AsyncUWMadisonAPI
+
+
+TERM = "Spring 2026"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(name: str, samples: List[float], elapsed: float):
+    """Print one result row: requests, throughput and latency percentiles in ms."""
+    print(f"  {name:<34} {len(samples):>7} {len(samples) / elapsed:>10.0f}/s "
+          f"{percentile(samples, 0.50) * 1000:>9.3f} {percentile(samples, 0.99) * 1000:>9.3f} "
+          f"{statistics.mean(samples) * 1000:>9.3f}")
+
+
+def timed(calls: List[Callable], workers: int = 1):
+    """Run calls (optionally on a thread pool) and return per-call latencies and total time."""
+    samples = []
+    lock = threading.Lock()
+
+    def run(call):
+        started = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples.append(elapsed)
+
+    started = time.perf_counter()
+    if workers == 1:
+        for call in calls:
+            run(call)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, calls))
+    return samples, time.perf_counter() - started
+
+
+def new_client(server: FakeEnrollServer, cache_dir: str) -> UWMadisonAPI:
+    path = os.path.join(cache_dir, f"cache-{time.perf_counter_ns()}.sqlite3")
+    api = UWMadisonAPI(cache=CatalogCache(path=path, memory_entries=5000))
+    api.api_url = server.api_url
+    return api
+
+
+def bench_catalog(size: int, sections: int, latency: float, error_rate: float, sample: int,
+                  workers: int, cache_dir: str):
+    print(f"\n=== {size} courses, {sections} sections/course, {latency * 1000:.0f} ms upstream latency, "
+          f"{error_rate:.0%} errors ===")
+    with FakeEnrollServer(catalog_size=size, sections_per_course=sections, latency=latency,
+                          error_rate=error_rate) as server:
+        subjects = sorted(server.by_subject)
+        rng = random.Random(0)
+        codes = [hit["courseDesignationRaw"] for hit in rng.sample(server.hits, min(sample, len(server.hits)))]
+        print(f"  {'scenario':<34} {'requests':>7} {'throughput':>12} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+
+        api = new_client(server, cache_dir)
+        samples, elapsed = timed([lambda s=s: api.get_courses(TERM, s) for s in subjects])
+        report("get_courses cold (per subject)", samples, elapsed)
+
+        samples, elapsed = timed([lambda s=s: api.get_courses(TERM, s) for s in subjects * 5])
+        report("get_courses warm", samples, elapsed)
+
+        samples, elapsed = timed([lambda c=c: api.get_course_sections(c, TERM) for c in codes])
+        report("get_course_sections cold", samples, elapsed)
+
+        samples, elapsed = timed([lambda c=c: api.get_course_sections(c, TERM) for c in codes * 5], workers)
+        report(f"get_course_sections warm x{workers}", samples, elapsed)
+
+        api = new_client(server, cache_dir)
+        before = server.requests
+        hot = codes[:10]
+        samples, elapsed = timed([lambda c=c: api.get_course_sections(c, TERM) for c in hot * 20], workers)
+        report(f"sections stampede x{workers}", samples, elapsed)
+        print(f"    upstream requests for {len(hot) * 20} lookups: {server.requests - before}")
+
+        api = new_client(server, cache_dir)
+        samples, elapsed = timed([lambda: api.get_sections_for_courses(codes[:12], TERM)])
+        report("get_sections_for_courses (12)", samples, elapsed)
+
+        async_api = AsyncUWMadisonAPI(new_client(server, cache_dir))
+        samples, elapsed = timed([lambda: async_api.fetch_courses(subjects, TERM)])
+        report(f"async fan-out ({len(subjects)} subjects)", samples, elapsed)
+        async_api.run(async_api.close())
+
+        try:
+            from uw_scraper_old import UWMadisonScraper
+        except ImportError as e:
+            print(f"  scraper skipped: {e}")
+        else:
+            scraper = UWMadisonScraper()
+            scraper.api_url = server.api_url
+            samples, elapsed = timed([lambda s=s: scraper.get_available_courses(TERM, s) for s in subjects[:20]])
+            report("scraper get_available_courses", samples, elapsed)
+
+        # Measured on a separate client: tracemalloc slows the timed scenarios down
+        api = new_client(server, cache_dir)
+        tracemalloc.start()
+        for subject in subjects:
+            api.get_courses(TERM, subject)
+        catalog_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  catalog memory held by client: {catalog_memory / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the UW course clients against a local fake server.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Catalog sizes")
+    parser.add_argument("--sections", type=int, default=3, help="Sections per course")
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected upstream latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests failing with 503")
+    parser.add_argument("--sample", type=int, default=200, help="Courses sampled for section lookups")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for concurrent scenarios")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="uw-bench-")
+    try:
+        for size in args.sizes:
+            bench_catalog(size, args.sections, args.latency, args.error_rate, args.sample, args.workers, cache_dir)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
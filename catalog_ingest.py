@@ -0,0 +1,246 @@
+"""
+Full-term catalog snapshot ingester.
+
+Crawls every subject and every result page of the UW-Madison course search
+for one term and writes a single versioned snapshot that the web app loads
+at startup (see UWMadisonAPI.load_latest_snapshots).
+
+The crawl is keyword-based: each subject is searched by its lowercased
+name, the same way UWMadisonAPI.get_courses searches, not through a
+subject filter. Free-text matching can return other subjects' courses
+(de-duplicated across the crawl) and can miss a course whose text never
+mentions its subject's name, so a snapshot may not be a complete listing.
+
+Pages that still fail after retries get one more pass at the end of the
+crawl. Any still missing are listed in the snapshot's failed_pages, and
+an incomplete snapshot is written without moving the term's LATEST
+pointer, so the app keeps serving the previous complete one.
+
+Usage:
+    python catalog_ingest.py "Spring 2026" --workers 16 --rate 20
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from uw_api import SNAPSHOT_DIR, UWMadisonAPI, backoff_delay
+
+
+FIRST_PAGE = 0  # Matches uw_scraper_old.get_available_courses
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting requests per second."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CatalogIngester:
+    """Parallel, rate-limited crawler for a full term of course search results."""
+
+    def __init__(self, api: Optional[UWMadisonAPI] = None, workers: int = 16,
+                 rate: float = 20, page_size: int = 100, retries: int = 3):
+        self.api = api or UWMadisonAPI()
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.page_size = page_size
+        self.retries = retries
+
+    def crawl(self, term: str) -> Dict:
+        """
+        Crawl every subject and page for a term.
+
+        Args:
+            term: Semester (e.g., "Spring 2026")
+
+        Returns:
+            Snapshot dict with version, term_code, created_at, hits and
+            failed_pages ([subject, page] pairs still failing after a retry pass)
+        """
+        term_code = self.api._parse_term(term)
+        started = time.time()
+        subjects = self.get_subjects(term_code)
+        print(f"Crawling {len(subjects)} subjects for {term} ({term_code})...")
+
+        hits_by_key = {}
+        counts = {"requests": 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            first_pages = [(subject, FIRST_PAGE) for subject in subjects]
+            failed = self._crawl_pages(pool, term_code, first_pages, hits_by_key, counts)
+            if failed:
+                print(f"Retrying {len(failed)} failed pages...")
+                failed = self._crawl_pages(pool, term_code, failed, hits_by_key, counts)
+
+        hits = sorted(hits_by_key.values(), key=lambda hit: hit.get("courseDesignationRaw", ""))
+        elapsed = time.time() - started
+        print(f"Fetched {len(hits)} courses in {counts['requests']} requests ({elapsed:.1f}s)")
+        if failed:
+            print(f"{len(failed)} pages still failing: {failed}")
+
+        digest = hashlib.sha1(json.dumps(hits, sort_keys=True).encode()).hexdigest()[:10]
+        created_at = int(started)
+        return {
+            "version": f"{term_code}-{created_at}-{digest}",
+            "term_code": term_code,
+            "created_at": created_at,
+            "hits": hits,
+            "failed_pages": [[subject, page] for subject, page in sorted(failed)]
+        }
+
+    def _crawl_pages(self, pool: ThreadPoolExecutor, term_code: str, pages: List[Tuple[str, int]],
+                     hits_by_key: Dict, counts: Dict) -> List[Tuple[str, int]]:
+        """
+        Fetch (subject, page) pairs into hits_by_key; a subject's first page
+        also queues the rest of its pages, since it says how many there are.
+
+        Returns:
+            (subject, page) pairs that still failed after _request's retries
+        """
+        futures = {pool.submit(self._get_page, term_code, subject, page): (subject, page)
+                   for subject, page in pages}
+        failed = []
+        while futures:
+            for future in as_completed(list(futures)):
+                subject, page = futures.pop(future)
+                counts["requests"] += 1
+                try:
+                    data = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    # One bad page must not throw away everything already fetched
+                    print(f"Giving up on {subject} page {page}: {e}")
+                    failed.append((subject, page))
+                    continue
+                self._collect(hits_by_key, data)
+
+                if page == FIRST_PAGE:
+                    pages_found = math.ceil(data.get("found", 0) / self.page_size)
+                    for next_page in range(FIRST_PAGE + 1, FIRST_PAGE + pages_found):
+                        futures[pool.submit(self._get_page, term_code, subject, next_page)] = (subject, next_page)
+        return failed
+
+    def get_subjects(self, term_code: str) -> List[str]:
+        """Fetch the subject names offered in a term, lowercased for keyword search."""
+        response = self._request(f"{self.api.api_url}/subjectsMap/{term_code}", {})
+        subjects = {name.lower() for code, name in response.items() if code != "0"}
+        return sorted(subjects)
+
+    def write_snapshot(self, snapshot: Dict, directory: str = SNAPSHOT_DIR) -> str:
+        """
+        Write a snapshot atomically and point the term's LATEST marker at it.
+
+        A snapshot with failed_pages is written for inspection but LATEST is
+        left pointing at the previous snapshot.
+
+        Returns:
+            Path of the written snapshot file
+        """
+        term_dir = os.path.join(directory, snapshot["term_code"])
+        os.makedirs(term_dir, exist_ok=True)
+
+        filename = f"{snapshot['version']}.json"
+        path = os.path.join(term_dir, filename)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+        if snapshot.get("failed_pages"):
+            return path
+        latest_tmp = os.path.join(term_dir, "LATEST.tmp")
+        with open(latest_tmp, "w") as f:
+            f.write(filename)
+        os.replace(latest_tmp, os.path.join(term_dir, "LATEST"))
+
+        return path
+
+    def _get_page(self, term_code: str, subject: str, page: int) -> Dict:
+        params = {
+            "termCode": term_code,
+            "term": term_code,
+            "keywords": subject,
+            "openSeats": "ALL",
+            "page": page,
+            "pageSize": self.page_size
+        }
+        return self._request(f"{self.api.api_url}/courses", params)
+
+    def _request(self, url: str, params: Dict) -> Dict:
+        """GET a JSON document with rate limiting and jittered exponential backoff."""
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.api.session.get(url, params=params, timeout=30)
+                # Only throttling and server errors are worth retrying
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.HTTPError(f"{response.status_code} from {url}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.retries:
+                raise error
+            delay = backoff_delay(attempt)
+            print(f"Retrying {params.get('keywords', url)} page {params.get('page', '-')} in {delay:.1f}s: {error}")
+            time.sleep(delay)
+
+    def _collect(self, hits_by_key: Dict, data: Dict):
+        for hit in data.get("hits", []):
+            key = hit.get("courseId") or hit.get("courseDesignationRaw", "")
+            hits_by_key[key] = hit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a full term of UW-Madison courses into a snapshot.")
+    parser.add_argument("term", help='Semester, e.g. "Spring 2026"')
+    parser.add_argument("--out", default=SNAPSHOT_DIR, help="Snapshot directory")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent requests")
+    parser.add_argument("--rate", type=float, default=20, help="Maximum requests per second")
+    parser.add_argument("--page-size", type=int, default=100, help="Results per page")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per request")
+    args = parser.parse_args()
+
+    ingester = CatalogIngester(
+        workers=args.workers,
+        rate=args.rate,
+        page_size=args.page_size,
+        retries=args.retries
+    )
+    snapshot = ingester.crawl(args.term)
+    path = ingester.write_snapshot(snapshot, args.out)
+    if snapshot["failed_pages"]:
+        print(f"Wrote incomplete snapshot {snapshot['version']} to {path}; LATEST not updated")
+    else:
+        print(f"Wrote snapshot {snapshot['version']} to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Indexed course catalog.
+
+Courses are indexed once by canonical code, subject and catalog number, so
+lookups from schedules, completed-course lists and degree requirements are
+O(1) whatever style the code is written in: "CS101", "COMP SCI 101" and
+"comp sci 101" all resolve to the same course, and cross-listed courses are
+reachable under every subject they are listed in.
+"""
+
+import bisect
+import re
+from functools import lru_cache
+from typing import Iterable, List, Set
+
+
+# Short or informal subject names -> UW-Madison subject codes
+SUBJECT_ALIASES = {
+    "CS": "COMP SCI",
+    "COMPSCI": "COMP SCI",
+    "ECE": "E C E",
+    "ISYE": "I SY E",
+    "ME": "M E",
+    "POLISCI": "POLI SCI",
+    "ENG": "ENGL",
+    "STATS": "STAT",
+    "BIO": "BIOLOGY",
+    "PHYS": "PHYSICS",
+}
+AUTOCOMPLETE_LIMIT = 10
+
+_CODE_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z &/]*?)\s*(\d{2,3})\s*$")
+
+
+def subject_key(subject: str) -> str:
+    """Canonical key for a subject, e.g. 'cs' -> 'COMPSCI', 'E C E' -> 'ECE'."""
+    key = subject.replace(' ', '').upper()
+    return SUBJECT_ALIASES.get(key, key).replace(' ', '')
+
+
+def split_code(course_code: str):
+    """
+    Split a course code into subject keys and catalog number.
+
+    Cross-listed designations yield every subject:
+    'COMP SCI/E C E 354' -> (['COMPSCI', 'ECE'], '354').
+
+    Returns:
+        (subject keys, number), or None if the code doesn't look like a course
+    """
+    match = _CODE_PATTERN.match(course_code or "")
+    if match is None:
+        return None
+    subjects = [subject_key(subject) for subject in match.group(1).split('/') if subject.strip()]
+    return subjects, match.group(2)
+
+
+@lru_cache(maxsize=65536)
+def canonical_code(course_code: str) -> str:
+    """
+    Canonical matching key for a course code, e.g. 'CS 300' -> 'COMPSCI300'.
+
+    Codes that don't parse fall back to upper case without spaces.
+    """
+    parts = split_code(course_code)
+    if parts is None or not parts[0]:
+        return course_code.replace(' ', '').upper()
+    subjects, number = parts
+    return subjects[0] + number
+
+
+def _field(course, name: str):
+    """Read a field from a course dict or a uw_records.Course."""
+    return course.get(name) if isinstance(course, dict) else getattr(course, name, None)
+
+
+class CourseCatalog:
+    """
+    Hash-indexed view over a list of course dicts or records.
+
+    Indexes:
+        by_code: canonical code (every cross-listing) -> course
+        by_subject: subject key -> courses
+        by_number: catalog number -> courses
+    plus a sorted key list for prefix autocomplete.
+    """
+
+    def __init__(self, courses: Iterable = ()):
+        self.by_code = {}
+        self.by_subject = {}
+        self.by_number = {}
+        self.courses = []
+        self._keys = []
+        self._keys_sorted = True
+        for course in courses:
+            self.add(course)
+
+    def add(self, course):
+        """Index one course; later duplicates of a code are ignored."""
+        code = _field(course, 'code') or ''
+        parts = split_code(code)
+        if parts is None:
+            keys, number, subjects = [canonical_code(code)], None, []
+        else:
+            subjects, number = parts
+            keys = [subject + number for subject in subjects]
+        if keys[0] in self.by_code:
+            return
+
+        self.courses.append(course)
+        for key in keys:
+            self._index(key, course)
+        for subject in subjects:
+            self.by_subject.setdefault(subject, []).append(course)
+        if number:
+            self.by_number.setdefault(number, []).append(course)
+
+    def add_cross_listing(self, course_code: str, other_code: str):
+        """Make other_code resolve to the course indexed under course_code."""
+        course = self.get(course_code)
+        key = canonical_code(other_code)
+        if course is not None and key not in self.by_code:
+            self._index(key, course)
+
+    def _index(self, key: str, course):
+        self.by_code[key] = course
+        self._keys.append(key)
+        self._keys_sorted = False
+
+    def get(self, course_code: str):
+        """The course for a code in any style, or None."""
+        return self.by_code.get(canonical_code(course_code))
+
+    def __contains__(self, course_code: str) -> bool:
+        return canonical_code(course_code) in self.by_code
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def subject(self, subject: str) -> List:
+        """Courses listed under a subject (aliases accepted)."""
+        return self.by_subject.get(subject_key(subject), [])
+
+    def number(self, number: str) -> List:
+        """Courses with a catalog number across all subjects."""
+        return self.by_number.get(str(number).strip(), [])
+
+    def keys(self, course_codes: Iterable[str]) -> Set[str]:
+        """Canonical keys for a list of codes, for O(1) membership checks."""
+        return {canonical_code(code) for code in course_codes}
+
+    def resolve(self, course_codes: Iterable[str]) -> List:
+        """Courses for a list of codes, skipping codes not in the catalog."""
+        courses = []
+        for code in course_codes:
+            course = self.get(code)
+            if course is not None:
+                courses.append(course)
+        return courses
+
+    def autocomplete(self, prefix: str, limit: int = AUTOCOMPLETE_LIMIT) -> List:
+        """
+        Courses whose code starts with a typed prefix.
+
+        'comp sci 3', 'cs3' and 'COMPSCI 30' all complete to COMP SCI 3xx.
+
+        Args:
+            prefix: Partial course code as typed
+            limit: Maximum number of courses returned
+
+        Returns:
+            Matching courses in code order, each at most once
+        """
+        match = re.match(r"^\s*([A-Za-z &/]*?)\s*(\d*)\s*$", prefix or "")
+        if match is None or not (match.group(1) or match.group(2)):
+            return []
+        letters, digits = match.group(1).replace(' ', '').upper(), match.group(2)
+        if digits or letters in SUBJECT_ALIASES:
+            letters = subject_key(letters)
+        key = letters + digits
+
+        if not self._keys_sorted:
+            self._keys.sort()
+            self._keys_sorted = True
+
+        results = []
+        seen = set()
+        index = bisect.bisect_left(self._keys, key)
+        while index < len(self._keys) and len(results) < limit and self._keys[index].startswith(key):
+            course = self.by_code[self._keys[index]]
+            if id(course) not in seen:
+                seen.add(id(course))
+                results.append(course)
+            index += 1
+        return results
@@ -0,0 +1,224 @@
+"""
+TF-IDF retrieval index over course titles and descriptions.
+
+Built once per catalog snapshot: every course becomes an L2-normalized
+TF-IDF column of a float32 NumPy matrix, so scoring a query against the
+whole catalog is one vector-matrix product (and a batch of queries one
+matrix-matrix product). The matrix is stored term-major, so a product
+only touches the rows of the terms the queries actually contain. Used
+to pick the eligible courses most relevant to a student's major,
+interests and remaining requirements for the prompt, and to back
+free-text course search.
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from course_catalog import canonical_code
+
+
+MAX_FEATURES = 4096      # Most frequent terms kept; bounds the matrix at 4096 x courses float32
+TITLE_WEIGHT = 2         # A title term counts as this many description terms
+INDEX_CACHE_ENTRIES = 8  # Indexes kept in memory (one per catalog snapshot)
+SEARCH_LIMIT = 10        # Default results per search
+MAX_SEARCH_LIMIT = 50    # Most results a search route returns
+
+_WORD = re.compile(r"[a-z][a-z0-9]+")
+STOP_WORDS = frozenset("""
+    a an and are as at be by course courses for from in into is it its of on or other such that the their
+    this these to topics topic using will with student students include including introduction study
+""".split())
+
+
+def _field(course, name: str):
+    """Read a field from a course dict or a uw_records.Course."""
+    return course.get(name) if isinstance(course, dict) else getattr(course, name, None)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word terms without stop words, with plural 's' stripped."""
+    terms = []
+    for word in _WORD.findall((text or "").lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def course_text(course) -> List[str]:
+    """Terms of a course's title (weighted) and description."""
+    return tokenize(_field(course, 'name')) * TITLE_WEIGHT + tokenize(_field(course, 'description'))
+
+
+class CourseIndex:
+    """
+    TF-IDF matrix for one catalog.
+
+    Attributes:
+        courses: Indexed courses, in column order
+        rows: Canonical code -> column
+        vocabulary: Term -> row
+        idf: Inverse document frequency per column
+        matrix: float32 (terms x courses), each course's column L2-normalized
+    """
+
+    def __init__(self, courses: Iterable, version: Optional[str] = None,
+                 max_features: int = MAX_FEATURES):
+        self.version = version
+        self.courses = []
+        self.rows = {}  # canonical code -> column
+        documents = []
+        for course in courses:
+            key = canonical_code(_field(course, 'code') or '')
+            if key in self.rows:
+                continue
+            self.rows[key] = len(self.courses)
+            self.courses.append(course)
+            documents.append(Counter(course_text(course)))
+
+        frequency = Counter()
+        for terms in documents:
+            frequency.update(terms.keys())
+        terms = sorted(frequency, key=lambda term: (-frequency[term], term))[:max_features]
+        self.vocabulary = {term: column for column, term in enumerate(terms)}
+
+        count = len(documents)
+        self.idf = np.array([math.log((1 + count) / (1 + frequency[term])) + 1 for term in terms], dtype=np.float32)
+        self.matrix = np.zeros((len(terms), count), dtype=np.float32)
+        for column, counts in enumerate(documents):
+            for term, tf in counts.items():
+                row = self.vocabulary.get(term)
+                if row is not None:
+                    self.matrix[row, column] = 1 + math.log(tf)
+        self.matrix *= self.idf[:, np.newaxis]
+        norms = np.linalg.norm(self.matrix, axis=0, keepdims=True)
+        np.divide(self.matrix, norms, out=self.matrix, where=norms > 0)
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """L2-normalized TF-IDF vector for query text; terms outside the vocabulary are ignored."""
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term, tf in Counter(tokenize(text)).items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] = (1 + math.log(tf)) * self.idf[column]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def mask(self, course_codes: Iterable[str]) -> np.ndarray:
+        """Boolean course mask for a set of course codes (codes not in the index are ignored)."""
+        mask = np.zeros(len(self.courses), dtype=bool)
+        rows = [self.rows[key] for key in map(canonical_code, course_codes) if key in self.rows]
+        mask[rows] = True
+        return mask
+
+    def scores(self, queries: List[str]) -> np.ndarray:
+        """Cosine similarity of every course to each query: (queries x courses)."""
+        if not queries:
+            return np.zeros((0, len(self.courses)), dtype=np.float32)
+        vectors = np.stack([self.vectorize(query) for query in queries])
+        terms = np.flatnonzero(vectors.any(axis=0))  # Only rows some query uses contribute
+        return vectors[:, terms] @ self.matrix[terms]
+
+    def search(self, query: str, k: int = SEARCH_LIMIT, among: Optional[Iterable[str]] = None) -> List[Tuple]:
+        """
+        Top-k courses for a free-text query.
+
+        Args:
+            query: Search text
+            k: Results to return
+            among: Only consider these course codes (e.g. a student's eligible courses)
+
+        Returns:
+            (course, score) pairs, best first; courses sharing no terms with the query are left out
+        """
+        return self.search_many([query], k, among)[0]
+
+    def search_many(self, queries: List[str], k: int = SEARCH_LIMIT, among: Optional[Iterable[str]] = None) -> List[List[Tuple]]:
+        """search for a batch of queries with one matrix product; k <= 0 returns no results."""
+        if k <= 0:
+            return [[] for _ in queries]
+        scores = self.scores(queries)
+        if among is not None:
+            scores = np.where(self.mask(among), scores, 0.0)
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(-row[top], kind="stable")]
+            results.append([(self.courses[i], round(float(row[i]), 4)) for i in top if row[i] > 0])
+        return results
+
+    def relevance(self, query: str, course_codes: Iterable[str]) -> Dict[str, float]:
+        """Similarity of each given course to the query, keyed by canonical code."""
+        if not self.courses:
+            return {}
+        row = self.scores([query])[0]
+        relevance = {}
+        for code in course_codes:
+            key = canonical_code(code)
+            if key in self.rows:
+                relevance[key] = float(row[self.rows[key]])
+        return relevance
+
+
+def student_query(major: str, interests: str = "", remaining_courses: Iterable = (),
+                  categories: Iterable[str] = ()) -> str:
+    """
+    Query text describing what a student still needs: their major, free-text
+    interests and the titles and descriptions of remaining requirement courses.
+    """
+    parts = [major or "", interests or ""]
+    parts.extend(name.replace("_", " ") for name in categories)
+    for course in remaining_courses:
+        parts.append(_field(course, 'name') or "")
+        parts.append(_field(course, 'description') or "")
+    return " ".join(parts)
+
+
+def index_key(courses: List) -> str:
+    """Content hash of a catalog's codes, titles and descriptions, for catalogs without a version."""
+    digest = hashlib.sha1()
+    for course in courses:
+        digest.update(f"{_field(course, 'code')}\x1f{_field(course, 'name')}\x1f"
+                      f"{_field(course, 'description')}\x1e".encode())
+    return digest.hexdigest()
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def build_index(courses: List, version: Optional[str] = None) -> CourseIndex:
+    """
+    Build (or fetch the cached) CourseIndex for a catalog.
+
+    Args:
+        courses: Course dicts or records with code, name and description
+        version: Catalog snapshot version; when None the catalog's content hash is used
+
+    Returns:
+        The CourseIndex
+    """
+    key = version or index_key(courses)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = CourseIndex(courses, key)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > INDEX_CACHE_ENTRIES:
+            _indexes.popitem(last=False)
+    return index
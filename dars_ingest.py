@@ -0,0 +1,249 @@
+"""
+Bulk DARS ingester for advising offices.
+
+Walks a directory of DARS PDFs and parses them in a process pool through
+the same parser and encrypted cache as /api/parse-dars (local text parse
+first, the model only for low-confidence reports). Each student gets one
+compact record in a local SQLite store, keyed by the PDF's file name
+(e.g. 9081234567.pdf -> student 9081234567). The store doubles as the
+checkpoint: files already ingested with the same size and modification
+time are skipped, so an interrupted run resumes where it stopped.
+
+Usage:
+    python dars_ingest.py advising/fall-2026 --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from course_catalog import canonical_code
+from dars_parser import cache_cipher, open_dars_cache, parse_dars_report
+from llm_gateway import create_gateway
+
+
+RECORDS_PATH = os.getenv('DARS_RECORDS_PATH', os.path.join('.cache', 'dars_records.sqlite3'))
+CHECKPOINT_EVERY = 50  # Results committed to the store per transaction
+PROGRESS_EVERY = 200   # Files between progress lines
+
+# Per-process state, set up by _init_worker
+_client = None
+_cache = None
+
+
+def _init_worker(use_model: bool, workers: int):
+    """Open a DARS cache connection (and a model gateway if allowed) in each worker process."""
+    global _client, _cache
+    _cache = open_dars_cache()
+    if use_model:
+        # Workers split the API key's rate budget between them
+        _client = create_gateway(share=1 / workers)
+
+
+def _parse_file(path: str) -> Dict:
+    """Parse one PDF in a worker; errors are returned rather than raised so one bad file can't stop the run."""
+    started = time.perf_counter()
+    result = {"path": path, "sha256": None, "dars": None, "source": None, "error": None}
+    try:
+        with open(path, "rb") as f:
+            pdf_data = f.read()
+        result["sha256"] = hashlib.sha256(pdf_data).hexdigest()
+        result["bytes"] = len(pdf_data)
+        result["dars"], result["source"] = parse_dars_report(pdf_data, _client, _cache)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def compact_record(student_id: str, dars_data: Dict) -> Dict:
+    """The fields the planner and audits need, with course codes de-duplicated."""
+    def codes(name):
+        return list({canonical_code(code): code for code in dars_data.get(name) or []}.values())
+
+    return {
+        "student_id": student_id,
+        "major": dars_data.get("major"),
+        "minor_or_certificate": dars_data.get("minor_or_certificate"),
+        "completed": codes("completed_courses"),
+        "in_progress": codes("in_progress_courses"),
+        "planned": codes("planned_courses"),
+        "credits": dars_data.get("total_credits_earned"),
+        "gpa": dars_data.get("gpa")
+    }
+
+
+class RecordStore:
+    """
+    SQLite store of per-student records and per-file ingest progress.
+
+    Records are Fernet-encrypted like the DARS cache, since they carry
+    grades-derived data and GPA.
+    """
+
+    def __init__(self, path: str = RECORDS_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.cipher = cache_cipher()
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS students (
+                student_id TEXT PRIMARY KEY,
+                pdf_sha256 TEXT NOT NULL,
+                record TEXT NOT NULL,
+                source TEXT NOT NULL,
+                ingested_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS ingested_files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT
+            )
+        """)
+        self._db.commit()
+
+    def pending(self, paths: List[str], retry_failed: bool = False) -> List[str]:
+        """Paths not yet ingested, or changed on disk since they were."""
+        done = {
+            path: (size, mtime, status)
+            for path, size, mtime, status in self._db.execute("SELECT path, size, mtime, status FROM ingested_files")
+        }
+        pending = []
+        for path in paths:
+            stat = os.stat(path)
+            previous = done.get(path)
+            if (previous is None or previous[:2] != (stat.st_size, stat.st_mtime)
+                    or (retry_failed and previous[2] != "ok")):
+                pending.append(path)
+        return pending
+
+    def save(self, result: Dict):
+        """Record one file's outcome (and its student record on success); committed by checkpoint()."""
+        stat = os.stat(result["path"])
+        if result["error"] is None:
+            student_id = os.path.splitext(os.path.basename(result["path"]))[0]
+            record = json.dumps(compact_record(student_id, result["dars"]), separators=(",", ":"))
+            self._db.execute(
+                "INSERT OR REPLACE INTO students VALUES (?, ?, ?, ?, ?)",
+                (student_id, result["sha256"], self.cipher.encrypt(record.encode()).decode(),
+                 result["source"], time.time())
+            )
+        self._db.execute(
+            "INSERT OR REPLACE INTO ingested_files VALUES (?, ?, ?, ?, ?)",
+            (result["path"], stat.st_size, stat.st_mtime, "ok" if result["error"] is None else "error",
+             result["error"])
+        )
+
+    def checkpoint(self):
+        self._db.commit()
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        """A student's decrypted record, or None."""
+        row = self._db.execute("SELECT record FROM students WHERE student_id = ?", (student_id,)).fetchone()
+        return json.loads(self.cipher.decrypt(row[0].encode())) if row else None
+
+
+def find_pdfs(directory: str) -> List[str]:
+    """Every .pdf under a directory, in a stable order."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+    return sorted(paths)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def ingest(directory: str, store: RecordStore, workers: Optional[int] = None,
+           use_model: bool = True, retry_failed: bool = False) -> Dict:
+    """
+    Parse every pending PDF under a directory into the record store.
+
+    Args:
+        directory: Directory searched recursively for .pdf files
+        store: Record store (and checkpoint)
+        workers: Worker processes; defaults to every core
+        use_model: Send low-confidence reports to the model; when False they are recorded as errors
+        retry_failed: Re-parse files whose previous attempt failed
+
+    Returns:
+        Throughput report
+    """
+    paths = find_pdfs(directory)
+    pending = store.pending(paths, retry_failed)
+    workers = workers or os.cpu_count() or 1
+    print(f"Found {len(paths)} PDFs, {len(paths) - len(pending)} already ingested; "
+          f"parsing {len(pending)} with {workers} processes...")
+
+    started = time.perf_counter()
+    sources = {}
+    errors = 0
+    total_bytes = 0
+    latencies = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(use_model, workers)) as pool:
+        futures = [pool.submit(_parse_file, path) for path in pending]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            store.save(result)
+            latencies.append(result["seconds"])
+            total_bytes += result.get("bytes", 0)
+            if result["error"] is None:
+                sources[result["source"]] = sources.get(result["source"], 0) + 1
+            else:
+                errors += 1
+                print(f"  {result['path']}: {result['error']}")
+
+            if done % CHECKPOINT_EVERY == 0:
+                store.checkpoint()
+            if done % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  {done}/{len(pending)} files ({done / elapsed:.1f}/s)")
+    store.checkpoint()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "files_found": len(paths),
+        "files_skipped": len(paths) - len(pending),
+        "files_parsed": len(pending) - errors,
+        "errors": errors,
+        "sources": sources,
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 2),
+        "files_per_second": round(len(pending) / elapsed, 1) if elapsed and pending else None,
+        "megabytes_per_second": round(total_bytes / 1e6 / elapsed, 2) if elapsed and pending else None,
+        "p50_file_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+        "p95_file_ms": round(_percentile(latencies, 0.95) * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory of DARS PDFs into per-student records.")
+    parser.add_argument("directory", help="Directory of DARS PDFs (searched recursively)")
+    parser.add_argument("--store", default=RECORDS_PATH, help="SQLite record store and checkpoint")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: every core)")
+    parser.add_argument("--local-only", action="store_true",
+                        help="Never call the model; low-confidence reports are recorded as errors")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-parse files that failed previously")
+    args = parser.parse_args()
+
+    report = ingest(args.directory, RecordStore(args.store), args.workers,
+                    use_model=not args.local_only, retry_failed=args.retry_failed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
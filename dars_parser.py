@@ -0,0 +1,307 @@
+"""
+DARS report parsing.
+
+DARS reports are machine-generated with a fixed layout, so most uploads
+are parsed locally: the PDF's text is extracted and course lines
+("FA23 COMP SCI 300  3.00 AB  PROGRAMMING II"), credit totals and GPA are
+read with compiled patterns, and the result gets a confidence score. Only
+low-confidence reports (scanned PDFs, unfamiliar layouts) go to the model.
+Program names are mapped to a known major ("Computer Sciences BS" ->
+"Computer Science"); a program that maps to none lowers the confidence
+so the model parses the report instead.
+
+Model results are cached by the SHA-256 of the PDF bytes and the DARS
+prompt version, so re-uploading the same report skips the model call.
+The cache is bounded and encrypted at rest: DARS reports carry grades
+and GPA, so payloads are Fernet-encrypted before they reach disk.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet
+from pypdf import PdfReader
+
+from course_catalog import canonical_code
+from llm_cache import ResultCache, cache_key
+from prompts import dars_request, dars_system
+
+
+DARS_PROMPT_VERSION = "2"          # Bump when the DARS prompt changes so cached parses are not reused
+DARS_CACHE_TTL = 180 * 24 * 3600   # A report's contents never change; entries age out after a semester or so
+DARS_CACHE_ENTRIES = 5000          # Parsed reports kept on disk
+DARS_MEMORY_ENTRIES = 64
+LOCAL_CONFIDENCE_THRESHOLD = 0.8   # Local parses scoring below this go to the model
+MIN_TEXT_CHARS = 200               # Less extractable text than this means a scanned or image-only PDF
+UNKNOWN_MAJOR_PENALTY = 0.3        # A program line naming no known major sends the report to the model
+
+# Program names as DARS prints them (lowercased, degree suffix removed) -> DEGREE_REQUIREMENTS key
+MAJOR_ALIASES = {
+    "computer science": "Computer Science",
+    "computer sciences": "Computer Science",
+    "comp sci": "Computer Science",
+    "cs": "Computer Science",
+}
+
+PASSING_GRADES = {"A", "AB", "B", "BC", "C", "D", "S", "CR", "P", "T", "TR"}
+IN_PROGRESS_GRADES = {"IP", "INP", "EIP"}
+PLANNED_GRADES = {"PL", "PLN", "PLAN"}
+NOT_EARNED_GRADES = {"F", "U", "N", "W", "NW", "NR", "I", "Q", "DR", "X"}
+
+# A line that starts with a term code looks like a course line
+_TERM = r"(?:(?:FA|SP|SU|WI)\d{2}|\d{4})"
+_COURSE_LINE = re.compile(r"^\s*" + _TERM + r"\s+[A-Z]")
+_COURSE = re.compile(
+    r"^\s*(?P<term>" + _TERM + r")\s+"
+    r"(?P<subject>[A-Z][A-Z &/]*?)\s*(?P<number>\d{2,3})[A-Z]?\s+"
+    r"(?P<credits>\d{1,2}(?:\.\d{1,2})?)\s+"
+    r"[>*]?(?P<grade>[A-Z]{1,4})\b"
+)
+_CREDITS_EARNED = re.compile(
+    r"(?:EARNED|COMPLETED)\s*:?\s*(\d{1,3}(?:\.\d{1,2})?)\s+CREDITS"
+    r"|(\d{1,3}(?:\.\d{1,2})?)\s+CREDITS\s+(?:EARNED|COMPLETED)",
+    re.IGNORECASE
+)
+_GPA = re.compile(r"\bGPA\s*:?\s*([0-4]\.\d{1,3})\b|\b([0-4]\.\d{2,3})\s+GPA\b", re.IGNORECASE)
+_MAJOR = re.compile(r"^\s*(?:MAJOR(?:\s+IN)?|PROGRAM)\s*:?\s+(?P<major>[A-Za-z][A-Za-z &,.()-]+?)\s*$",
+                    re.IGNORECASE | re.MULTILINE)
+_DEGREE_PREFIX = re.compile(r"^(?:bachelor|master)s?\s+of\s+(?:science|arts)\s+(?:in\s+)?", re.IGNORECASE)
+_DEGREE_SUFFIX = re.compile(
+    r"[\s,(-]+(?:b\.?\s?s\.?|b\.?\s?a\.?|bsc|m\.?\s?s\.?|major|degree|program|"
+    r"bachelor\s+of\s+(?:science|arts))[\s.)]*$",
+    re.IGNORECASE
+)
+
+
+def normalize_major(program: Optional[str]) -> Optional[str]:
+    """
+    Map a program name from a DARS report to a known major.
+
+    Degree words are stripped first, so "Computer Sciences BS",
+    "COMPUTER SCIENCE (B.S.)" and "Bachelor of Science in Computer Sciences"
+    all become "Computer Science".
+
+    Returns:
+        The MAJOR_ALIASES major, or None if the program isn't recognized
+    """
+    name = re.sub(r"\s+", " ", (program or "").strip())
+    name = _DEGREE_PREFIX.sub("", name)
+    while True:
+        stripped = _DEGREE_SUFFIX.sub("", name)
+        if stripped == name:
+            break
+        name = stripped
+    return MAJOR_ALIASES.get(name.strip(" ,.-").lower())
+
+
+def dars_key(pdf_data: bytes) -> str:
+    """Cache key for a DARS PDF: its content hash plus the prompt version."""
+    return cache_key(
+        kind="dars",
+        pdf_sha256=hashlib.sha256(pdf_data).hexdigest(),
+        prompt_version=DARS_PROMPT_VERSION
+    )
+
+
+def cache_cipher(key: Optional[str] = None) -> Fernet:
+    """
+    Fernet cipher for the DARS cache.
+
+    Uses DARS_CACHE_KEY (a Fernet key) when set; otherwise a key is derived
+    from the app's SECRET_KEY so a default install still encrypts.
+    """
+    key = key or os.getenv('DARS_CACHE_KEY')
+    if not key:
+        secret = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+        key = base64.urlsafe_b64encode(hashlib.sha256(f"dars-cache:{secret}".encode()).digest())
+    return Fernet(key)
+
+
+def open_dars_cache(path: Optional[str] = None) -> ResultCache:
+    """Encrypted, bounded cache of parsed DARS reports (DARS_CACHE_PATH or .cache/dars_results.sqlite3)."""
+    return ResultCache(
+        path or os.getenv('DARS_CACHE_PATH', os.path.join('.cache', 'dars_results.sqlite3')),
+        memory_entries=DARS_MEMORY_ENTRIES,
+        max_entries=DARS_CACHE_ENTRIES,
+        ttl=DARS_CACHE_TTL,
+        cipher=cache_cipher()
+    )
+
+
+def extract_text(pdf_data: bytes) -> str:
+    """Text of every page of a PDF, or "" if it can't be read."""
+    try:
+        reader = PdfReader(io.BytesIO(pdf_data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        print(f"Could not extract DARS text: {e}")
+        return ""
+
+
+def parse_text(text: str) -> Tuple[Dict, float]:
+    """
+    Parse DARS report text with the compiled line patterns.
+
+    DARS lists a course under every requirement it counts toward, so
+    courses are de-duplicated by canonical code; a retaken course counts as
+    completed if any attempt passed.
+
+    Returns:
+        (parsed DARS fields, confidence from 0 to 1)
+    """
+    if len(text.strip()) < MIN_TEXT_CHARS:
+        return {}, 0.0
+
+    completed = {}    # canonical code -> (code, credits)
+    in_progress = {}
+    planned = {}
+    candidates = 0
+    recognized = 0
+    for line in text.splitlines():
+        if not _COURSE_LINE.match(line):
+            continue
+        candidates += 1
+        match = _COURSE.match(line)
+        if match is None:
+            continue
+        grade = match.group('grade')
+        code = f"{' '.join(match.group('subject').split())} {match.group('number')}"
+        key = canonical_code(code)
+        credits = float(match.group('credits'))
+        if grade in PASSING_GRADES:
+            completed.setdefault(key, (code, credits))
+        elif grade in IN_PROGRESS_GRADES:
+            in_progress.setdefault(key, (code, credits))
+        elif grade in PLANNED_GRADES:
+            planned.setdefault(key, (code, credits))
+        elif grade not in NOT_EARNED_GRADES:
+            continue
+        recognized += 1
+
+    if not recognized:
+        return {}, 0.0
+
+    for key in completed:
+        in_progress.pop(key, None)
+        planned.pop(key, None)
+    for key in in_progress:
+        planned.pop(key, None)
+
+    course_credits = sum(credits for _, credits in completed.values())
+    credits_match = _CREDITS_EARNED.search(text)
+    total_credits = float(next(group for group in credits_match.groups() if group)) if credits_match else None
+    gpa_match = _GPA.search(text)
+    major_match = _MAJOR.search(text)
+
+    dars_data = {
+        "completed_courses": [code for code, _ in completed.values()],
+        "in_progress_courses": [code for code, _ in in_progress.values()],
+        "planned_courses": [code for code, _ in planned.values()],
+        "total_credits_earned": total_credits if total_credits is not None else course_credits,
+        "gpa": float(next(group for group in gpa_match.groups() if group)) if gpa_match else None
+    }
+    major = normalize_major(major_match.group('major')) if major_match else None
+    if major:
+        dars_data["major"] = major
+
+    # Most of the score is how many course-looking lines parsed cleanly; the
+    # rest rewards finding the totals and having them agree with the courses
+    # (transfer and exam credit can make the stated total a little higher)
+    confidence = 0.6 * recognized / candidates
+    if total_credits is not None:
+        confidence += 0.15
+        if total_credits and course_credits <= total_credits * 1.05 and course_credits >= total_credits * 0.5:
+            confidence += 0.1
+    if gpa_match:
+        confidence += 0.1
+    if major:
+        confidence += 0.05
+    elif major_match:
+        # A program line we can't map would leave the student with no degree requirements
+        confidence -= UNKNOWN_MAJOR_PENALTY
+    return dars_data, round(max(confidence, 0.0), 3)
+
+
+def parse_local(pdf_data: bytes) -> Tuple[Dict, float]:
+    """Parse a DARS PDF without the model; see parse_text."""
+    return parse_text(extract_text(pdf_data))
+
+
+def parse_with_model(client, pdf_data: bytes, usage=None, deadline: Optional[float] = None) -> Dict:
+    """
+    Parse a DARS PDF with Claude's PDF reading capability.
+
+    Args:
+        client: llm_gateway.LLMGateway
+        pdf_data: Raw PDF bytes
+        usage: Optional prompts.PromptUsage that records the call's tokens and latency
+        deadline: time.time() by which the call must finish; the gateway default if None
+
+    Returns:
+        The parsed DARS fields
+
+    Raises:
+        json.JSONDecodeError: If the model's response is not JSON
+    """
+    pdf_base64 = base64.standard_b64encode(pdf_data).decode('utf-8')
+    started = time.perf_counter()
+    message = client.messages.create(
+        deadline=deadline,
+        model="claude-sonnet-4-5-20250929",
+        max_tokens=2000,
+        system=dars_system(),
+        messages=[{"role": "user", "content": dars_request(pdf_base64)}]
+    )
+    if usage is not None:
+        usage.record("dars", getattr(message, 'usage', None), time.perf_counter() - started)
+
+    response_text = message.content[0].text
+    print(f"\n=== DARS PARSING DEBUG ===")
+    print(f"Claude's raw response: {response_text}")
+    print(f"=== END DARS PARSING DEBUG ===\n")
+    return json.loads(response_text)
+
+
+def parse_dars_report(pdf_data: bytes, client, cache: Optional[ResultCache] = None, usage=None,
+                      min_confidence: float = LOCAL_CONFIDENCE_THRESHOLD,
+                      deadline: Optional[float] = None) -> Tuple[Dict, str]:
+    """
+    Parse a DARS PDF: cached result, then the local parser, then the model.
+
+    Args:
+        pdf_data: Raw PDF bytes
+        client: llm_gateway.LLMGateway used when the local parse is not
+            confident; None raises ValueError instead
+        cache: Parsed-report cache from open_dars_cache()
+        usage: Optional prompts.PromptUsage for the model call
+        min_confidence: Lowest local-parse confidence accepted without the model
+        deadline: time.time() by which a model call must finish
+
+    Returns:
+        (parsed DARS fields, source) where source is "cache", "local" or "model"
+    """
+    key = dars_key(pdf_data)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, "cache"
+
+    dars_data, confidence = parse_local(pdf_data)
+    if confidence >= min_confidence:
+        return dars_data, "local"
+    if client is None:
+        raise ValueError(f"Local parse confidence {confidence} is below {min_confidence} and no model client was given")
+
+    print(f"Local DARS parse confidence {confidence} is below {min_confidence}; asking the model")
+    dars_data = parse_with_model(client, pdf_data, usage, deadline)
+    if dars_data.get("major"):
+        dars_data["major"] = normalize_major(dars_data["major"]) or dars_data["major"]
+    if cache is not None:
+        cache.put(key, dars_data)
+    return dars_data, "model"
@@ -0,0 +1,201 @@
+"""
+Precompiled degree-audit engine.
+
+Each major's required courses and elective-category quotas from
+DEGREE_REQUIREMENTS are compiled once into bitmasks over canonical course
+codes, so auditing a student's completed and in-progress courses is a few
+integer operations. Results are memoized by a hash of the audited record
+itself (major and course lists), never by a student identity that could
+default to a shared value.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from course_catalog import CourseCatalog, canonical_code
+from schedule_solver import course_credits
+
+
+MEMO_ENTRIES = 1024  # Students whose latest audit is kept
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+class MajorRequirements:
+    """One major's requirements compiled to bitmasks."""
+
+    __slots__ = ("major", "bits", "required", "categories", "total_credits")
+
+    def __init__(self, major: str, requirements: Dict):
+        self.major = major
+        self.total_credits = requirements.get("total_credits", 0)
+        self.bits = {}
+
+        self.required = [(code, self._bit(code)) for code in requirements.get("required_courses", [])]
+
+        # (name, quota, options mask, [(code, bit)])
+        self.categories = []
+        for name, category in requirements.get("elective_categories", {}).items():
+            options = [(code, self._bit(code)) for code in category.get("options", [])]
+            mask = 0
+            for _, bit in options:
+                mask |= bit
+            self.categories.append((name, category.get("required", 0), mask, options))
+
+    def _bit(self, course_code: str) -> int:
+        key = canonical_code(course_code)
+        if key not in self.bits:
+            self.bits[key] = 1 << len(self.bits)
+        return self.bits[key]
+
+    def mask(self, course_codes: Iterable[str]) -> int:
+        """Bitset of the codes that appear in this major's requirements."""
+        mask = 0
+        for code in course_codes:
+            mask |= self.bits.get(canonical_code(code), 0)
+        return mask
+
+
+class AuditEngine:
+    """
+    Audits students against compiled degree requirements.
+
+    Args:
+        degree_requirements: DEGREE_REQUIREMENTS-style dict keyed by major
+        catalog: Catalog used to look up credits when DARS totals are missing
+    """
+
+    def __init__(self, degree_requirements: Dict, catalog: Optional[CourseCatalog] = None,
+                 memo_entries: int = MEMO_ENTRIES):
+        self.majors = {major: MajorRequirements(major, reqs) for major, reqs in degree_requirements.items()}
+        self.catalog = catalog
+        self.memo_entries = memo_entries
+        self._memo = OrderedDict()  # record hash -> audit
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def audit(self, major: str, completed: Iterable[str], in_progress: Iterable[str] = (),
+              credits_earned: Optional[float] = None) -> Optional[Dict]:
+        """
+        Audit one student.
+
+        Args:
+            major: Major name as used in DEGREE_REQUIREMENTS
+            completed: Completed course codes (any code style)
+            in_progress: Courses currently being taken
+            credits_earned: Total credits from DARS; summed from the catalog if None
+
+        Returns:
+            Dict with required courses (completed / in progress / remaining),
+            per-category quota progress, credit progress and whether every
+            course requirement is met, or None for an unknown major
+        """
+        requirements = self.majors.get(major)
+        if requirements is None:
+            return None
+
+        completed = list(completed)
+        completed_keys = {canonical_code(code) for code in completed}
+        in_progress = [code for code in in_progress if canonical_code(code) not in completed_keys]
+        done = requirements.mask(completed)
+        doing = requirements.mask(in_progress) & ~done
+
+        required = {"completed": [], "in_progress": [], "remaining": []}
+        for code, bit in requirements.required:
+            state = "completed" if done & bit else "in_progress" if doing & bit else "remaining"
+            required[state].append(code)
+
+        categories = {}
+        for name, quota, mask, options in requirements.categories:
+            count = _popcount(done & mask)
+            taking = _popcount(doing & mask)
+            categories[name] = {
+                "required": quota,
+                "completed": count,
+                "in_progress": taking,
+                "remaining": max(0, quota - count - taking),
+                "satisfied": count >= quota,
+                "options_remaining": [code for code, bit in options if not (done | doing) & bit]
+            }
+
+        if credits_earned is None:
+            credits_earned = self._credits(completed)
+        credits_in_progress = self._credits(in_progress)
+        total = requirements.total_credits
+
+        return {
+            "major": major,
+            "required_courses": required,
+            "elective_categories": categories,
+            "satisfied_categories": [name for name, category in categories.items() if category["satisfied"]],
+            "credits": {
+                "earned": credits_earned,
+                "in_progress": credits_in_progress,
+                "required": total,
+                "remaining": max(0, total - credits_earned),
+                "percent_complete": round(100 * credits_earned / total, 1) if total else None
+            },
+            "requirements_met": not required["remaining"] and not required["in_progress"] and all(
+                category["satisfied"] for category in categories.values())
+        }
+
+    def audit_student(self, major: str, completed: Iterable[str], in_progress: Iterable[str] = (),
+                      planned: Iterable[str] = (), credits_earned: Optional[float] = None) -> Optional[Dict]:
+        """
+        Memoized audit of a student record.
+
+        Records with the same major, course lists and credits share one
+        memo entry; any change to them is a different entry.
+        """
+        completed, in_progress = list(completed), list(in_progress)
+        key = record_key(major, completed, in_progress, planned, credits_earned)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        result = self.audit(major, completed, in_progress, credits_earned)
+        if result is not None:
+            with self._lock:
+                self._memo[key] = result
+                self._memo.move_to_end(key)
+                while len(self._memo) > self.memo_entries:
+                    self._memo.popitem(last=False)
+        return result
+
+    def _credits(self, course_codes: List[str]) -> int:
+        if self.catalog is None:
+            return 0
+        return sum(course_credits(course) for course in self.catalog.resolve(course_codes))
+
+
+def record_key(major: str, completed: Iterable[str], in_progress: Iterable[str] = (),
+               planned: Iterable[str] = (), credits_earned: Optional[float] = None) -> str:
+    """SHA-256 of a student record's audit inputs, with course codes canonicalized and order ignored."""
+    def codes(values):
+        return sorted({canonical_code(code) for code in values or ()})
+
+    payload = [major, codes(completed), codes(in_progress), codes(planned), credits_earned]
+    return hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode()).hexdigest()
+
+
+def remaining_summary(audit: Dict) -> Dict:
+    """Compact view of what a student still needs, for prompts."""
+    return {
+        "remaining_required_courses": audit["required_courses"]["remaining"],
+        "in_progress_required_courses": audit["required_courses"]["in_progress"],
+        "elective_categories_still_needed": {
+            name: {"courses_needed": category["remaining"], "options": category["options_remaining"]}
+            for name, category in audit["elective_categories"].items() if category["remaining"]
+        },
+        "credits_remaining": audit["credits"]["remaining"]
+    }
@@ -0,0 +1,263 @@
+"""
+Local stand-in for the enroll.wisc.edu course search API.
+
+Serves synthetic (or replayed) search `hits` with the same shape the real
+API returns, with configurable catalog size, sections per course, latency
+and error rate, so the course clients can be load-tested offline.
+
+Usage:
+    python fake_enroll_server.py --courses 10000 --latency 0.05 --error-rate 0.01
+    python fake_enroll_server.py --replay snapshots/1262/<version>.json
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+SUBJECTS = [
+    "COMP SCI", "MATH", "STAT", "PHYSICS", "CHEM", "ECON", "E C E", "BIOLOGY",
+    "PSYCH", "ENGL", "HISTORY", "POLI SCI", "SOC", "I SY E", "M E", "GEOG"
+]
+DAY_PATTERNS = ["MWF", "TR", "MW", "WF", "M", "T", "W", "R", "F"]
+BUILDINGS = ["COMPUTER SCIENCES", "VAN VLECK", "ENGINEERING HALL", "BASCOM HALL",
+             "SOCIAL SCIENCE", "CHAMBERLIN HALL", "GRAINGER HALL", "MOSSE HUMANITIES"]
+INSTRUCTORS = ["Jane Smith", "Wei Zhang", "Maria Garcia", "Ahmed Khan", "Emily Chen",
+               "John Miller", "Priya Patel", "Carlos Rivera", "Anna Kowalski", "Sam Lee"]
+
+
+def generate_catalog(size: int, sections_per_course: int = 3, seed: int = 0) -> List[Dict]:
+    """
+    Generate a synthetic catalog of search hits.
+
+    Subjects hold roughly 100 courses each; subjects beyond the built-in
+    list are named SUBJ 001, SUBJ 002, ...
+
+    Args:
+        size: Number of courses
+        sections_per_course: Sections (LEC plus DIS) per course
+        seed: Random seed, so runs are reproducible
+
+    Returns:
+        List of hit dicts shaped like the real search API's
+    """
+    rng = random.Random(seed)
+    subject_count = max(1, (size + 99) // 100)
+    subjects = SUBJECTS[:subject_count] + [f"SUBJ {i:03d}" for i in range(subject_count - len(SUBJECTS))]
+
+    hits = []
+    for index in range(size):
+        subject = subjects[index % subject_count]
+        number = 100 + (index // subject_count) * 5
+        designation = f"{subject} {number}"
+        credits = rng.choice([1, 2, 3, 3, 3, 4, 4])
+        prereq_number = number - rng.choice([100, 200, 300])
+        prereqs = f"{subject} {prereq_number}" if prereq_number >= 100 else "None"
+
+        sections = []
+        for section_index in range(sections_per_course):
+            section_type = "LEC" if section_index == 0 else "DIS"
+            start = rng.choice(range(8, 18)) * 60 + rng.choice([0, 30])
+            length = 75 if section_type == "LEC" else 50
+            total = rng.choice([20, 30, 40, 120, 250])
+            sections.append({
+                "number": f"{section_index + 1:03d}" if section_type == "LEC" else f"{300 + section_index:03d}",
+                "scheduleType": section_type,
+                "instructors": [{"name": rng.choice(INSTRUCTORS)}],
+                "seatsAvailable": rng.randint(0, total),
+                "totalSeats": total,
+                "schedules": [{
+                    "days": rng.choice(DAY_PATTERNS),
+                    "startTime": start * 60000,
+                    "endTime": (start + length) * 60000,
+                    "location": {"room": str(rng.randint(1000, 6999)), "building": rng.choice(BUILDINGS)}
+                }]
+            })
+
+        hits.append({
+            "courseId": f"{index:06d}",
+            "courseDesignationRaw": designation,
+            "title": f"{subject.title()} Topics {number}",
+            "creditRange": str(credits),
+            "minimumCredits": credits,
+            "maximumCredits": credits,
+            "enrollmentPrerequisites": prereqs,
+            "description": f"Synthetic course {designation} covering topic {rng.randint(1, 10000)}.",
+            "subject": {"shortDescription": subject},
+            "catalogNumber": str(number),
+            "sections": sections
+        })
+
+    return hits
+
+
+class FakeEnrollServer:
+    """
+    Threaded HTTP server answering /api/search/v1 requests from memory.
+
+    Supports keyword search by subject, designation or substring,
+    page/pageSize pagination, ETag revalidation and a subjectsMap endpoint.
+    """
+
+    def __init__(self, hits: Optional[List[Dict]] = None, catalog_size: int = 1000,
+                 sections_per_course: int = 3, latency: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.hits = hits if hits is not None else generate_catalog(catalog_size, sections_per_course, seed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.by_subject = {}
+        self.by_designation = {}
+        for hit in self.hits:
+            self.by_subject.setdefault(hit["subject"]["shortDescription"].lower(), []).append(hit)
+            self.by_designation[hit["courseDesignationRaw"].lower()] = hit
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def api_url(self) -> str:
+        """Base URL to use in place of https://enroll.wisc.edu/api/search/v1."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/search/v1"
+
+    def start(self) -> "FakeEnrollServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def search(self, keywords: str) -> List[Dict]:
+        """Answer a keyword search the way the real API roughly does."""
+        keywords = keywords.strip().lower()
+        if not keywords or keywords == "*":
+            return self.hits
+        if keywords in self.by_subject:
+            return self.by_subject[keywords]
+        if keywords in self.by_designation:
+            return [self.by_designation[keywords]]
+        return [
+            hit for hit in self.hits
+            if keywords in hit["courseDesignationRaw"].lower() or keywords in hit["title"].lower()
+        ]
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._should_fail():
+                    self._send(503, {"error": "injected failure"})
+                    return
+
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+                if url.path.startswith("/api/search/v1/subjectsMap/"):
+                    subjects = sorted({hit["subject"]["shortDescription"] for hit in server.hits})
+                    body = {"0": "All"}
+                    body.update({str(index + 1): name for index, name in enumerate(subjects)})
+                    self._send(200, body)
+                elif url.path == "/api/search/v1/courses":
+                    hits = server.search(query.get("keywords") or query.get("query") or "")
+                    if "pageSize" in query:
+                        page_size = int(query["pageSize"])
+                        page = int(query.get("page", 0))
+                        hits_page = hits[page * page_size:(page + 1) * page_size]
+                    else:
+                        hits_page = hits
+                    self._send(200, {"found": len(hits), "hits": hits_page})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def _send(self, status: int, body: Dict):
+                data = json.dumps(body).encode()
+                etag = '"' + hashlib.md5(data).hexdigest() + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 200:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake enroll.wisc.edu search API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--courses", type=int, default=1000, help="Synthetic catalog size")
+    parser.add_argument("--sections", type=int, default=3, help="Sections per course")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="Serve the hits from a recorded snapshot file instead")
+    args = parser.parse_args()
+
+    hits = None
+    if args.replay:
+        with open(args.replay) as f:
+            hits = json.load(f)["hits"]
+
+    server = FakeEnrollServer(
+        hits=hits,
+        catalog_size=args.courses,
+        sections_per_course=args.sections,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        port=args.port
+    )
+    print(f"Serving {len(server.hits)} courses at {server.api_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Local stand-in for the Anthropic Messages API.
+
+FakeAnthropic answers messages.create and messages.stream in-process with
+configurable latency, streaming speed and injected 429 / 5xx errors, so
+the full request path (job queue, gateway, streaming parser, caches) can
+be load-tested offline. Schedule prompts are answered with the
+pre-validated candidates they contain and DARS requests with a fixed
+report.
+"""
+
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import anthropic
+
+try:
+    import httpx2 as httpx  # The HTTP client newer anthropic releases are built on
+except ImportError:
+    import httpx
+
+
+CANDIDATES_HEADER = "Pre-validated Candidate Schedules:"
+SAMPLE_DARS = {
+    "major": "Computer Science",
+    "minor_or_certificate": None,
+    "completed_courses": ["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"],
+    "in_progress_courses": ["COMP SCI 354"],
+    "planned_courses": [],
+    "total_credits_earned": 45,
+    "gpa": 3.4
+}
+
+_REQUEST = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+
+
+def _text_blocks(kwargs: Dict) -> List[Dict]:
+    blocks = []
+    for message in kwargs.get('messages', []):
+        content = message.get('content')
+        blocks.extend([{"type": "text", "text": content}] if isinstance(content, str) else content or [])
+    return blocks
+
+
+def respond(kwargs: Dict) -> str:
+    """Response text for a Messages API request."""
+    blocks = _text_blocks(kwargs)
+    if any(block.get('type') == 'document' for block in blocks):
+        return json.dumps(SAMPLE_DARS)
+
+    text = "\n".join(block.get('text', '') for block in blocks)
+    if CANDIDATES_HEADER in text:
+        try:
+            candidates = json.loads(text.split(CANDIDATES_HEADER, 1)[1].strip().splitlines()[0])
+        except (ValueError, IndexError):
+            candidates = []
+        return json.dumps([
+            {
+                "name": f"Option {index}",
+                "courses": candidate["courses"],
+                "total_credits": candidate["total_credits"],
+                "rationale": "Mock ranking of a pre-validated candidate schedule"
+            }
+            for index, candidate in enumerate(candidates[:3], 1)
+        ], indent=2)
+    return "[]"
+
+
+def _message(kwargs: Dict, text: str):
+    system = kwargs.get('system') or []
+    system_blocks = [{"text": system}] if isinstance(system, str) else system
+    prompt_chars = sum(len(block.get('text', '')) for block in _text_blocks(kwargs) + system_blocks)
+    return SimpleNamespace(
+        id=f"msg_fake_{random.getrandbits(32):08x}",
+        model=kwargs.get('model'),
+        role="assistant",
+        stop_reason="end_turn",
+        content=[SimpleNamespace(type="text", text=text)],
+        usage=SimpleNamespace(
+            input_tokens=prompt_chars // 4,
+            output_tokens=len(text) // 4,
+            cache_read_input_tokens=0,
+            cache_creation_input_tokens=0
+        )
+    )
+
+
+class FakeStream:
+    """Context manager mirroring anthropic's MessageStream: text_stream and get_final_message."""
+
+    def __init__(self, fake, kwargs: Dict, timeout: Optional[float]):
+        self._fake = fake
+        self._kwargs = kwargs
+        self._timeout = timeout
+        self._text = None
+
+    def __enter__(self):
+        self._fake._call(self._timeout)  # Time to first token, plus injected errors
+        self._text = respond(self._kwargs)
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @property
+    def text_stream(self):
+        for start in range(0, len(self._text), self._fake.chunk_chars):
+            time.sleep(self._fake.chunk_delay)
+            yield self._text[start:start + self._fake.chunk_chars]
+
+    def get_final_message(self):
+        return _message(self._kwargs, self._text)
+
+
+class _FakeMessages:
+    def __init__(self, fake):
+        self._fake = fake
+
+    def create(self, timeout: Optional[float] = None, **kwargs):
+        self._fake._call(timeout)
+        time.sleep(self._fake.chunk_delay * len(respond(kwargs)) / self._fake.chunk_chars)
+        return _message(kwargs, respond(kwargs))
+
+    def stream(self, timeout: Optional[float] = None, **kwargs):
+        return FakeStream(self._fake, kwargs, timeout)
+
+
+class FakeAnthropic:
+    """
+    Drop-in for anthropic.Anthropic in load tests.
+
+    Args:
+        latency: Seconds before the first token
+        jitter: Fraction of latency added or removed at random
+        chunk_chars: Characters per streamed text chunk
+        chunk_delay: Seconds between streamed chunks
+        rate_limit_rate: Fraction of calls failing with 429
+        error_rate: Fraction of calls failing with 529 overloaded
+    """
+
+    def __init__(self, latency: float = 1.0, jitter: float = 0.2, chunk_chars: int = 24,
+                 chunk_delay: float = 0.02, rate_limit_rate: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.messages = _FakeMessages(self)
+        self.calls = 0
+
+    def _call(self, timeout: Optional[float]):
+        self.calls += 1
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            raise anthropic.RateLimitError(
+                "Rate limited (fake)", body=None,
+                response=httpx.Response(429, request=_REQUEST, headers={"retry-after": "1"}))
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise anthropic.InternalServerError(
+                "Overloaded (fake)", body=None, response=httpx.Response(529, request=_REQUEST))
+
+        delay = self.latency * (1 + random.uniform(-self.jitter, self.jitter))
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise anthropic.APITimeoutError(request=_REQUEST)
+        time.sleep(delay)
@@ -0,0 +1,269 @@
+"""
+In-process background job queue for model calls.
+
+Routes submit long-running work (DARS parsing, schedule generation) and
+return a job ID at once instead of holding a Flask worker for the whole
+model call. A bounded pool of worker threads runs jobs in priority order;
+each job has a deadline covering its time in the queue and its run time.
+Jobs can publish partial results (one event per streamed schedule) that
+clients read by polling with an event cursor or over SSE.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional
+
+from streaming import sse_event
+
+
+PRIORITY_INTERACTIVE = 0    # A student is waiting on the page
+PRIORITY_BACKGROUND = 10    # Prefetching, bulk work
+JOB_WORKERS = int(os.getenv('LLM_JOB_WORKERS', 4))
+MAX_PENDING = 200           # Queued jobs beyond this are rejected
+FINISHED_JOBS = 1000        # Finished jobs kept for polling
+FINISHED_TTL = 15 * 60      # Seconds a finished job stays fetchable
+DEFAULT_TIMEOUT = 120
+HEARTBEAT_SECONDS = 15       # SSE keep-alive interval while a job is quiet
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+FINISHED_STATES = (SUCCEEDED, FAILED, TIMED_OUT)
+
+
+class QueueFull(Exception):
+    """Raised by submit when MAX_PENDING jobs are already queued."""
+
+
+class Job:
+    """One unit of background work and its progress."""
+
+    def __init__(self, kind: str, fn: Callable, args: tuple, kwargs: Dict, priority: int,
+                 timeout: float, owner: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.owner = owner
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.deadline = self.created_at + timeout
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self._changed = threading.Condition()
+
+    @property
+    def expired(self) -> bool:
+        return time.time() > self.deadline
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def publish(self, event: str, data) -> bool:
+        """
+        Record a partial result for pollers and SSE listeners.
+
+        Returns:
+            False once the job has timed out, so the job function can stop early
+        """
+        with self._changed:
+            if self.finished:
+                return False
+            self.events.append((event, data))
+            self._changed.notify_all()
+        return True
+
+    def wait(self, cursor: int, timeout: float) -> List:
+        """Events after cursor, waiting up to timeout seconds for one to arrive or the job to finish."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > cursor or self.finished, timeout)
+            return self.events[cursor:]
+
+    def _finish(self, status: str, result=None, error: Optional[str] = None) -> bool:
+        with self._changed:
+            if self.finished:
+                return False
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self.fn = self.args = self.kwargs = None
+            self._changed.notify_all()
+        return True
+
+    def to_json(self, cursor: int = 0) -> Dict:
+        """Status, the events after cursor and, once finished, the result or error."""
+        with self._changed:
+            events = self.events[cursor:]
+            data = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "events": [{"event": event, "data": payload} for event, payload in events],
+                "next_cursor": cursor + len(events),
+                "queued_seconds": round((self.started_at or time.time()) - self.created_at, 3),
+                "run_seconds": round((self.finished_at or time.time()) - self.started_at, 3)
+                if self.started_at else None
+            }
+            if self.status == SUCCEEDED:
+                data["result"] = self.result
+            elif self.finished:
+                data["error"] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Priority queue drained by a bounded pool of worker threads.
+
+    Lower priority numbers run first; jobs of equal priority run in
+    submission order. A job whose deadline passes while queued is failed
+    without running; one that overruns while running is marked timed out
+    at once (pollers stop waiting) and its eventual result is discarded.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._heap = []
+        self._sequence = itertools.count()
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._running = 0
+        self.stats = {"submitted": 0, "rejected": 0, SUCCEEDED: 0, FAILED: 0, TIMED_OUT: 0}
+
+        for index in range(workers):
+            threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True).start()
+        threading.Thread(target=self._watch_deadlines, name="job-deadlines", daemon=True).start()
+
+    def submit(self, kind: str, fn: Callable, *args, priority: int = PRIORITY_INTERACTIVE,
+               timeout: float = DEFAULT_TIMEOUT, owner: Optional[str] = None, **kwargs) -> Job:
+        """
+        Queue fn(job, *args, **kwargs) to run in the background.
+
+        The function receives its Job first so it can publish partial
+        results and check job.expired between steps.
+
+        Raises:
+            QueueFull: If max_pending jobs are already waiting
+        """
+        job = Job(kind, fn, args, kwargs, priority, timeout, owner)
+        with self._lock:
+            if len(self._heap) >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise QueueFull(f"{len(self._heap)} jobs already queued")
+            heapq.heappush(self._heap, (priority, next(self._sequence), job))
+            self._jobs[job.id] = job
+            self.stats["submitted"] += 1
+            self._available.notify()
+        return job
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[Job]:
+        """A job by ID; jobs submitted with an owner are only visible to that owner."""
+        with self._lock:
+            self._expire_finished()
+            job = self._jobs.get(job_id)
+        if job is None or (job.owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def status(self) -> Dict:
+        """Queue depth, busy workers and outcome counters."""
+        with self._lock:
+            return {
+                **self.stats,
+                "queued": len(self._heap),
+                "running": self._running,
+                "workers": self.workers,
+                "retained": len(self._jobs)
+            }
+
+    def _work(self):
+        while True:
+            with self._available:
+                self._available.wait_for(lambda: self._heap)
+                _, _, job = heapq.heappop(self._heap)
+                if job.expired:
+                    self._record(job, TIMED_OUT, error="Timed out waiting in the queue")
+                    continue
+                self._running += 1
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            try:
+                result = job.fn(job, *job.args, **job.kwargs)
+                status, error = SUCCEEDED, None
+            except Exception as e:
+                print(f"Job {job.kind} {job.id} failed: {e}")
+                result, status, error = None, FAILED, str(e)
+
+            with self._lock:
+                self._running -= 1
+                self._record(job, status, result, error)
+
+    def _watch_deadlines(self):
+        """Mark overrunning jobs as timed out so pollers and SSE listeners stop waiting."""
+        while True:
+            time.sleep(0.5)
+            with self._lock:
+                for job in list(self._jobs.values()):
+                    if job.status == RUNNING and job.expired:
+                        self._record(job, TIMED_OUT, error="Timed out while running")
+
+    def _record(self, job: Job, status: str, result=None, error: Optional[str] = None):
+        # Called with the lock held
+        if job._finish(status, result, error):
+            self.stats[status] += 1
+            self._finished[job.id] = job
+            self._expire_finished()
+
+    def _expire_finished(self):
+        # Called with the lock held
+        cutoff = time.time() - FINISHED_TTL
+        while self._finished and (len(self._finished) > FINISHED_JOBS
+                                  or next(iter(self._finished.values())).finished_at < cutoff):
+            job_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(job_id, None)
+
+
+def event_stream(job: Job, cursor: int = 0,
+                 finish: Optional[Callable[[Dict], Dict]] = None) -> Iterator[str]:
+    """
+    Server-Sent Events for a job: its published events from cursor on,
+    then "done" with the result or "error", with keep-alive comments while
+    the job is quiet.
+
+    Args:
+        job: Job to follow
+        cursor: Number of events the client has already seen
+        finish: Applied to the final job dict before it is sent, so a route
+            can replace the raw result the way its polling endpoint does
+    """
+    while True:
+        events = job.wait(cursor, HEARTBEAT_SECONDS)
+        for event, data in events:
+            yield sse_event(event, data)
+        cursor += len(events)
+        if job.finished and cursor == len(job.events):
+            final = job.to_json(cursor)
+            if finish is not None:
+                final = finish(final)
+            yield sse_event("done" if job.status == SUCCEEDED else "error", final)
+            return
+        if not events:
+            yield ": keep-alive\n\n"
@@ -0,0 +1,199 @@
+"""
+Content-addressed cache for model results.
+
+Keys are SHA-256 hashes of the canonical request inputs (major, sorted
+completed courses, credits, semester, catalog version, prompt version), so
+students with identical inputs share one model call. A bounded in-process
+LRU sits in front of a SQLite file shared by every worker process.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from course_catalog import canonical_code
+
+
+RESULT_TTL = 6 * 3600  # Seconds a generated schedule set stays valid
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+
+def admin_token_valid(token: Optional[str]) -> bool:
+    """Whether token matches LLM_CACHE_ADMIN_TOKEN; always False when no token is configured."""
+    expected = os.getenv('LLM_CACHE_ADMIN_TOKEN')
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+def cache_key(**fields) -> str:
+    """SHA-256 of the fields as canonical JSON (sorted keys, no whitespace)."""
+    encoded = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def schedule_key(major: str, completed_courses: Iterable[str], target_credits: int, semester: str,
+                 catalog_version: Optional[str], prompt_version: str, interests: str = "") -> str:
+    """Cache key for one generate_schedule_with_claude request; course order and code style don't matter."""
+    return cache_key(
+        kind="schedules",
+        major=major,
+        completed=sorted({canonical_code(code) for code in completed_courses}),
+        target_credits=int(target_credits),
+        semester=" ".join(semester.split()).title(),
+        catalog_version=catalog_version,
+        prompt_version=prompt_version,
+        interests=" ".join((interests or "").lower().split())
+    )
+
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serializable model results.
+
+    Entries are stored as JSON text in both tiers and decoded on every hit,
+    so callers can mutate what they get back without corrupting the cache.
+    With a cipher (e.g. cryptography's Fernet) payloads are encrypted
+    before they reach the SQLite file; the in-process tier stays plaintext.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_entries: int = 256,
+                 max_entries: int = 10000, ttl: int = RESULT_TTL, cipher=None):
+        self.path = path or os.getenv('LLM_CACHE_PATH', os.path.join('.cache', 'llm_results.sqlite3'))
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cipher = cipher
+        self._memory = OrderedDict()  # key -> (payload JSON, expires_at, catalog_version)
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "writes": 0, "invalidated": 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_results (
+                key TEXT PRIMARY KEY,
+                catalog_version TEXT,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_results_version ON llm_results (catalog_version)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_results_accessed ON llm_results (accessed_at)")
+        self._db.commit()
+
+    def get(self, key: str):
+        """Cached result for a key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                tier = "memory_hits"
+                self._memory.move_to_end(key)
+            else:
+                tier = "disk_hits"
+                row = self._db.execute(
+                    "SELECT payload, expires_at, catalog_version FROM llm_results WHERE key = ?", (key,)
+                ).fetchone()
+                payload = self._decrypt(row[0]) if row is not None else None
+                if payload is None:
+                    self.stats["misses"] += 1
+                    return None
+                entry = (payload,) + tuple(row[1:])
+                self._db.execute("UPDATE llm_results SET accessed_at = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self._remember(key, entry)
+
+            if now > entry[1]:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                self._memory.pop(key, None)
+                return None
+            self.stats[tier] += 1
+        return json.loads(entry[0])
+
+    def put(self, key: str, payload, catalog_version: Optional[str] = None, ttl: Optional[int] = None):
+        """Store a result and evict the least recently used entries beyond max_entries."""
+        now = time.time()
+        entry = (json.dumps(payload, separators=(",", ":")), now + (ttl or self.ttl), catalog_version)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, catalog_version, self._encrypt(entry[0]), now, entry[1], now)
+            )
+            self._evict()
+            self._db.commit()
+            self._remember(key, entry)
+            self.stats["writes"] += 1
+
+    def invalidate(self, catalog_version: Optional[str] = None) -> int:
+        """
+        Drop results generated against a catalog version (every result if None).
+
+        Returns:
+            Number of entries removed from the shared tier
+        """
+        with self._lock:
+            if catalog_version is None:
+                removed = self._db.execute("DELETE FROM llm_results").rowcount
+                self._memory.clear()
+            else:
+                removed = self._db.execute(
+                    "DELETE FROM llm_results WHERE catalog_version = ?", (catalog_version,)
+                ).rowcount
+                for key in [key for key, entry in self._memory.items() if entry[2] == catalog_version]:
+                    del self._memory[key]
+            self._db.commit()
+            self.stats["invalidated"] += removed
+        return removed
+
+    def status(self) -> Dict:
+        """Hit/miss counters, hit rate and tier sizes."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else None
+        return stats
+
+    def _encrypt(self, payload: str) -> str:
+        if self.cipher is None:
+            return payload
+        return self.cipher.encrypt(payload.encode()).decode()
+
+    def _decrypt(self, stored: str) -> Optional[str]:
+        """Plaintext payload, or None if it can't be decrypted (e.g. the key was rotated)."""
+        if self.cipher is None:
+            return stored
+        try:
+            return self.cipher.decrypt(stored.encode()).decode()
+        except Exception:
+            return None
+
+    def _remember(self, key: str, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM llm_results WHERE key IN "
+                "(SELECT key FROM llm_results ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
@@ -0,0 +1,319 @@
+"""
+Rate-limited gateway in front of the Anthropic Messages API.
+
+Every model call from the web apps and the DARS ingester goes through one
+LLMGateway, which:
+    - admits requests through token buckets for requests and tokens per
+      minute (estimated up front, corrected from actual usage),
+    - caps concurrent calls per model,
+    - gives each call a deadline that bounds queueing, the HTTP timeout
+      and retries, and
+    - retries 429s, 5xx/overloaded responses and connection errors with
+      jittered backoff, honoring retry-after.
+
+It exposes the same `messages.create` / `messages.stream` surface as
+anthropic.Anthropic, so callers don't change, and can run against
+fake_llm.FakeAnthropic for offline load tests (LLM_BACKEND=mock).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import anthropic
+
+from uw_api import backoff_delay
+
+
+REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', 50))
+TOKENS_PER_MINUTE = float(os.getenv('LLM_TOKENS_PER_MINUTE', 80000))
+MODEL_CONCURRENCY = int(os.getenv('LLM_MODEL_CONCURRENCY', 8))
+DEFAULT_DEADLINE = float(os.getenv('LLM_DEADLINE', 60))  # Seconds per call, including waits and retries
+MAX_RETRIES = 3
+CHARS_PER_TOKEN = 4            # Rough estimate for admission; corrected from usage afterwards
+DOCUMENT_CHARS_PER_TOKEN = 8   # base64 PDF characters per token, equally rough
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call can't be admitted or completed before its deadline."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float, deadline: float) -> bool:
+        """
+        Take amount tokens, waiting for the refill if needed.
+
+        Requests larger than the bucket only wait for a full bucket.
+
+        Returns:
+            False if the tokens won't be available before deadline (time.time())
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return True
+                wait = (amount - self.tokens) / self.rate
+            if time.time() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def refund(self, amount: float):
+        """Return tokens taken by an overestimate (negative amounts charge extra)."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed model call is worth retrying: throttling, overload, server or connection errors."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_after(error: Exception) -> float:
+    """Seconds the API asked us to wait before retrying, or 0."""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after', 0)) if response is not None else 0.0
+    except ValueError:
+        return 0.0
+
+
+def estimate_tokens(kwargs: Dict) -> int:
+    """Rough input + output token estimate for a Messages API call, used for admission."""
+    chars = 0
+    documents = 0
+    for block in [kwargs.get('system')] + [message.get('content') for message in kwargs.get('messages', [])]:
+        if isinstance(block, str):
+            chars += len(block)
+        elif isinstance(block, list):
+            for part in block:
+                if part.get('type') == 'document':
+                    documents += len(part.get('source', {}).get('data', ''))
+                else:
+                    chars += len(part.get('text') or json.dumps(part))
+    return chars // CHARS_PER_TOKEN + documents // DOCUMENT_CHARS_PER_TOKEN + kwargs.get('max_tokens', 0)
+
+
+def streamed_message(stream):
+    """
+    A stream's message as received so far, or None before its first event.
+
+    anthropic's MessageStream exposes this without reading further, so a
+    caller that stopped early is not made to wait for the rest; backends
+    without a snapshot (fake_llm.FakeStream) give their final message.
+    """
+    try:
+        return stream.current_message_snapshot
+    except AssertionError:
+        return None
+    except AttributeError:
+        return stream.get_final_message()
+
+
+class _Messages:
+    """messages.create / messages.stream routed through the gateway."""
+
+    def __init__(self, gateway):
+        self._gateway = gateway
+
+    def create(self, deadline: Optional[float] = None, **kwargs):
+        return self._gateway.create(deadline, **kwargs)
+
+    def stream(self, deadline: Optional[float] = None, **kwargs):
+        return self._gateway.stream(deadline, **kwargs)
+
+
+class LLMGateway:
+    """
+    Admission control, per-model concurrency, deadlines and retries for
+    model calls.
+
+    Args:
+        backend: anthropic.Anthropic (built with max_retries=0) or a FakeAnthropic
+        requests_per_minute: Request budget
+        tokens_per_minute: Input + output token budget
+        model_concurrency: Concurrent calls allowed per model
+        deadline: Default seconds a call may take end to end
+        retries: Retries after the first attempt
+    """
+
+    def __init__(self, backend, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE, model_concurrency: int = MODEL_CONCURRENCY,
+                 deadline: float = DEFAULT_DEADLINE, retries: int = MAX_RETRIES):
+        self.backend = backend
+        self.requests = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 60 * 10))
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self.model_concurrency = model_concurrency
+        self.deadline = deadline
+        self.retries = retries
+        self.messages = _Messages(self)
+        self._slots = {}      # model -> BoundedSemaphore
+        self._in_flight = {}  # model -> running calls
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0, "deadline_exceeded": 0}
+
+    def create(self, deadline: Optional[float] = None, **kwargs):
+        """messages.create with admission, concurrency limit, deadline and retries."""
+        deadline = deadline or time.time() + self.deadline
+        estimate = estimate_tokens(kwargs)
+        with self._admitted(kwargs['model'], estimate, deadline):
+            message = self._with_retries(
+                lambda timeout: self.backend.messages.create(timeout=timeout, **kwargs), deadline)
+        self._reconcile(estimate, message)
+        return message
+
+    @contextmanager
+    def stream(self, deadline: Optional[float] = None, **kwargs):
+        """
+        messages.stream with the same controls.
+
+        Only opening the stream is retried; once text has started flowing a
+        failure propagates to the caller. When the caller is done the token
+        budget is corrected from the usage streamed so far.
+        """
+        deadline = deadline or time.time() + self.deadline
+        estimate = estimate_tokens(kwargs)
+        with self._admitted(kwargs['model'], estimate, deadline):
+            manager = None
+
+            def open_stream(timeout):
+                nonlocal manager
+                manager = self.backend.messages.stream(timeout=timeout, **kwargs)
+                return manager.__enter__()
+
+            stream = self._with_retries(open_stream, deadline)
+            try:
+                yield stream
+            except BaseException:
+                self._reconcile(estimate, streamed_message(stream))
+                manager.__exit__(*sys.exc_info())
+                raise
+            self._reconcile(estimate, streamed_message(stream))
+            manager.__exit__(None, None, None)
+
+    def status(self) -> Dict:
+        """Call counters, calls in flight per model and the remaining bucket budgets."""
+        with self._lock:
+            in_flight = dict(self._in_flight)
+            stats = dict(self.stats)
+        with self.requests._lock:
+            self.requests._refill()
+            requests_available = round(self.requests.tokens, 1)
+        with self.tokens._lock:
+            self.tokens._refill()
+            tokens_available = round(self.tokens.tokens)
+        return {
+            **stats,
+            "backend": type(self.backend).__name__,
+            "in_flight": in_flight,
+            "model_concurrency": self.model_concurrency,
+            "requests_available": requests_available,
+            "tokens_available": tokens_available
+        }
+
+    @contextmanager
+    def _admitted(self, model: str, estimate: int, deadline: float):
+        """Hold a request token, the estimated tokens and a concurrency slot for model."""
+        if not self.requests.acquire(1, deadline) or not self.tokens.acquire(estimate, deadline):
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded(f"Rate limit budget not available before the deadline for {model}")
+
+        with self._lock:
+            slots = self._slots.setdefault(model, threading.BoundedSemaphore(self.model_concurrency))
+        if not slots.acquire(timeout=max(0.0, deadline - time.time())):
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded(f"No {model} slot free before the deadline")
+
+        with self._lock:
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+            self.stats["calls"] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[model] -= 1
+            slots.release()
+
+    def _reconcile(self, estimate: int, message):
+        """Return (or charge) the difference between a call's estimate and its reported usage."""
+        usage = getattr(message, 'usage', None)
+        if usage is None:
+            return
+        used = ((getattr(usage, 'input_tokens', 0) or 0) + (getattr(usage, 'output_tokens', 0) or 0)
+                + (getattr(usage, 'cache_creation_input_tokens', 0) or 0))
+        self.tokens.refund(estimate - used)
+
+    def _with_retries(self, call, deadline: float):
+        """Run call(timeout) until it succeeds, fails permanently or the deadline passes."""
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded("Model call deadline passed")
+            try:
+                return call(remaining)
+            except Exception as e:
+                if isinstance(e, anthropic.RateLimitError):
+                    self._count("rate_limited")
+                if not is_retryable(e) or attempt == self.retries:
+                    self._count("failures")
+                    raise
+                delay = max(backoff_delay(attempt), retry_after(e))
+                if time.time() + delay >= deadline:
+                    self._count("deadline_exceeded")
+                    raise DeadlineExceeded(f"No time left to retry after: {e}") from e
+                self._count("retries")
+                print(f"Retrying model call in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+
+def create_gateway(share: float = 1.0) -> LLMGateway:
+    """
+    Gateway configured from the environment.
+
+    LLM_BACKEND=mock serves responses from fake_llm.FakeAnthropic
+    (LLM_MOCK_LATENCY seconds per call) instead of the Anthropic API.
+
+    Args:
+        share: Fraction of the rate budgets for this process, e.g.
+            1 / workers when several processes share one API key
+    """
+    if os.getenv('LLM_BACKEND', 'anthropic') == 'mock':
+        from fake_llm import FakeAnthropic
+        backend = FakeAnthropic(latency=float(os.getenv('LLM_MOCK_LATENCY', 1.0)))
+    else:
+        backend = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), max_retries=0)
+    return LLMGateway(
+        backend,
+        requests_per_minute=REQUESTS_PER_MINUTE * share,
+        tokens_per_minute=TOKENS_PER_MINUTE * share
+    )
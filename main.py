@@ -1,18 +1,51 @@
 # -*- coding: utf-8 -*-
 import os
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, stream_with_context
 from dotenv import load_dotenv
-import anthropic
 import json
+import time
+import uuid
+from course_catalog import AUTOCOMPLETE_LIMIT, CourseCatalog
+from course_index import MAX_SEARCH_LIMIT, SEARCH_LIMIT, build_index, student_query
+from degree_audit import AuditEngine, remaining_summary
+from job_queue import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, JobQueue, QueueFull, event_stream
+from llm_cache import ADMIN_TOKEN_HEADER, ResultCache, admin_token_valid, schedule_key
+from llm_gateway import create_gateway
+from path_planner import plan_graduation
+from prereq_graph import compile_catalog, normalize
+from prompts import (PromptUsage, remaining_requirements, schedule_repair_messages, schedule_request,
+                     schedule_system)
+from schedule_repair import MAX_REPAIR_PROMPTS, RepairStats, ScheduleValidator, validate_response
+from schedule_solver import solve_schedules
+from section_conflicts import enumerate_assignments
+from streaming import ArrayObjectStream, sse_event
+from student_session import configure_sessions, load_student, save_student
 from uw_api import UWMadisonAPI
+from uw_api_async import AsyncUWMadisonAPI
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+configure_sessions(app)  # Student records live server-side; the cookie holds only a session ID
 
-client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+client = create_gateway()  # Rate-limited, deadline-aware Anthropic client (LLM_BACKEND=mock for load tests)
 uw_api = UWMadisonAPI()  # Real UW-Madison course API
+# Serve terms crawled by catalog_ingest.py locally instead of hitting the upstream
+for version in uw_api.load_latest_snapshots():
+    print(f"Loaded catalog snapshot {version}")
+uw_api_async = AsyncUWMadisonAPI(uw_api)  # Concurrent fan-out over a shared connection pool
+schedule_cache = ResultCache()  # Model results shared by students with identical inputs
+prompt_usage = PromptUsage()  # Token and prompt-cache usage per call kind
+repair_stats = RepairStats()  # Model schedule responses accepted, repaired locally or unusable
+
+SECTION_PLAN_LIMIT = 50  # Conflict-free section combinations counted per schedule
+CATALOG_SUBJECTS = ["COMP SCI", "MATH"]
+catalog_cache = {}  # Snapshot version -> CourseCatalog
+catalog_versions = {}  # Semester -> catalog version last used for generation
+SCHEDULE_PROMPT_VERSION = "4"  # Bump when the schedule prompt changes so cached results are not reused
+jobs = JobQueue()  # Model calls run here instead of on request threads
+SCHEDULE_JOB_TIMEOUT = 90  # Seconds from submission, including time in the queue
 
 # Mock course data - replace with actual university API integration
 COURSES = {
@@ -47,21 +80,24 @@ DEGREE_REQUIREMENTS = {
         "total_credits": 120
     }
 }
+audit_engine = AuditEngine(
+    DEGREE_REQUIREMENTS,
+    CourseCatalog(course for courses in COURSES.values() for course in courses)
+)
 
 
 @app.route('/')
 def index():
     # Skip login - auto-create demo user
     if 'user' not in session:
-        session['user'] = {
+        save_student(session, {
             "email": "demo@wisc.edu",
             "name": "Demo Student",
             "major": "Computer Science",
             "year": "Junior",
-            "completed_courses": ["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"],
             "gpa": 3.5
-        }
-    return render_template('dashboard.html', user=session['user'])
+        }, completed=["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"])
+    return render_template('dashboard.html', user=load_student(session))
 
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -77,7 +113,7 @@ def login():
             # In production, validate against university API
             if authenticate_user(email, password, duo_code):
                 user_data = get_user_profile(email)
-                session['user'] = user_data
+                save_student(session, user_data, completed=user_data.get('completed_courses', []))
                 return jsonify({"success": True, "message": "Login successful"})
             else:
                 return jsonify({"success": False, "message": "Invalid credentials"}), 401
@@ -100,9 +136,10 @@ def generate_schedules():
 
     data = request.json
     credit_hours = data.get('credit_hours', 15)
+    use_llm = data.get('use_llm', True)
     semester = data.get('semester', 'Fall 2025')
 
-    user = session['user']
+    user = load_student(session)
     major = user.get('major', 'Computer Science')
     completed_courses = user.get('completed_courses', [])
 
@@ -111,12 +148,208 @@ def generate_schedules():
         major=major,
         completed_courses=completed_courses,
         target_credits=credit_hours,
-        semester=semester
+        semester=semester,
+        use_llm=use_llm,
+        interests=data.get('interests', '')
     )
 
+    attach_section_plans(schedules, semester)
+
     return jsonify({"schedules": schedules})
 
 
+@app.route('/api/generate-schedules/stream', methods=['POST'])
+def generate_schedules_stream():
+    """
+    Server-Sent Events form of /api/generate-schedules.
+
+    Sends a "schedule" event for each schedule as soon as the model
+    finishes it, then a "done" event with the number sent.
+    """
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.json
+    credit_hours = data.get('credit_hours', 15)
+    use_llm = data.get('use_llm', True)
+    semester = data.get('semester', 'Fall 2025')
+
+    user = load_student(session)
+    schedules = stream_schedules_with_claude(
+        major=user.get('major', 'Computer Science'),
+        completed_courses=user.get('completed_courses', []),
+        target_credits=credit_hours,
+        semester=semester,
+        use_llm=use_llm,
+        interests=data.get('interests', '')
+    )
+
+    def events():
+        count = 0
+        for schedule in schedules:
+            attach_section_plans([schedule], semester)
+            count += 1
+            yield sse_event("schedule", schedule)
+        yield sse_event("done", {"count": count})
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def job_owner():
+    """Per-browser ID that scopes background jobs to the session that submitted them."""
+    if 'job_owner' not in session:
+        session['job_owner'] = uuid.uuid4().hex
+    return session['job_owner']
+
+
+def run_schedule_job(job, semester, **kwargs):
+    """Background schedule generation; each schedule is published as soon as it is ready."""
+    schedules = []
+    for schedule in stream_schedules_with_claude(semester=semester, deadline=job.deadline, **kwargs):
+        attach_section_plans([schedule], semester)
+        schedules.append(schedule)
+        if not job.publish("schedule", schedule):
+            break
+    return {"schedules": schedules}
+
+
+@app.route('/api/jobs/schedules', methods=['POST'])
+def submit_schedule_job():
+    """Queue schedule generation and return its job ID at once."""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.json or {}
+    user = load_student(session)
+    try:
+        job = jobs.submit(
+            "schedules", run_schedule_job,
+            priority=PRIORITY_BACKGROUND if data.get('background') else PRIORITY_INTERACTIVE,
+            timeout=SCHEDULE_JOB_TIMEOUT,
+            owner=job_owner(),
+            major=user.get('major', 'Computer Science'),
+            completed_courses=user.get('completed_courses', []),
+            target_credits=data.get('credit_hours', 15),
+            semester=data.get('semester', 'Fall 2025'),
+            use_llm=data.get('use_llm', True),
+            interests=data.get('interests', '')
+        )
+    except QueueFull:
+        return jsonify({"error": "Too many schedule requests in progress; try again shortly"}), 503
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a job. Pass ?cursor=N (the previous next_cursor) to get only new events."""
+    job = jobs.get(job_id, session.get('job_owner'))
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_json(request.args.get('cursor', 0, type=int)))
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events for a job: its partial results, then "done" or "error"."""
+    job = jobs.get(job_id, session.get('job_owner'))
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return Response(event_stream(job, request.args.get('cursor', 0, type=int)), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route('/api/jobs', methods=['GET'])
+def job_queue_status():
+    """Queue depth, busy workers and job outcome counts."""
+    return jsonify(jobs.status())
+
+
+@app.route('/api/degree-audit', methods=['GET'])
+def degree_audit():
+    """Audit the student's completed courses against their major's requirements."""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    user = load_student(session)
+    major = user.get('major', 'Computer Science')
+    audit = audit_engine.audit_student(
+        major,
+        user['completed_only'],
+        user['in_progress_courses'],
+        user['planned_courses'],
+        user.get('total_credits')
+    )
+    if audit is None:
+        return jsonify({"error": f"No degree requirements for {major}"}), 404
+
+    return jsonify(audit)
+
+
+@app.route('/api/graduation-plan', methods=['POST'])
+def graduation_plan():
+    """Plan every remaining semester to graduation in one call."""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.json or {}
+    start_term = data.get('start_term', 'Fall 2025')
+    credit_targets = data.get('credit_targets', 15)
+    if not isinstance(credit_targets, list):
+        credit_targets = [credit_targets]
+    try:
+        credit_targets = [max(1, int(target)) for target in credit_targets]
+        max_terms = max(1, min(int(data.get('max_terms', 10)), 16))
+    except (TypeError, ValueError):
+        return jsonify({"error": "credit_targets and max_terms must be integers"}), 400
+
+    user = load_student(session)
+    major = user.get('major', 'Computer Science')
+    degree_reqs = DEGREE_REQUIREMENTS.get(major)
+    if degree_reqs is None:
+        return jsonify({"error": f"No degree requirements for {major}"}), 404
+
+    plan = plan_graduation(
+        load_catalog(start_term).courses,
+        degree_reqs,
+        user.get('completed_courses', []),
+        start_term,
+        credit_targets,
+        catalog_version=uw_api.catalog_version(start_term),
+        offerings=data.get('offerings'),
+        max_terms=max_terms
+    )
+
+    return jsonify(plan)
+
+
+@app.route('/api/section-plans', methods=['POST'])
+def section_plans():
+    """Enumerate conflict-free section assignments for a list of courses."""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.json or {}
+    course_codes = data.get('course_codes', [])
+    semester = data.get('semester', 'Fall 2025')
+    try:
+        limit = max(1, min(int(data.get('limit', SECTION_PLAN_LIMIT)), 500))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be an integer"}), 400
+    open_only = data.get('open_only', False)
+
+    records = uw_api.get_course_records_for_codes(course_codes, semester)
+    missing = [code for code, course in records.items() if course is None or not course.sections]
+    courses = [course for course in records.values() if course is not None and course.sections]
+
+    plans = enumerate_assignments(courses, limit=limit, open_only=open_only)
+
+    return jsonify({
+        "plans": [[package.to_json() for package in plan] for plan in plans],
+        "courses_without_sections": missing
+    })
+
+
 @app.route('/api/course-sections/<path:course_code>', methods=['GET'])
 def get_course_sections(course_code):
     """Fetch real-time section data for a course."""
@@ -131,6 +364,150 @@ def get_course_sections(course_code):
     return jsonify({"sections": sections})
 
 
+@app.route('/api/course-sections', methods=['POST'])
+def get_course_sections_batch():
+    """Fetch real-time section data for many courses at once."""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.json
+    course_codes = data.get('course_codes', [])
+    semester = data.get('semester', 'Fall 2025')
+
+    print(f"Fetching sections for {len(course_codes)} courses in {semester}...")
+    sections = uw_api.get_sections_for_courses(course_codes, semester)
+
+    return jsonify({"sections": sections})
+
+
+@app.route('/api/courses/autocomplete', methods=['GET'])
+def autocomplete_courses():
+    """Complete a partially typed course code, e.g. 'cs 3' or 'comp sci 30'."""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    prefix = request.args.get('q', '')
+    semester = request.args.get('semester', 'Fall 2025')
+    try:
+        limit = max(1, min(int(request.args.get('limit', AUTOCOMPLETE_LIMIT)), 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    matches = load_catalog(semester).autocomplete(prefix, limit)
+
+    return jsonify({
+        "courses": [
+            {"code": course['code'], "name": course['name'], "credits": course.get('credits')}
+            for course in matches
+        ]
+    })
+
+
+@app.route('/api/courses/search', methods=['GET'])
+def search_courses():
+    """
+    Free-text course search over titles and descriptions, e.g. 'machine learning'.
+    Pass eligible_only=1 to search only courses the student can take next.
+    """
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    query = request.args.get('q', '')
+    semester = request.args.get('semester', 'Fall 2025')
+    limit = max(1, min(request.args.get('limit', SEARCH_LIMIT, type=int), MAX_SEARCH_LIMIT))
+
+    catalog = load_catalog(semester)
+    version = uw_api.catalog_version(semester)
+    among = None
+    if request.args.get('eligible_only') in ('1', 'true'):
+        eligible = compile_catalog(catalog.courses, version).eligible(load_student(session).get('completed_courses', []))
+        among = [course['code'] for course in catalog.courses if normalize(course['code']) in eligible]
+
+    return jsonify({
+        "query": query,
+        "courses": [
+            {
+                "code": course['code'],
+                "name": course['name'],
+                "credits": course.get('credits'),
+                "description": course.get('description'),
+                "score": score
+            }
+            for course, score in build_index(catalog.courses, version).search(query, limit, among)
+        ]
+    })
+
+
+@app.route('/api/llm-cache', methods=['GET'])
+def llm_cache_status():
+    """Hit/miss statistics for the schedule result cache, prompt-cache token usage and schedule repairs."""
+    return jsonify({
+        **schedule_cache.status(),
+        "prompt_cache": prompt_usage.status(),
+        "schedule_repairs": repair_stats.status()
+    })
+
+
+@app.route('/api/llm-gateway', methods=['GET'])
+def llm_gateway_status():
+    """Model call counters, calls in flight per model and remaining rate-limit budget."""
+    return jsonify(client.status())
+
+
+@app.route('/api/llm-cache/invalidate', methods=['POST'])
+def invalidate_llm_cache():
+    """Drop cached schedules for one catalog version, or all of them (admin token required)."""
+    if not admin_token_valid(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return jsonify({"error": "Admin token required"}), 403
+
+    data = request.json or {}
+    removed = schedule_cache.invalidate(data.get('catalog_version'))
+    return jsonify({"removed": removed})
+
+
+@app.route('/api/upstream-status', methods=['GET'])
+def upstream_status():
+    """Circuit breaker and request coalescing state for the UW course API."""
+    return jsonify(uw_api.upstream_status())
+
+
+def load_catalog(semester):
+    """Indexed catalog of CATALOG_SUBJECTS for a term; snapshot-backed terms are indexed once."""
+    version = uw_api.catalog_version(semester)
+    if version in catalog_cache:
+        return catalog_cache[version]
+
+    catalogs = uw_api_async.fetch_courses(CATALOG_SUBJECTS, term=semester)
+    catalog = CourseCatalog(course for subject in CATALOG_SUBJECTS for course in catalogs[subject])
+    if version:
+        catalog_cache[version] = catalog
+    return catalog
+
+
+def attach_section_plans(schedules, semester):
+    """
+    Count conflict-free section combinations for each generated schedule.
+
+    A schedule with any course lacking section data lists those courses in
+    courses_without_sections and gets no conflict_free_options, since a
+    count over the remaining courses would claim more than was checked.
+    """
+    course_codes = list({code for schedule in schedules for code in schedule.get('courses', [])})
+    records = uw_api.get_course_records_for_codes(course_codes, semester)
+
+    for schedule in schedules:
+        codes = schedule.get('courses', [])
+        missing = [code for code in codes if records.get(code) is None or not records[code].sections]
+        schedule['courses_without_sections'] = missing
+        if missing or not codes:
+            schedule.pop('conflict_free_options', None)
+            schedule['section_plans'] = []
+            continue
+        plans = enumerate_assignments([records[code] for code in codes], limit=SECTION_PLAN_LIMIT)
+        schedule['conflict_free_options'] = len(plans)
+        schedule['section_plans'] = [[package.to_json() for package in plan] for plan in plans[:3]]
+
+
 def authenticate_user(email, password, duo_code):
     """
     Mock authentication function.
@@ -156,25 +533,31 @@ def get_user_profile(email):
     }
 
 
-def generate_schedule_with_claude(major, completed_courses, target_credits, semester):
+def prepare_schedule_request(major, completed_courses, target_credits, semester, interests=""):
     """
-    Use Claude to generate intelligent schedule recommendations using REAL UW-Madison data.
+    Everything a schedule request needs before the model is called.
+
+    Returns:
+        Dict with the term catalog, pre-validated candidates, fallback
+        schedules, the result-cache key and catalog version, a validator
+        for the model's schedules, and the cached system prefix and
+        per-student prompt
     """
     degree_reqs = DEGREE_REQUIREMENTS.get(major, {})
 
     # Fetch REAL courses from UW-Madison API
     print(f"Fetching real UW-Madison courses for {semester}...")
-    cs_courses = uw_api.get_courses(term=semester, subject="COMP SCI")
-    math_courses = uw_api.get_courses(term=semester, subject="MATH")
+    catalog = load_catalog(semester)
 
-    # Combine and filter courses
-    all_courses = cs_courses + math_courses
+    # Combine and filter courses: not completed, prerequisites met
+    all_courses = catalog.courses
+    catalog_version = uw_api.catalog_version(semester)
+    graph = compile_catalog(all_courses, catalog_version)
+    eligible = graph.eligible(completed_courses)
     available_courses = []
 
     for course in all_courses:
-        # Simple filtering - only include if not already completed
-        # You could add more sophisticated prerequisite checking here
-        if course['code'] not in completed_courses:
+        if normalize(course['code']) in eligible:
             available_courses.append({
                 "code": course['code'],
                 "name": course['name'],
@@ -182,79 +565,187 @@ def generate_schedule_with_claude(major, completed_courses, target_credits, seme
                 "prereqs": course.get('prereqs', 'None')[:100]  # Truncate long prereq strings
             })
 
-    # Create prompt for Claude
-    prompt = f"""You are a university course scheduling advisor. Generate 3 different recommended schedules for a {major} student.
-
-Student Information:
-- Major: {major}
-- Completed Courses: {', '.join(completed_courses)}
-- Target Credit Hours: {target_credits}
-- Semester: {semester}
-
-Degree Requirements:
-{json.dumps(degree_reqs, indent=2)}
-
-Available Courses (prerequisites met):
-{json.dumps(available_courses, indent=2)}
-
-Generate 3 diverse schedule options that:
-1. Meet the target credit hours (±2 credits is acceptable)
-2. Progress toward degree requirements
-3. Consider course difficulty balance
-4. Provide different focuses (e.g., theory-heavy, practical-heavy, balanced)
-
-Return your response as a JSON array of schedules. Each schedule should have:
-- "name": A descriptive name for the schedule approach
-- "courses": Array of course codes
-- "total_credits": Total credit hours
-- "rationale": Brief explanation of why this schedule makes sense
-
-Example format:
-[
-  {{
-    "name": "Balanced Core Focus",
-    "courses": ["CS202", "MATH102", "ENG102"],
-    "total_credits": 10,
-    "rationale": "Balances core CS requirements with math and communication skills"
-  }}
-]
-
-Return ONLY the JSON array, no other text."""
+    audit = audit_engine.audit(major, completed_courses)
+    remaining = remaining_summary(audit) if audit else degree_reqs
 
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response_text = message.content[0].text
-
-        # Parse JSON response
-        schedules = json.loads(response_text)
+    # Order eligible courses by similarity to the student's major, interests
+    # and remaining requirements; the index is built once per catalog version
+    required, electives = remaining_requirements(remaining)
+    relevance = build_index(all_courses, catalog_version).relevance(
+        student_query(major, interests, catalog.resolve(required), electives),
+        [course['code'] for course in available_courses]
+    )
 
-        # Enrich with full course details
-        for schedule in schedules:
-            schedule['course_details'] = []
-            for course_code in schedule['courses']:
-                for dept, courses in COURSES.items():
-                    for course in courses:
-                        if course['code'] == course_code:
-                            schedule['course_details'].append(course)
-                            break
+    # Build validated candidates locally; Claude only ranks and explains them
+    candidates = solve_schedules(all_courses, degree_reqs, completed_courses, target_credits,
+                                 catalog_version=catalog_version)
 
-        return schedules
+    # Identical inputs share one model call; graph.version is the snapshot
+    # version or, for live data, a hash of the catalog's contents
+    if catalog_versions.get(semester, graph.version) != graph.version:
+        schedule_cache.invalidate(catalog_versions[semester])
+    catalog_versions[semester] = graph.version
 
-    except Exception as e:
-        print(f"Error generating schedules: {e}")
-        # Fallback to simple schedule
-        return [{
+    return {
+        "catalog": catalog,
+        "candidates": candidates,
+        "fallback": candidates or [{
             "name": "Default Schedule",
             "courses": [c['code'] for c in available_courses[:4]],
             "total_credits": sum(c['credits'] for c in available_courses[:4]),
             "course_details": available_courses[:4],
             "rationale": "Basic schedule based on available courses"
-        }]
+        }],
+        "cache_key": schedule_key(major, completed_courses, target_credits, semester,
+                                  graph.version, SCHEDULE_PROMPT_VERSION, interests),
+        "catalog_version": graph.version,
+        # Checks and repairs the model's schedules against this catalog
+        "validator": ScheduleValidator(catalog, graph, completed_courses, target_credits),
+        # Shared prefix (instructions, requirements, term catalog) is cached by
+        # the API; only the per-student suffix changes between requests
+        "system": schedule_system(DEGREE_REQUIREMENTS, all_courses, semester, graph.version),
+        "prompt": schedule_request(
+            major, completed_courses, target_credits, semester,
+            remaining,
+            available_courses,
+            candidates,
+            interests,
+            relevance
+        )
+    }
+
+
+def request_schedules(prepared, messages, deadline=None):
+    """
+    One non-streaming schedule call, validated and repaired locally.
+
+    Returns:
+        (usable schedules, problems found, raw response text)
+    """
+    started = time.perf_counter()
+    message = client.messages.create(
+        deadline=deadline,
+        model="claude-sonnet-4-5-20250929",
+        max_tokens=2000,
+        system=prepared['system'],
+        messages=messages
+    )
+    prompt_usage.record("schedules", getattr(message, 'usage', None), time.perf_counter() - started)
+
+    response_text = message.content[0].text
+    schedules, problems = validate_response(prepared['validator'], response_text, repair_stats)
+    if problems:
+        print(f"Repaired model schedules ({len(schedules)} usable): {'; '.join(problems)}")
+    return schedules, problems, response_text
+
+
+def reprompt_schedules(prepared, response_text, problems, deadline=None):
+    """Ask the model to redo a response with no usable schedule, up to MAX_REPAIR_PROMPTS times."""
+    schedules = []
+    for _ in range(MAX_REPAIR_PROMPTS):
+        repair_stats.reprompted()
+        print("No usable schedules in the model response; asking again")
+        schedules, problems, response_text = request_schedules(
+            prepared, schedule_repair_messages(prepared['prompt'], response_text, problems), deadline)
+        if schedules:
+            break
+    return schedules
+
+
+def generate_schedule_with_claude(major, completed_courses, target_credits, semester, use_llm=True,
+                                  interests=""):
+    """
+    Use Claude to generate intelligent schedule recommendations using REAL UW-Madison data.
+    """
+    prepared = prepare_schedule_request(major, completed_courses, target_credits, semester, interests)
+    if not use_llm and prepared['candidates']:
+        return prepared['candidates']
+
+    cached = schedule_cache.get(prepared['cache_key'])
+    if cached is not None:
+        return cached
+
+    try:
+        schedules, problems, response_text = request_schedules(
+            prepared, [{"role": "user", "content": prepared['prompt']}])
+        if not schedules:
+            schedules = reprompt_schedules(prepared, response_text, problems)
+        if schedules:
+            schedule_cache.put(prepared['cache_key'], schedules, catalog_version=prepared['catalog_version'])
+            return schedules
+
+    except Exception as e:
+        print(f"Error generating schedules: {e}")
+    return prepared['fallback']
+
+
+def stream_schedules_with_claude(major, completed_courses, target_credits, semester, use_llm=True,
+                                 deadline=None, interests=""):
+    """
+    Streaming form of generate_schedule_with_claude.
+
+    Yields each schedule, validated and enriched with course details, as
+    soon as the model closes its JSON object. Cached results and local
+    candidates are yielded at once. If the streamed response holds no
+    usable schedule, the whole text is parsed tolerantly and, failing
+    that, the model is asked again; the fallback schedules are yielded
+    only if that fails too. deadline (time.time()) bounds each model call,
+    including rate-limit waits and retries.
+    """
+    prepared = prepare_schedule_request(major, completed_courses, target_credits, semester, interests)
+    if not use_llm and prepared['candidates']:
+        yield from prepared['candidates']
+        return
+
+    cached = schedule_cache.get(prepared['cache_key'])
+    if cached is not None:
+        yield from cached
+        return
+
+    schedules = []
+    problems = []
+    chunks = []
+    received = 0
+    parser = ArrayObjectStream()
+    complete = False
+    started = time.perf_counter()
+    try:
+        with client.messages.stream(
+            deadline=deadline,
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=2000,
+            system=prepared['system'],
+            messages=[{"role": "user", "content": prepared['prompt']}]
+        ) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+                for schedule in parser.feed(text):
+                    received += 1
+                    schedule, found = prepared['validator'].repair(schedule)
+                    problems.extend(found)
+                    if schedule is not None:
+                        schedules.append(schedule)
+                        yield schedule
+            prompt_usage.record("schedules", stream.get_final_message().usage, time.perf_counter() - started)
+
+        if schedules:
+            repair_stats.record(received, len(schedules), problems)
+            complete = parser.complete and not parser.errors
+        else:
+            # Not a streamable array (an object, prose with brackets): parse the whole text
+            response_text = "".join(chunks)
+            schedules, problems = validate_response(prepared['validator'], response_text, repair_stats)
+            if not schedules:
+                schedules = reprompt_schedules(prepared, response_text, problems, deadline)
+            yield from schedules
+            complete = True
+    except Exception as e:
+        print(f"Error streaming schedules: {e}")
+
+    if not schedules:
+        yield from prepared['fallback']
+    elif complete:
+        schedule_cache.put(prepared['cache_key'], schedules, catalog_version=prepared['catalog_version'])
 
 
 if __name__ == '__main__':
@@ -1,17 +1,41 @@
 # -*- coding: utf-8 -*-
 import os
-import base64
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, stream_with_context
 from dotenv import load_dotenv
-import anthropic
 import json
+import time
+import uuid
+from course_catalog import AUTOCOMPLETE_LIMIT, CourseCatalog
+from course_index import MAX_SEARCH_LIMIT, SEARCH_LIMIT, build_index, student_query
+from dars_parser import open_dars_cache, parse_dars_report
+from degree_audit import AuditEngine, remaining_summary
+from job_queue import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, JobQueue, QueueFull, event_stream
+from llm_cache import ADMIN_TOKEN_HEADER, ResultCache, admin_token_valid, schedule_key
+from llm_gateway import create_gateway
+from path_planner import plan_graduation
+from prereq_graph import compile_catalog, normalize
+from prompts import (PromptUsage, remaining_requirements, schedule_repair_messages, schedule_request,
+                     schedule_system)
+from schedule_repair import MAX_REPAIR_PROMPTS, RepairStats, ScheduleValidator, validate_response
+from schedule_solver import solve_schedules
+from streaming import ArrayObjectStream, sse_event
+from student_session import configure_sessions, load_student, save_student
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-
-client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+configure_sessions(app)  # Student records live server-side; the cookie holds only a session ID
+
+client = create_gateway()  # Rate-limited, deadline-aware Anthropic client (LLM_BACKEND=mock for load tests)
+schedule_cache = ResultCache()  # Model results shared by students with identical inputs
+prompt_usage = PromptUsage()  # Token and prompt-cache usage per call kind
+repair_stats = RepairStats()  # Model schedule responses accepted, repaired locally or unusable
+dars_cache = open_dars_cache()  # Parsed reports by PDF hash, encrypted at rest
+SCHEDULE_PROMPT_VERSION = "4"  # Bump when the schedule prompt changes so cached results are not reused
+jobs = JobQueue()  # Model calls run here instead of on request threads
+SCHEDULE_JOB_TIMEOUT = 90  # Seconds from submission, including time in the queue
+DARS_JOB_TIMEOUT = 120
 
 # Mock UW-Madison course data (fallback when API doesn't work)
 MOCK_UW_COURSES = [
@@ -27,6 +51,7 @@ MOCK_UW_COURSES = [
     {"code": "MATH 341", "name": "Multivariable Calc", "credits": 4, "prereqs": "MATH 222"},
     {"code": "MATH 431", "name": "Probability", "credits": 3, "prereqs": "MATH 222"},
 ]
+MOCK_CATALOG = CourseCatalog(MOCK_UW_COURSES)
 
 DEGREE_REQUIREMENTS = {
     "Computer Science": {
@@ -38,21 +63,21 @@ DEGREE_REQUIREMENTS = {
         "total_credits": 120
     }
 }
+audit_engine = AuditEngine(DEGREE_REQUIREMENTS, MOCK_CATALOG)
 
 
 @app.route('/')
 def index():
     # Auto-login as demo user (skip authentication)
     if 'user' not in session:
-        session['user'] = {
+        save_student(session, {
             "email": "demo@wisc.edu",
             "name": "Demo Student",
             "major": "Computer Science",
             "year": "Junior",
-            "completed_courses": ["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"],
             "gpa": 3.5
-        }
-    return render_template('dashboard.html', user=session['user'])
+        }, completed=["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"])
+    return render_template('dashboard.html', user=load_student(session))
 
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -67,121 +92,86 @@ def logout():
     return redirect(url_for('index'))
 
 
-@app.route('/api/parse-dars', methods=['POST'])
-def parse_dars():
-    """Parse uploaded DARS PDF using Claude's PDF reading capability."""
+def read_dars_upload():
+    """
+    The uploaded DARS PDF's bytes.
+
+    Returns:
+        (pdf bytes, None), or (None, error response) if the upload is missing or not a PDF
+    """
     if 'dars_pdf' not in request.files:
-        return jsonify({"success": False, "error": "No file uploaded"}), 400
+        return None, (jsonify({"success": False, "error": "No file uploaded"}), 400)
 
     file = request.files['dars_pdf']
     if file.filename == '':
-        return jsonify({"success": False, "error": "No file selected"}), 400
+        return None, (jsonify({"success": False, "error": "No file selected"}), 400)
 
     if not file.filename.endswith('.pdf'):
-        return jsonify({"success": False, "error": "File must be a PDF"}), 400
+        return None, (jsonify({"success": False, "error": "File must be a PDF"}), 400)
 
-    try:
-        # Read PDF content
-        pdf_data = file.read()
-        pdf_base64 = base64.standard_b64encode(pdf_data).decode('utf-8')
+    return file.read(), None
 
-        # Use Claude to parse the DARS report
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {
-                        "type": "document",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "application/pdf",
-                            "data": pdf_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": """Analyze this UW-Madison DARS report and extract the following information in JSON format:
-
-{
-  "major": "primary major name (e.g., 'Computer Science')",
-  "minor_or_certificate": "any minor or certificate (or null)",
-  "completed_courses": ["array", "of", "ALL", "completed", "course", "codes"],
-  "in_progress_courses": ["courses", "currently", "taking"],
-  "planned_courses": ["courses", "planned", "for", "future"],
-  "total_credits_earned": number,
-  "gpa": number (or null if not shown)
-}
 
-CRITICAL INSTRUCTIONS:
-1. For "completed_courses": Include EVERY course that shows as completed/passed with a grade. Look through the ENTIRE document.
-2. This includes all courses with grades like A, AB, B, BC, C, etc. - ANY course with a passing grade.
-3. Do NOT skip any courses - if it has a grade and credits earned, it goes in "completed_courses".
-4. Extract course codes exactly as shown (e.g., "COMP SCI 300", "MATH 340", "COMP SCI 354", "COMP SCI 400").
-5. Be thorough - students often have 20-40+ completed courses. Don't stop after finding just a few.
-
-Return ONLY the JSON object, no other text."""
-                    }
-                ]
-            }]
-        )
+def apply_dars_to_session(dars_data, source):
+    """
+    Update the user session with parsed DARS data.
 
-        # Parse Claude's response
-        response_text = message.content[0].text
-        print(f"\n=== DARS PARSING DEBUG ===")
-        print(f"Claude's raw response: {response_text}")
-        print(f"=== END DARS PARSING DEBUG ===\n")
-
-        dars_data = json.loads(response_text)
-
-        print(f"\n=== PARSED DARS DATA ===")
-        print(f"Major: {dars_data.get('major')}")
-        print(f"Completed courses: {dars_data.get('completed_courses', [])}")
-        print(f"In-progress courses: {dars_data.get('in_progress_courses', [])}")
-        print(f"Total credits: {dars_data.get('total_credits_earned', 0)}")
-        print(f"=== END PARSED DATA ===\n")
-
-        # Update user session with parsed data
-        if 'user' not in session:
-            session['user'] = {}
-
-        # Determine year based on credits
-        total_credits = dars_data.get("total_credits_earned", 0)
-        if total_credits >= 90:
-            year = "Senior"
-        elif total_credits >= 60:
-            year = "Junior"
-        elif total_credits >= 30:
-            year = "Sophomore"
-        else:
-            year = "Freshman"
-
-        # Combine completed and in-progress for filtering
-        completed = dars_data.get("completed_courses", [])
-        in_progress = dars_data.get("in_progress_courses", [])
-        all_completed = completed + in_progress  # Don't suggest courses already taking
-
-        session['user'].update({
-            "name": session.get('user', {}).get('name', 'Student'),
-            "email": session.get('user', {}).get('email', 'student@wisc.edu'),
-            "major": dars_data.get("major", "Computer Science"),
-            "minor_or_certificate": dars_data.get("minor_or_certificate"),
-            "completed_courses": all_completed,  # Use combined list for filtering
-            "completed_only": completed,  # Keep separate for display
-            "in_progress_courses": in_progress,
-            "planned_courses": dars_data.get("planned_courses", []),
-            "total_credits": total_credits,
-            "gpa": dars_data.get("gpa", 3.5),
-            "year": year
-        })
-
-        return jsonify({
-            "success": True,
-            "major": dars_data.get("major"),
-            "completed_courses": dars_data.get("completed_courses", []),
-            "total_credits": dars_data.get("total_credits_earned", 0)
-        })
+    Returns:
+        Summary of the parsed report for the client
+    """
+    print(f"\n=== PARSED DARS DATA ===")
+    print(f"Major: {dars_data.get('major')}")
+    print(f"Completed courses: {dars_data.get('completed_courses', [])}")
+    print(f"In-progress courses: {dars_data.get('in_progress_courses', [])}")
+    print(f"Total credits: {dars_data.get('total_credits_earned', 0)}")
+    print(f"Source: {source}")
+    print(f"=== END PARSED DATA ===\n")
+
+    # Determine year based on credits
+    total_credits = dars_data.get("total_credits_earned", 0)
+    if total_credits >= 90:
+        year = "Senior"
+    elif total_credits >= 60:
+        year = "Junior"
+    elif total_credits >= 30:
+        year = "Sophomore"
+    else:
+        year = "Freshman"
+
+    # Each course is stored once; load_student derives the completed + in-progress list used for filtering
+    user = session.get('user', {})
+    save_student(session, {
+        "name": user.get('name', 'Student'),
+        "email": user.get('email', 'student@wisc.edu'),
+        "major": dars_data.get("major", "Computer Science"),
+        "minor_or_certificate": dars_data.get("minor_or_certificate"),
+        "total_credits": total_credits,
+        "gpa": dars_data.get("gpa", 3.5),
+        "year": year
+    }, completed=dars_data.get("completed_courses", []),
+        in_progress=dars_data.get("in_progress_courses", []),
+        planned=dars_data.get("planned_courses", []))
+
+    return {
+        "success": True,
+        "major": dars_data.get("major"),
+        "completed_courses": dars_data.get("completed_courses", []),
+        "total_credits": dars_data.get("total_credits_earned", 0),
+        "source": source
+    }
+
+
+@app.route('/api/parse-dars', methods=['POST'])
+def parse_dars():
+    """Parse uploaded DARS PDF using Claude's PDF reading capability."""
+    pdf_data, error = read_dars_upload()
+    if error:
+        return error
+
+    try:
+        # A report parsed before is served from the cache
+        dars_data, source = parse_dars_report(pdf_data, client, dars_cache, prompt_usage)
+        return jsonify(apply_dars_to_session(dars_data, source))
 
     except json.JSONDecodeError:
         return jsonify({"success": False, "error": "Failed to parse Claude's response"}), 500
@@ -190,26 +180,150 @@ Return ONLY the JSON object, no other text."""
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/degree-audit', methods=['GET'])
+def degree_audit():
+    """Audit the student's DARS courses against their major's requirements."""
+    if 'user' not in session:
+        return jsonify({"error": "Upload a DARS report first"}), 400
+
+    user = load_student(session)
+    major = user.get('major', 'Computer Science')
+    audit = audit_engine.audit_student(
+        major,
+        user['completed_only'],
+        user['in_progress_courses'],
+        user['planned_courses'],
+        user.get('total_credits')
+    )
+    if audit is None:
+        return jsonify({"error": f"No degree requirements for {major}"}), 404
+
+    return jsonify(audit)
+
+
+@app.route('/api/graduation-plan', methods=['POST'])
+def graduation_plan():
+    """Plan every remaining semester to graduation in one call."""
+    if 'user' not in session:
+        return jsonify({"error": "Upload a DARS report first"}), 400
+
+    data = request.json or {}
+    start_term = data.get('start_term', 'Spring 2026')
+    credit_targets = data.get('credit_targets', 15)
+    if not isinstance(credit_targets, list):
+        credit_targets = [credit_targets]
+    try:
+        credit_targets = [max(1, int(target)) for target in credit_targets]
+        max_terms = max(1, min(int(data.get('max_terms', 10)), 16))
+    except (TypeError, ValueError):
+        return jsonify({"error": "credit_targets and max_terms must be integers"}), 400
+
+    user = load_student(session)
+    major = user.get('major', 'Computer Science')
+    degree_reqs = DEGREE_REQUIREMENTS.get(major)
+    if degree_reqs is None:
+        return jsonify({"error": f"No degree requirements for {major}"}), 404
+
+    plan = plan_graduation(
+        MOCK_UW_COURSES,
+        degree_reqs,
+        user.get('completed_courses', []),
+        start_term,
+        credit_targets,
+        catalog_version=None,
+        offerings=data.get('offerings'),
+        max_terms=max_terms
+    )
+
+    return jsonify(plan)
+
+
+@app.route('/api/llm-cache', methods=['GET'])
+def llm_cache_status():
+    """Hit/miss statistics for the schedule and DARS result caches, prompt-cache token usage and schedule repairs."""
+    return jsonify({
+        **schedule_cache.status(),
+        "dars_cache": dars_cache.status(),
+        "prompt_cache": prompt_usage.status(),
+        "schedule_repairs": repair_stats.status()
+    })
+
+
+@app.route('/api/llm-gateway', methods=['GET'])
+def llm_gateway_status():
+    """Model call counters, calls in flight per model and remaining rate-limit budget."""
+    return jsonify(client.status())
+
+
+@app.route('/api/llm-cache/invalidate', methods=['POST'])
+def invalidate_llm_cache():
+    """Drop cached schedules for one catalog version, or all of them (admin token required)."""
+    if not admin_token_valid(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return jsonify({"error": "Admin token required"}), 403
+
+    data = request.json or {}
+    removed = schedule_cache.invalidate(data.get('catalog_version'))
+    return jsonify({"removed": removed})
+
+
 @app.route('/api/session-debug')
 def session_debug():
     """Debug endpoint to see what's in the session."""
-    return jsonify(session.get('user', {}))
+    return jsonify(load_student(session) or {})
+
+
+@app.route('/api/courses/autocomplete', methods=['GET'])
+def autocomplete_courses():
+    """Complete a partially typed course code, e.g. 'cs 3' or 'comp sci 30'."""
+    prefix = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', AUTOCOMPLETE_LIMIT)), 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    matches = MOCK_CATALOG.autocomplete(prefix, limit)
+
+    return jsonify({
+        "courses": [{"code": c['code'], "name": c['name'], "credits": c['credits']} for c in matches]
+    })
+
+
+@app.route('/api/courses/search', methods=['GET'])
+def search_courses():
+    """
+    Free-text course search over titles and descriptions, e.g. 'linear algebra'.
+    Pass eligible_only=1 to search only courses the student can take next.
+    """
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', SEARCH_LIMIT, type=int), MAX_SEARCH_LIMIT))
+
+    among = None
+    if request.args.get('eligible_only') in ('1', 'true'):
+        eligible = compile_catalog(MOCK_UW_COURSES).eligible((load_student(session) or {}).get('completed_courses', []))
+        among = [c['code'] for c in MOCK_UW_COURSES if normalize(c['code']) in eligible]
+
+    return jsonify({
+        "query": query,
+        "courses": [
+            {"code": c['code'], "name": c['name'], "credits": c['credits'], "score": score}
+            for c, score in build_index(MOCK_UW_COURSES).search(query, limit, among)
+        ]
+    })
 
 
 @app.route('/api/generate-schedules', methods=['POST'])
 def generate_schedules():
     if 'user' not in session:
         # Auto-create user if missing
-        session['user'] = {
-            "major": "Computer Science",
-            "completed_courses": ["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"]
-        }
+        save_student(session, {"major": "Computer Science"},
+                     completed=["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"])
 
     data = request.json
     credit_hours = data.get('credit_hours', 15)
+    use_llm = data.get('use_llm', True)
     semester = data.get('semester', 'Spring 2026')
 
-    user = session['user']
+    user = load_student(session)
     major = user.get('major', 'Computer Science')
     completed_courses = user.get('completed_courses', [])
 
@@ -223,125 +337,414 @@ def generate_schedules():
         major=major,
         completed_courses=completed_courses,
         target_credits=credit_hours,
-        semester=semester
+        semester=semester,
+        use_llm=use_llm,
+        interests=data.get('interests', '')
     )
 
     return jsonify({"schedules": schedules})
 
 
-def generate_schedule_with_claude(major, completed_courses, target_credits, semester):
+@app.route('/api/generate-schedules/stream', methods=['POST'])
+def generate_schedules_stream():
     """
-    Use Claude to generate intelligent schedule recommendations.
-    Uses mock data for reliable demo.
+    Server-Sent Events form of /api/generate-schedules.
+
+    Sends a "schedule" event for each schedule as soon as the model
+    finishes it, then a "done" event with the number sent.
+    """
+    if 'user' not in session:
+        # Auto-create user if missing
+        save_student(session, {"major": "Computer Science"},
+                     completed=["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"])
+
+    data = request.json
+    credit_hours = data.get('credit_hours', 15)
+    use_llm = data.get('use_llm', True)
+    semester = data.get('semester', 'Spring 2026')
+
+    user = load_student(session)
+    schedules = stream_schedules_with_claude(
+        major=user.get('major', 'Computer Science'),
+        completed_courses=user.get('completed_courses', []),
+        target_credits=credit_hours,
+        semester=semester,
+        use_llm=use_llm,
+        interests=data.get('interests', '')
+    )
+
+    def events():
+        count = 0
+        for schedule in schedules:
+            count += 1
+            yield sse_event("schedule", schedule)
+        yield sse_event("done", {"count": count})
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def job_owner():
+    """Per-browser ID that scopes background jobs to the session that submitted them."""
+    if 'job_owner' not in session:
+        session['job_owner'] = uuid.uuid4().hex
+    return session['job_owner']
+
+
+def run_schedule_job(job, **kwargs):
+    """Background schedule generation; each schedule is published as soon as it is ready."""
+    schedules = []
+    for schedule in stream_schedules_with_claude(deadline=job.deadline, **kwargs):
+        schedules.append(schedule)
+        if not job.publish("schedule", schedule):
+            break
+    return {"schedules": schedules}
+
+
+def run_dars_job(job, pdf_data):
+    """Background DARS parsing; the session is updated when the client fetches the result."""
+    dars_data, source = parse_dars_report(pdf_data, client, dars_cache, prompt_usage, deadline=job.deadline)
+    return {"dars": dars_data, "source": source}
+
+
+@app.route('/api/jobs/schedules', methods=['POST'])
+def submit_schedule_job():
+    """Queue schedule generation and return its job ID at once."""
+    if 'user' not in session:
+        # Auto-create user if missing
+        save_student(session, {"major": "Computer Science"},
+                     completed=["COMP SCI 200", "COMP SCI 300", "MATH 221", "MATH 222"])
+
+    data = request.json or {}
+    user = load_student(session)
+    try:
+        job = jobs.submit(
+            "schedules", run_schedule_job,
+            priority=PRIORITY_BACKGROUND if data.get('background') else PRIORITY_INTERACTIVE,
+            timeout=SCHEDULE_JOB_TIMEOUT,
+            owner=job_owner(),
+            major=user.get('major', 'Computer Science'),
+            completed_courses=user.get('completed_courses', []),
+            target_credits=data.get('credit_hours', 15),
+            semester=data.get('semester', 'Spring 2026'),
+            use_llm=data.get('use_llm', True),
+            interests=data.get('interests', '')
+        )
+    except QueueFull:
+        return jsonify({"error": "Too many schedule requests in progress; try again shortly"}), 503
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+
+@app.route('/api/jobs/parse-dars', methods=['POST'])
+def submit_dars_job():
+    """Queue DARS parsing and return its job ID at once."""
+    pdf_data, error = read_dars_upload()
+    if error:
+        return error
+
+    try:
+        job = jobs.submit("parse-dars", run_dars_job, pdf_data, timeout=DARS_JOB_TIMEOUT, owner=job_owner())
+    except QueueFull:
+        return jsonify({"success": False, "error": "Too many uploads in progress; try again shortly"}), 503
+    return jsonify({"success": True, "job_id": job.id, "status": job.status}), 202
+
+
+def finish_dars_job(job, data):
+    """
+    Replace a finished DARS job's raw report with the parse summary. The
+    first time the result is fetched, by polling or over SSE, the report
+    is applied to the session.
+
+    Args:
+        job: The parse-dars job
+        data: job.to_json() output
+
+    Returns:
+        data, with "result" holding the summary instead of the report
+    """
+    if "result" not in data:
+        return data
+    result = data.pop("result")
+    if session.get('dars_job') != job.id:
+        session['dars_job'] = job.id
+        data["result"] = apply_dars_to_session(result["dars"], result["source"])
+    else:
+        data["result"] = {"success": True, "source": result["source"]}
+    return data
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a job. Pass ?cursor=N (the previous next_cursor) to get only new
+    events. A finished DARS job's data is applied to the session here.
+    """
+    job = jobs.get(job_id, session.get('job_owner'))
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    data = job.to_json(request.args.get('cursor', 0, type=int))
+    if job.kind == "parse-dars":
+        data = finish_dars_job(job, data)
+    return jsonify(data)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events for a job: its partial results, then "done" or "error"."""
+    job = jobs.get(job_id, session.get('job_owner'))
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    finish = None
+    if job.kind == "parse-dars":
+        def finish(data):
+            data = finish_dars_job(job, data)
+            # The response (and its session save) went out before the job
+            # finished, so write the updated session to the store here
+            app.session_interface.save_session(app, session, Response())
+            return data
+
+    stream = event_stream(job, request.args.get('cursor', 0, type=int), finish)
+    return Response(stream_with_context(stream), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route('/api/jobs', methods=['GET'])
+def job_queue_status():
+    """Queue depth, busy workers and job outcome counts."""
+    return jsonify(jobs.status())
+
+
+def prepare_schedule_request(major, completed_courses, target_credits, semester, interests=""):
+    """
+    Everything a schedule request needs before the model is called.
+
+    Returns:
+        Dict with pre-validated candidates, fallback schedules, the
+        result-cache key and catalog version, a validator for the model's
+        schedules, and the cached system prefix and per-student prompt
     """
     degree_reqs = DEGREE_REQUIREMENTS.get(major, {})
 
-    # Normalize completed course codes for matching
-    completed_normalized = [c.replace(' ', '').upper() for c in completed_courses]
+    # Normalize completed course codes for matching ("CS 300" and "COMP SCI 300" agree)
+    completed_normalized = MOCK_CATALOG.keys(completed_courses)
 
     print(f"\n=== FILTERING DEBUG ===")
     print(f"Major: {major}")
     print(f"Completed courses (raw): {completed_courses}")
-    print(f"Completed courses (normalized): {completed_normalized}")
+    print(f"Completed courses (normalized): {sorted(completed_normalized)}")
 
-    # Filter available courses - exclude completed ones
+    # Filter available courses - exclude completed ones and unmet prerequisites
+    graph = compile_catalog(MOCK_UW_COURSES)
+    eligible = graph.eligible(completed_courses)
     available_courses = []
     for course in MOCK_UW_COURSES:
-        course_normalized = course['code'].replace(' ', '').upper()
+        course_normalized = normalize(course['code'])
 
-        # Check if this course has been completed
-        is_completed = course_normalized in completed_normalized
-
-        if not is_completed:
+        if course_normalized in eligible:
             available_courses.append(course)
-        else:
+        elif course_normalized in completed_normalized:
             print(f"  FILTERING OUT: {course['code']} (matched with completed courses)")
+        else:
+            print(f"  FILTERING OUT: {course['code']} (prerequisites not met: {course['prereqs']})")
 
     print(f"Available courses after filtering: {[c['code'] for c in available_courses]}")
     print(f"=== END DEBUG ===\n")
 
-    # Limit to reasonable number for Claude
-    available_courses = available_courses[:20]
-
-    # Create prompt for Claude
-    prompt = f"""You are a university course scheduling advisor for UW-Madison. Generate 3 different recommended schedules for a {major} student.
-
-Student Information:
-- Major: {major}
-- Completed Courses: {', '.join(completed_courses)}
-- Target Credit Hours: {target_credits}
-- Semester: {semester}
-
-IMPORTANT: DO NOT include any courses from the "Completed Courses" list above in your schedule recommendations. Only use courses from the "Available Courses" list below.
-
-Degree Requirements:
-{json.dumps(degree_reqs, indent=2)}
-
-Available Courses (NOT yet completed):
-{json.dumps(available_courses, indent=2)}
-
-Generate 3 diverse schedule options that:
-1. Meet the target credit hours (±2 credits is acceptable)
-2. Progress toward degree requirements
-3. Consider course difficulty balance
-4. Provide different focuses (e.g., theory-heavy, practical-heavy, balanced)
-5. **CRITICAL**: Only use courses from the "Available Courses" list - NEVER suggest courses the student has already completed!
-
-Return your response as a JSON array of schedules. Each schedule should have:
-- "name": A descriptive name for the schedule approach
-- "courses": Array of course codes (e.g., ["COMP SCI 400", "MATH 340"])
-- "total_credits": Total credit hours
-- "rationale": Brief explanation of why this schedule makes sense
-
-Example format:
-[
-  {{
-    "name": "Balanced Core Focus",
-    "courses": ["COMP SCI 400", "COMP SCI 354", "MATH 340"],
-    "total_credits": 9,
-    "rationale": "Balances core CS requirements with essential math foundations"
-  }}
-]
+    audit = audit_engine.audit(major, completed_courses)
+    remaining = remaining_summary(audit) if audit else degree_reqs
 
-Return ONLY the JSON array, no other text."""
+    # Order eligible courses by similarity to the student's major, interests and remaining requirements
+    required, electives = remaining_requirements(remaining)
+    relevance = build_index(MOCK_UW_COURSES).relevance(
+        student_query(major, interests, MOCK_CATALOG.resolve(required), electives),
+        [course['code'] for course in available_courses]
+    )
 
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
+    # Build validated candidates locally; Claude only ranks and explains them
+    candidates = solve_schedules(MOCK_UW_COURSES, degree_reqs, completed_courses, target_credits)
+
+    return {
+        "candidates": candidates,
+        "fallback": candidates or [{
+            "name": "Default Schedule",
+            "courses": [c['code'] for c in available_courses[:4]],
+            "total_credits": sum(c['credits'] for c in available_courses[:4]),
+            "course_details": available_courses[:4],
+            "rationale": "Basic schedule based on available courses and prerequisites"
+        }],
+        # Identical inputs share one model call
+        "cache_key": schedule_key(major, completed_courses, target_credits, semester,
+                                  graph.version, SCHEDULE_PROMPT_VERSION, interests),
+        "catalog_version": graph.version,
+        # Checks and repairs the model's schedules against this catalog
+        "validator": ScheduleValidator(MOCK_CATALOG, graph, completed_courses, target_credits),
+        # Shared prefix (instructions, requirements, catalog) is cached by the
+        # API; only the per-student suffix changes between requests
+        "system": schedule_system(DEGREE_REQUIREMENTS, MOCK_UW_COURSES, semester, graph.version),
+        "prompt": schedule_request(
+            major, completed_courses, target_credits, semester,
+            remaining,
+            available_courses,
+            candidates,
+            interests,
+            relevance
         )
+    }
 
-        response_text = message.content[0].text
-        print(f"\n=== CLAUDE RESPONSE DEBUG ===")
-        print(f"Response text: {response_text}")
-        print(f"Response length: {len(response_text)}")
-        print(f"=== END CLAUDE RESPONSE ===\n")
 
-        # Parse JSON response
-        schedules = json.loads(response_text)
+def log_prompt_usage(usage, seconds):
+    """Record one schedule call's token usage and latency and print them."""
+    usage = prompt_usage.record("schedules", usage, seconds)
+    if usage:
+        print(f"Prompt cache: {usage['cache_read_input_tokens']} tokens read, "
+              f"{usage['cache_creation_input_tokens']} written, {usage['input_tokens']} uncached; "
+              f"{usage['output_tokens']} output tokens in {seconds:.2f}s")
 
-        # Enrich with full course details
-        for schedule in schedules:
-            schedule['course_details'] = []
-            for course_code in schedule['courses']:
-                for course in MOCK_UW_COURSES:
-                    if course['code'] == course_code:
-                        schedule['course_details'].append(course)
-                        break
 
-        return schedules
+def request_schedules(prepared, messages, deadline=None):
+    """
+    One non-streaming schedule call, validated and repaired locally.
+
+    Returns:
+        (usable schedules, problems found, raw response text)
+    """
+    started = time.perf_counter()
+    message = client.messages.create(
+        deadline=deadline,
+        model="claude-sonnet-4-5-20250929",
+        max_tokens=2000,
+        system=prepared['system'],
+        messages=messages
+    )
+    log_prompt_usage(getattr(message, 'usage', None), time.perf_counter() - started)
+
+    response_text = message.content[0].text
+    print(f"\n=== CLAUDE RESPONSE DEBUG ===")
+    print(f"Response text: {response_text}")
+    print(f"Response length: {len(response_text)}")
+    print(f"=== END CLAUDE RESPONSE ===\n")
+
+    schedules, problems = validate_response(prepared['validator'], response_text, repair_stats)
+    if problems:
+        print(f"Repaired model schedules ({len(schedules)} usable): {'; '.join(problems)}")
+    return schedules, problems, response_text
+
+
+def reprompt_schedules(prepared, response_text, problems, deadline=None):
+    """Ask the model to redo a response with no usable schedule, up to MAX_REPAIR_PROMPTS times."""
+    schedules = []
+    for _ in range(MAX_REPAIR_PROMPTS):
+        repair_stats.reprompted()
+        print("No usable schedules in the model response; asking again")
+        schedules, problems, response_text = request_schedules(
+            prepared, schedule_repair_messages(prepared['prompt'], response_text, problems), deadline)
+        if schedules:
+            break
+    return schedules
+
+
+def generate_schedule_with_claude(major, completed_courses, target_credits, semester, use_llm=True,
+                                  interests=""):
+    """
+    Use Claude to generate intelligent schedule recommendations.
+    Uses mock data for reliable demo.
+    """
+    prepared = prepare_schedule_request(major, completed_courses, target_credits, semester, interests)
+    if not use_llm and prepared['candidates']:
+        return prepared['candidates']
+
+    cached = schedule_cache.get(prepared['cache_key'])
+    if cached is not None:
+        print(f"Serving cached schedules ({prepared['cache_key'][:12]})")
+        return cached
+
+    try:
+        schedules, problems, response_text = request_schedules(
+            prepared, [{"role": "user", "content": prepared['prompt']}])
+        if not schedules:
+            schedules = reprompt_schedules(prepared, response_text, problems)
+        if schedules:
+            schedule_cache.put(prepared['cache_key'], schedules, catalog_version=prepared['catalog_version'])
+            return schedules
 
     except Exception as e:
         print(f"Error generating schedules: {e}")
-        # Fallback schedule
-        return [{
-            "name": "Default Schedule",
-            "courses": [c['code'] for c in available_courses[:4]],
-            "total_credits": sum(c['credits'] for c in available_courses[:4]),
-            "course_details": available_courses[:4],
-            "rationale": "Basic schedule based on available courses and prerequisites"
-        }]
+    return prepared['fallback']
+
+
+def stream_schedules_with_claude(major, completed_courses, target_credits, semester, use_llm=True,
+                                 deadline=None, interests=""):
+    """
+    Streaming form of generate_schedule_with_claude.
+
+    Yields each schedule, validated and enriched with course details, as
+    soon as the model closes its JSON object. Cached results and local
+    candidates are yielded at once. If the streamed response holds no
+    usable schedule, the whole text is parsed tolerantly and, failing
+    that, the model is asked again; the fallback schedules are yielded
+    only if that fails too. deadline (time.time()) bounds each model call,
+    including rate-limit waits and retries.
+    """
+    prepared = prepare_schedule_request(major, completed_courses, target_credits, semester, interests)
+    if not use_llm and prepared['candidates']:
+        yield from prepared['candidates']
+        return
+
+    cached = schedule_cache.get(prepared['cache_key'])
+    if cached is not None:
+        print(f"Serving cached schedules ({prepared['cache_key'][:12]})")
+        yield from cached
+        return
+
+    schedules = []
+    problems = []
+    chunks = []
+    received = 0
+    parser = ArrayObjectStream()
+    complete = False
+    started = time.perf_counter()
+    try:
+        with client.messages.stream(
+            deadline=deadline,
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=2000,
+            system=prepared['system'],
+            messages=[{"role": "user", "content": prepared['prompt']}]
+        ) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+                for schedule in parser.feed(text):
+                    received += 1
+                    schedule, found = prepared['validator'].repair(schedule)
+                    problems.extend(found)
+                    if schedule is None:
+                        print(f"Dropped streamed schedule: {'; '.join(found)}")
+                        continue
+                    schedules.append(schedule)
+                    print(f"Streamed schedule {len(schedules)}: {schedule.get('name')}")
+                    yield schedule
+            log_prompt_usage(stream.get_final_message().usage, time.perf_counter() - started)
+
+        if schedules:
+            repair_stats.record(received, len(schedules), problems)
+            complete = parser.complete and not parser.errors
+        else:
+            # Not a streamable array (an object, prose with brackets): parse the whole text
+            response_text = "".join(chunks)
+            schedules, problems = validate_response(prepared['validator'], response_text, repair_stats)
+            if not schedules:
+                schedules = reprompt_schedules(prepared, response_text, problems, deadline)
+            yield from schedules
+            complete = True
+    except Exception as e:
+        print(f"Error streaming schedules: {e}")
+
+    if not schedules:
+        yield from prepared['fallback']
+    elif complete:
+        schedule_cache.put(prepared['cache_key'], schedules, catalog_version=prepared['catalog_version'])
 
 
 if __name__ == '__main__':
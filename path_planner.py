@@ -0,0 +1,432 @@
+"""
+Multi-semester graduation path planner.
+
+Plans every remaining semester at once with A* over (term, completed-set)
+states. Completed sets are bitmasks over the courses that matter for the
+degree (requirements plus their prerequisite chains), each step takes one
+term's worth of eligible courses, and the heuristic is a lower bound on
+the terms still needed, so the first complete plan found is shortest.
+"""
+
+import heapq
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from course_catalog import CourseCatalog, canonical_code
+from prereq_graph import compile_catalog, to_cnf
+from schedule_solver import course_credits
+
+
+MAX_TERMS = 10            # Give up on plans longer than this
+MAX_BRANCH = 8            # Eligible courses considered per term, highest priority first
+MAX_EXPANSIONS = 300       # States expanded before settling for the best plan found so far
+PLAN_CACHE_ENTRIES = 256
+SEASONS = ["Spring", "Fall"]
+CALENDAR = ["Spring", "Summer", "Fall"]
+
+
+def term_sequence(start_term: str, count: int, seasons: List[str] = SEASONS) -> List[str]:
+    """
+    Consecutive terms starting at start_term, e.g. 'Spring 2026' -> ['Spring 2026', 'Fall 2026', ...].
+
+    Terms whose season isn't in seasons (e.g. Summer) restart at the next listed season.
+    """
+    match = re.match(r"^\s*(\w+)\s+(\d{4})\s*$", start_term)
+    season, year = (match.group(1).title(), int(match.group(2))) if match else (seasons[0], 2026)
+    while season not in seasons and season in CALENDAR:
+        position = CALENDAR.index(season) + 1
+        year += position // len(CALENDAR)
+        season = CALENDAR[position % len(CALENDAR)]
+    index = seasons.index(season) if season in seasons else 0
+
+    terms = []
+    for _ in range(count):
+        terms.append(f"{seasons[index]} {year}")
+        index += 1
+        if index == len(seasons):
+            index = 0
+            year += 1
+    return terms
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+class PathPlanner:
+    """
+    Graduation planner for one catalog and one major's requirements.
+
+    Args:
+        courses: Catalog course dicts or records (code, credits, prereqs)
+        degree_reqs: One major's entry from DEGREE_REQUIREMENTS
+        catalog_version: Snapshot version, so the compiled prerequisite graph is reused
+        offerings: Optional season -> course codes offered that season
+            ("Fall", "Spring"); courses missing from a listed season are
+            not scheduled in it
+    """
+
+    def __init__(self, courses: List, degree_reqs: Dict, catalog_version: Optional[str] = None,
+                 offerings: Optional[Dict[str, List[str]]] = None):
+        self.catalog = CourseCatalog(courses)
+        self.graph = compile_catalog(courses, catalog_version)
+        self.offerings = {
+            season.title(): {canonical_code(code) for code in codes}
+            for season, codes in (offerings or {}).items()
+        }
+
+        required = [canonical_code(code) for code in degree_reqs.get('required_courses', [])]
+        categories = [
+            (name, [canonical_code(code) for code in category.get('options', [])], category.get('required', 0))
+            for name, category in degree_reqs.get('elective_categories', {}).items()
+        ]
+
+        # Relevant courses: requirements plus every prerequisite alternative reachable from them
+        self.ids = []
+        self.bits = {}
+        pending = required + [code for _, options, _ in categories for code in options]
+        while pending:
+            code = pending.pop()
+            if code in self.bits or code not in self.graph.trees:
+                continue
+            self.bits[code] = 1 << len(self.ids)
+            self.ids.append(code)
+            for clause in to_cnf(self.graph.trees[code]):
+                pending.extend(clause)
+
+        self.codes = {}
+        self.credits = {}
+        for code in self.ids:
+            course = self.catalog.get(code)
+            if isinstance(course, dict):
+                self.codes[code], self.credits[code] = course['code'], course_credits(course)
+            else:
+                self.codes[code], self.credits[code] = course.code, course.min_credits
+        self.required_mask = self._mask(required)
+        self.category_names = [name for name, _, _ in categories]
+        self.categories = [(self._mask(options), quota) for _, options, quota in categories]
+        self.missing = [code for code in degree_reqs.get('required_courses', [])
+                        if canonical_code(code) not in self.bits]
+
+    def _mask(self, codes: List[str]) -> int:
+        mask = 0
+        for code in codes:
+            mask |= self.bits.get(code, 0)
+        return mask
+
+    def plan(self, completed: List[str], start_term: str, credit_targets: List[int],
+             max_terms: int = MAX_TERMS) -> Dict:
+        """
+        Shortest semester-by-semester plan that completes the requirements.
+
+        Elective options and prerequisite alternatives are chosen up front
+        (fewest extra credits first); the search then orders that fixed set
+        of courses into terms.
+
+        Args:
+            completed: Completed and in-progress course codes
+            start_term: First term to plan, e.g. "Fall 2026"
+            credit_targets: Maximum credits per term; the last value repeats
+            max_terms: Longest plan considered
+
+        Returns:
+            Dict with "terms" (term, courses, credits), "semesters_needed",
+            "total_credits", "complete" and, when requirements can't all be
+            met, "unmet_requirements"
+        """
+        done_keys = {canonical_code(code) for code in completed}
+        start = self._mask(done_keys)
+        caps = [max(1, target) for target in (credit_targets or [15])]
+        terms = term_sequence(start_term, max_terms)
+
+        # Prerequisite clauses per course as relevant-course masks; clauses
+        # already met by completed courses outside the relevant set are dropped
+        clauses = {}
+        for code in self.ids:
+            masks = []
+            for clause in to_cnf(self.graph.trees[code]):
+                if clause & done_keys:
+                    continue
+                mask = self._mask(list(clause))
+                if not mask:
+                    masks = None
+                    break
+                masks.append(mask)
+            if masks is not None:
+                clauses[self.bits[code]] = masks
+
+        # Courses whose prerequisite chains can be completed at all
+        reachable = start
+        grown = True
+        while grown:
+            grown = False
+            for bit, masks in clauses.items():
+                if not reachable & bit and all(clause & reachable for clause in masks):
+                    reachable |= bit
+                    grown = True
+
+        targets = self._select_targets(start, reachable, clauses)
+        remaining = targets & ~start
+
+        def chain_lengths(mask):
+            """Longest chain of still-untaken target courses ending at each target course."""
+            depth = {}
+
+            def chain(bit):
+                if bit not in depth:
+                    depth[bit] = 1
+                    longest = 0
+                    for clause in clauses[bit]:
+                        if not clause & mask:
+                            longest = max(longest, min(
+                                (chain(alt) for alt in self._bits_of(clause & targets)), default=0))
+                    depth[bit] = 1 + longest
+                return depth[bit]
+
+            return {bit: chain(bit) for bit in self._bits_of(targets & ~mask)}
+
+        # Height: longest chain of target courses that depend on a course,
+        # the list-scheduling priority (start the longest tails first)
+        heights = {}
+
+        def height(bit):
+            if bit not in heights:
+                heights[bit] = 1
+                heights[bit] = 1 + max((height(dependent) for dependent in self._bits_of(remaining)
+                                        if any(clause & bit for clause in clauses[dependent])), default=0)
+            return heights[bit]
+
+        for bit in self._bits_of(remaining):
+            height(bit)
+
+        max_cap = max(caps)
+
+        def heuristic(mask):
+            """
+            Lower bound on remaining terms. Courses at prerequisite depth d
+            can't start before the d-th term from now, so for every d the
+            credits at depth >= d must fit in the terms from d onwards.
+            """
+            credits_at = {}
+            for bit, depth in chain_lengths(mask).items():
+                credits_at[depth] = credits_at.get(depth, 0) + self.credits[self.ids[bit.bit_length() - 1]]
+            bound = 0
+            credits = 0
+            for depth in sorted(credits_at, reverse=True):
+                credits += credits_at[depth]
+                bound = max(bound, depth - 1 + math.ceil(credits / max_cap))
+            return bound
+
+        def successors(mask, term_index):
+            """Maximal sets of eligible target courses within the term's credit cap."""
+            offered = self.offerings.get(terms[term_index].split()[0])
+            cap = caps[min(term_index, len(caps) - 1)]
+
+            candidates = []
+            blocked = False
+            for bit in self._bits_of(remaining & ~mask):
+                code = self.ids[bit.bit_length() - 1]
+                if any(not clause & mask for clause in clauses[bit]):
+                    continue
+                if offered is not None and code not in offered:
+                    blocked = True
+                    continue
+                # Longest tail first, then the larger course
+                candidates.append((-heights[bit], -self.credits[code], code))
+            candidates.sort()
+            candidates = [code for _, _, code in candidates[:MAX_BRANCH]]
+
+            if not candidates:
+                if blocked:
+                    yield ()
+                return
+
+            chosen = []
+
+            def pick(index, credits):
+                if index == len(candidates):
+                    if all(code in chosen or credits + self.credits[code] > cap for code in candidates):
+                        yield tuple(chosen)
+                    return
+                code = candidates[index]
+                if credits + self.credits[code] <= cap:
+                    chosen.append(code)
+                    yield from pick(index + 1, credits + self.credits[code])
+                    chosen.pop()
+                yield from pick(index + 1, credits)
+
+            yield from pick(0, 0)
+
+        # Greedy critical-path schedule: an upper bound, and the answer when it meets the lower bound
+        greedy_mask, greedy_path = start, None
+        for term_index in range(max_terms):
+            if not remaining & ~greedy_mask:
+                break
+            taken = next(successors(greedy_mask, term_index), None)
+            if taken is None:
+                break
+            greedy_mask |= self._mask(list(taken))
+            greedy_path = (greedy_path, taken)
+        greedy_terms = term_index if not remaining & ~greedy_mask else max_terms + 1
+
+        # A* over (season, completed mask) states; g is terms used. States are
+        # memoized with the fewest terms that reached them.
+        seasons = len(SEASONS)
+        found = (greedy_mask, greedy_path)
+        bound = greedy_terms
+        counter = 0
+        heap = [(heuristic(start), 0, counter, start, None)]
+        best = {(0, start): 0}
+        expansions = 0
+        while heap and expansions < MAX_EXPANSIONS:
+            f, g, _, mask, path = heapq.heappop(heap)
+            if f >= bound:
+                break
+            if not remaining & ~mask:
+                found = (mask, path)
+                break
+            if best.get((g % seasons, mask), g) < g:
+                continue
+            expansions += 1
+            for taken in successors(mask, g):
+                child = mask | self._mask(list(taken))
+                state = ((g + 1) % seasons, child)
+                if best.get(state, max_terms + 1) <= g + 1:
+                    continue
+                best[state] = g + 1
+                counter += 1
+                heapq.heappush(heap, (g + 1 + heuristic(child), g + 1, counter, child, (path, taken)))
+
+        result = self._result(found[1], terms)
+        unmet = self._unmet(found[0])
+        if unmet:
+            result["complete"] = False
+            result["unmet_requirements"] = unmet
+        return result
+
+    def _select_targets(self, start: int, reachable: int, clauses: Dict) -> int:
+        """
+        Bitset of courses the plan will take: reachable required courses,
+        the cheapest options for each elective quota, and for every
+        unsatisfied prerequisite clause its cheapest alternative.
+        """
+        targets = 0
+        cost = {}
+
+        def course_cost(bit):
+            """Credits to take a course including its cheapest missing prerequisites."""
+            if start & bit or targets & bit:
+                return 0
+            if bit not in cost:
+                cost[bit] = math.inf
+                total = self.credits[self.ids[bit.bit_length() - 1]]
+                for clause in clauses[bit]:
+                    if not clause & (start | targets):
+                        total += min(course_cost(alt) for alt in self._bits_of(clause & reachable))
+                cost[bit] = total
+            return cost[bit]
+
+        def add(bit):
+            nonlocal targets
+            if (start | targets) & bit:
+                return
+            targets |= bit
+            for clause in clauses[bit]:
+                if not clause & (start | targets):
+                    add(min(self._bits_of(clause & reachable), key=course_cost))
+
+        for bit in self._bits_of(self.required_mask & reachable):
+            add(bit)
+        for options, quota in self.categories:
+            short = quota - _popcount((start | targets) & options)
+            if short > 0:
+                cost.clear()
+                for bit in sorted(self._bits_of(options & reachable & ~targets & ~start), key=course_cost)[:short]:
+                    add(bit)
+        return targets
+
+    def _bits_of(self, mask: int):
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            yield bit
+
+    def _unmet(self, mask: int) -> List[str]:
+        unmet = [self.codes[code] for code in self.ids if self.required_mask & ~mask & self.bits[code]]
+        unmet += self.missing
+        for name, (options, quota) in zip(self.category_names, self.categories):
+            short = quota - _popcount(mask & options)
+            if short > 0:
+                unmet.append(f"{short} more from {name}")
+        return unmet
+
+    def _result(self, path, terms: List[str]) -> Dict:
+        steps = []
+        while path is not None:
+            path, taken = path
+            steps.append(taken)
+        steps.reverse()
+
+        plan = []
+        for term, taken in zip(terms, steps):
+            plan.append({
+                "term": term,
+                "courses": [self.codes[code] for code in taken],
+                "credits": sum(self.credits[code] for code in taken)
+            })
+        return {
+            "terms": plan,
+            "semesters_needed": len(plan),
+            "total_credits": sum(term["credits"] for term in plan),
+            "complete": True
+        }
+
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def plan_graduation(courses: List, degree_reqs: Dict, completed: List[str], start_term: str,
+                    credit_targets: List[int], catalog_version: Optional[str] = None,
+                    offerings: Optional[Dict[str, List[str]]] = None, max_terms: int = MAX_TERMS) -> Dict:
+    """
+    Plan the semesters to graduation, reusing results for identical requests.
+
+    Args:
+        courses: Catalog course dicts with code, credits and prereqs
+        degree_reqs: One major's entry from DEGREE_REQUIREMENTS
+        completed: Completed and in-progress course codes
+        start_term: First term to plan
+        credit_targets: Maximum credits per term; the last value repeats
+        catalog_version: Snapshot version of the catalog, if any
+        offerings: Optional season -> offered course codes
+        max_terms: Longest plan considered
+
+    Returns:
+        Plan dict from PathPlanner.plan
+    """
+    key = (
+        catalog_version or compile_catalog(courses).version,
+        json.dumps(degree_reqs, sort_keys=True),
+        frozenset(canonical_code(code) for code in completed),
+        start_term,
+        tuple(credit_targets),
+        json.dumps(offerings, sort_keys=True) if offerings else None,
+        max_terms
+    )
+    with _plans_lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key]
+
+    plan = PathPlanner(courses, degree_reqs, catalog_version, offerings).plan(
+        completed, start_term, credit_targets, max_terms)
+    with _plans_lock:
+        _plans[key] = plan
+        while len(_plans) > PLAN_CACHE_ENTRIES:
+            _plans.popitem(last=False)
+    return plan
@@ -0,0 +1,364 @@
+"""
+Compiled prerequisite graph.
+
+Prerequisite text such as "(COMP SCI 300 or 400) and (MATH 222 or 234)" is
+parsed once into an AND/OR tree over normalized course IDs. A catalog's
+trees are then compiled into a DAG plus per-course clause bitmasks, so
+eligibility for every course against a student's completed set is one pass
+of integer ANDs. Compiled catalogs are cached per catalog version.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import product
+from typing import Iterable, List, Optional, Set
+
+from course_catalog import canonical_code
+
+
+AND = "and"
+OR = "or"
+MAX_CLAUSES = 64          # Cap on CNF clauses per course; larger trees are rare and get truncated
+GRAPH_CACHE_ENTRIES = 8   # Compiled catalogs kept in memory
+
+_TOKEN_PATTERN = re.compile(r"\(|\)|[,;.]|/|\d+|[A-Za-z&]+|\S")
+
+
+def normalize(course_code: str) -> str:
+    """Normalize a course code for matching, e.g. 'COMP SCI 300' or 'CS300' -> 'COMPSCI300'."""
+    return canonical_code(course_code)
+
+
+def _field(course, name: str):
+    """Read a field from a course dict or a uw_records.Course."""
+    return course.get(name) if isinstance(course, dict) else getattr(course, name, None)
+
+
+def _tokenize(text: str) -> List:
+    """
+    Split prerequisite text into parser tokens.
+
+    Course references become ("course", ids) tokens: a bare number reuses
+    the previous subject ("COMP SCI 300 or 400"), and cross-listed subjects
+    ("COMP SCI/E C E 354") yield every alternative. Other words become
+    ("other",) tokens, and anything after "not open to ..." up to the end
+    of the sentence is ignored.
+    """
+    tokens = []
+    pending = []
+    alternatives = []
+    last_subjects = []
+    skipping = False
+
+    def flush():
+        nonlocal skipping
+        words = [word for group in alternatives for word in group] + pending
+        if "not" in (word.lower() for word in words):
+            skipping = True
+        if words and not skipping:
+            tokens.append(("other",))
+        pending.clear()
+        alternatives.clear()
+
+    for raw in _TOKEN_PATTERN.findall(text):
+        lowered = raw.lower()
+        if lowered in (AND, OR):
+            flush()
+            if not skipping:
+                tokens.append((lowered,))
+        elif raw.isdigit():
+            split = len(pending)
+            while split and (pending[split - 1].isupper() or pending[split - 1] == "&"):
+                split -= 1
+            subjects = [" ".join(group) for group in alternatives if all(word.isupper() for word in group)]
+            if split < len(pending):
+                subjects.append(" ".join(pending[split:]))
+            elif not subjects:
+                subjects = last_subjects
+
+            if len(raw) in (2, 3) and subjects:
+                del pending[split:]
+                alternatives.clear()
+                flush()
+                last_subjects = subjects
+                if not skipping:
+                    tokens.append(("course", tuple(normalize(f"{subject}{raw}") for subject in subjects)))
+            else:
+                pending.append(raw)
+        elif raw[0].isalpha() or raw == "&":
+            pending.append(raw)
+        elif raw == "/":
+            if pending:
+                alternatives.append(list(pending))
+                pending.clear()
+        else:
+            flush()
+            if raw == ".":
+                skipping = False
+                tokens.append((",",))
+            elif raw in "()":
+                tokens.append((raw,))
+            elif raw in ";," and not skipping:
+                tokens.append((",",))
+    flush()
+    return tokens
+
+
+def _combine(op: str, children: List):
+    """Build an AND/OR node, dropping unknown (None) children and flattening nested ops."""
+    flat = []
+    for child in children:
+        if child is None:
+            continue
+        parts = child[1] if isinstance(child, tuple) and child[0] == op else (child,)
+        for part in parts:
+            if part not in flat:
+                flat.append(part)
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return (op, tuple(flat))
+
+
+def _parse_segment(items: List):
+    """Parse one comma-free run of atoms and conjunctions; AND binds tighter than OR."""
+    groups = [[]]
+    for item in items:
+        if item == OR:
+            groups.append([])
+        elif item != AND:
+            groups[-1].append(item)
+    return _combine(OR, [_combine(AND, group) for group in groups])
+
+
+def _parse(tokens: List, pos: int = 0):
+    """Parse tokens up to the matching ')' (or the end); returns (tree, next position)."""
+    segments = [[]]
+    leads = [None]
+
+    while pos < len(tokens):
+        kind = tokens[pos][0]
+        pos += 1
+        if kind == ")":
+            break
+        if kind == ",":
+            segments.append([])
+            leads.append(None)
+        elif kind in (AND, OR):
+            if segments[-1]:
+                segments[-1].append(kind)
+            elif leads[-1] is None:
+                leads[-1] = kind
+        elif kind == "(":
+            node, pos = _parse(tokens, pos)
+            segments[-1].append(node)
+        elif kind == "course":
+            segments[-1].append(_combine(OR, list(tokens[pos - 1][1])))
+        else:
+            segments[-1].append(None)
+
+    # "MATH 211, 217, 221, or 275" is an OR list; otherwise commas are ANDs
+    # and ", or" separates alternatives at the lowest precedence
+    parsed = [_parse_segment(items) for items in segments]
+    if leads[-1] == OR and leads.count(OR) == 1 and len(segments) > 1 and all(
+            len(items) == 1 and isinstance(items[0], str) for items in segments[:-1]):
+        return _combine(OR, parsed), pos
+
+    alternatives = [[]]
+    for lead, node in zip(leads, parsed):
+        if lead == OR and alternatives[-1]:
+            alternatives.append([])
+        alternatives[-1].append(node)
+    return _combine(OR, [_combine(AND, group) for group in alternatives]), pos
+
+
+@lru_cache(maxsize=20000)
+def parse_prereqs(text: str):
+    """
+    Parse prerequisite text into an expression tree.
+
+    Leaves are normalized course IDs and inner nodes are ("and", children)
+    or ("or", children). Requirements that are not courses ("graduate
+    standing", "consent of instructor") cannot be checked and drop out, so
+    "COMP SCI 300 or graduate standing" compiles to just COMPSCI300.
+
+    Returns:
+        The tree, or None when there is no course requirement
+    """
+    if not text or text.strip() == "None":
+        return None
+    tree, _ = _parse(_tokenize(text))
+    return tree
+
+
+def compile_prereqs(prereqs):
+    """Expression tree for a course's prereqs field: free text or a list of codes (all required)."""
+    if isinstance(prereqs, (list, tuple)):
+        return _combine(AND, [normalize(code) for code in prereqs])
+    return parse_prereqs(prereqs) if isinstance(prereqs, str) else None
+
+
+def evaluate(tree, completed: Set[str]) -> bool:
+    """Evaluate a tree against normalized completed IDs."""
+    if tree is None:
+        return True
+    if isinstance(tree, str):
+        return tree in completed
+    op, children = tree
+    if op == AND:
+        return all(evaluate(child, completed) for child in children)
+    return any(evaluate(child, completed) for child in children)
+
+
+def to_cnf(tree) -> List[frozenset]:
+    """Convert a tree to CNF: a list of clauses, each satisfied by any one of its IDs."""
+    if tree is None:
+        return []
+    if isinstance(tree, str):
+        return [frozenset((tree,))]
+    op, children = tree
+    if op == AND:
+        clauses = [clause for child in children for clause in to_cnf(child)]
+    else:
+        clauses = [frozenset()]
+        for child in children:
+            clauses = [left | right for left, right in product(clauses, to_cnf(child))][:MAX_CLAUSES]
+    # Absorption: a clause containing a smaller clause adds nothing. Sorting on
+    # the IDs too keeps the order, and so which clauses MAX_CLAUSES keeps,
+    # independent of string hashing (it differs between worker processes)
+    unique = sorted(set(clauses), key=lambda clause: (len(clause), sorted(clause)))
+    return [clause for i, clause in enumerate(unique) if not any(other < clause for other in unique[:i])]
+
+
+class PrereqGraph:
+    """
+    Prerequisite DAG and eligibility bitsets for one catalog.
+
+    Every course ID (in the catalog or only referenced as a prerequisite)
+    gets a bit, a completed set becomes one integer, and each course's
+    requirement is a list of clause masks that must all intersect it.
+    """
+
+    def __init__(self, courses: Iterable, version: Optional[str] = None):
+        self.version = version
+        self.trees = {}
+        for course in courses:
+            code = normalize(_field(course, 'code') or '')
+            if code and code not in self.trees:
+                self.trees[code] = compile_prereqs(_field(course, 'prereqs'))
+
+        self.ids = list(self.trees)
+        for tree in list(self.trees.values()):
+            for clause in to_cnf(tree):
+                self.ids.extend(sorted(code for code in clause if code not in self.trees))
+        self.ids = list(dict.fromkeys(self.ids))
+        self.bits = {code: 1 << index for index, code in enumerate(self.ids)}
+
+        self.free = 0           # Courses with no course prerequisites
+        self.requirements = []  # (course bit, [clause masks])
+        self.prerequisites = {}
+        self.dependents = {}
+        for code, tree in self.trees.items():
+            clauses = to_cnf(tree)
+            if not clauses:
+                self.free |= self.bits[code]
+                continue
+            masks = []
+            for clause in clauses:
+                mask = 0
+                for prereq in clause:
+                    mask |= self.bits[prereq]
+                    self.prerequisites.setdefault(code, set()).add(prereq)
+                    self.dependents.setdefault(prereq, set()).add(code)
+                masks.append(mask)
+            self.requirements.append((self.bits[code], masks))
+
+    def completed_mask(self, completed: Iterable[str]) -> int:
+        """Bitset of completed course codes (unknown codes are ignored)."""
+        mask = 0
+        for code in completed:
+            mask |= self.bits.get(normalize(code), 0)
+        return mask
+
+    def eligible_mask(self, completed_mask: int) -> int:
+        """Bitset of catalog courses whose prerequisites the completed bitset satisfies."""
+        eligible = self.free
+        for bit, masks in self.requirements:
+            for mask in masks:
+                if not completed_mask & mask:
+                    break
+            else:
+                eligible |= bit
+        return eligible
+
+    def eligible(self, completed: Iterable[str]) -> Set[str]:
+        """Normalized IDs of courses the student can take next (prerequisites met, not yet completed)."""
+        done = self.completed_mask(completed)
+        available = self.eligible_mask(done) & ~done
+        return {code for code in self.trees if available & self.bits[code]}
+
+    def is_eligible(self, course_code: str, completed: Iterable[str]) -> bool:
+        """Whether one course's prerequisites are met."""
+        return evaluate(self.trees.get(normalize(course_code)), {normalize(code) for code in completed})
+
+    def unlocks(self, course_code: str) -> Set[str]:
+        """Courses that list this course somewhere in their prerequisites."""
+        return set(self.dependents.get(normalize(course_code), ()))
+
+    def topological_order(self) -> List[str]:
+        """Catalog course IDs with every prerequisite before its dependents; cycle members come last."""
+        remaining = {code: len(self.prerequisites.get(code, ()) & self.trees.keys()) for code in self.trees}
+        ready = [code for code, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            code = ready.pop()
+            order.append(code)
+            for dependent in self.dependents.get(code, ()):
+                if dependent in remaining:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+        placed = set(order)
+        return order + [code for code in self.trees if code not in placed]
+
+
+_graphs = OrderedDict()
+_graphs_lock = threading.Lock()
+
+
+def catalog_key(courses: List) -> str:
+    """Content hash of a catalog's codes and prerequisite text, for catalogs without a version."""
+    digest = hashlib.sha1()
+    for course in courses:
+        digest.update(f"{_field(course, 'code')}\x1f{_field(course, 'prereqs')}\x1e".encode())
+    return digest.hexdigest()
+
+
+def compile_catalog(courses: List, version: Optional[str] = None) -> PrereqGraph:
+    """
+    Compile (or fetch the cached) PrereqGraph for a catalog.
+
+    Args:
+        courses: Course dicts or records with code and prereqs
+        version: Catalog snapshot version; when None the catalog's content hash is used
+
+    Returns:
+        The compiled PrereqGraph
+    """
+    key = version or catalog_key(courses)
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is not None:
+            _graphs.move_to_end(key)
+            return graph
+
+    graph = PrereqGraph(courses, key)
+    with _graphs_lock:
+        _graphs[key] = graph
+        while len(_graphs) > GRAPH_CACHE_ENTRIES:
+            _graphs.popitem(last=False)
+    return graph
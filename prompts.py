@@ -0,0 +1,444 @@
+"""
+Model prompts split into a shared prefix and a per-student suffix.
+
+Anthropic prompt caching only reuses a prefix that is byte-identical
+between requests, so everything students share (instructions, degree
+requirements, the term's course catalog) is rendered once per catalog
+version with sorted keys and no whitespace and sent as system blocks
+marked with cache_control. Per-student fields go in the user message
+after it.
+
+Courses are sent as compact pipe-delimited tables rather than JSON
+objects, and both course lists are pruned by relevance to a token budget:
+the shared catalog keeps the courses degree requirements name first, and
+each student's eligible list keeps the courses that count toward their
+remaining requirements first, so unrelated 100-level courses are the
+first to go. Token usage (including cache reads) and latency are
+recorded per call kind.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from course_catalog import canonical_code, split_code
+from llm_gateway import CHARS_PER_TOKEN
+from schedule_solver import course_credits
+
+
+PREFIX_CACHE_ENTRIES = 16  # Rendered catalog blocks kept in memory
+PREREQ_TEXT_LIMIT = 100    # Characters of prerequisite text sent per course
+NAME_TEXT_LIMIT = 40       # Characters of course name sent per course
+CATALOG_TOKEN_BUDGET = int(os.getenv('PROMPT_CATALOG_TOKENS', 8000))   # Shared catalog block
+ELIGIBLE_TOKEN_BUDGET = int(os.getenv('PROMPT_ELIGIBLE_TOKENS', 600))  # Per-student eligible course table
+RECENT_CALLS = 500         # Calls kept per kind for latency percentiles
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Relevance ranks; lower sorts first and survives pruning longest
+CANDIDATE_RANK = -1    # In a pre-validated candidate schedule
+REQUIRED_RANK = 0
+ELECTIVE_RANK = 1
+MAJOR_SUBJECT_RANK = 2
+OTHER_RANK = 3
+
+SCHEDULE_INSTRUCTIONS = """You are a university course scheduling advisor for UW-Madison. For each student you generate 3 different recommended schedules using the degree requirements and the term's course catalog below.
+
+Every request lists the student's major, completed courses, target credit hours, semester, interests (when given), remaining degree requirements (already audited against completed courses), the catalog courses they are eligible for (not yet completed, prerequisites met; a table of code|credits|counts_toward, most relevant first) and pre-validated candidate schedules (prerequisites, completed courses and credit totals already checked). Course tables are pipe-delimited with a header row.
+
+Generate 3 diverse schedule options that:
+1. Meet the target credit hours (±2 credits is acceptable)
+2. Progress toward degree requirements
+3. Consider course difficulty balance, and favor courses matching the student's interests when given
+4. Provide different focuses (e.g., theory-heavy, practical-heavy, balanced)
+5. **CRITICAL**: Only use courses from the student's eligible course list - NEVER suggest courses the student has already completed!
+6. Prefer the pre-validated candidate schedules: rank them, adjust only if needed, and explain each one
+
+Return your response as a JSON array of schedules. Each schedule should have:
+- "name": A descriptive name for the schedule approach
+- "courses": Array of course codes (e.g., ["COMP SCI 400", "MATH 340"])
+- "total_credits": Total credit hours
+- "rationale": Brief explanation of why this schedule makes sense
+
+Example format:
+[
+  {
+    "name": "Balanced Core Focus",
+    "courses": ["COMP SCI 400", "COMP SCI 354", "MATH 340"],
+    "total_credits": 9,
+    "rationale": "Balances core CS requirements with essential math foundations"
+  }
+]
+
+Return ONLY the JSON array, no other text."""
+
+SCHEDULE_REPAIR_REQUEST = """None of those schedules could be used:
+{problems}
+
+Reply again with ONLY the JSON array of 3 schedules, using only courses from the eligible course list. The pre-validated candidate schedules are always acceptable."""
+
+DARS_INSTRUCTIONS = """Analyze the attached UW-Madison DARS report and extract the following information in JSON format:
+
+{
+  "major": "primary major name (e.g., 'Computer Science')",
+  "minor_or_certificate": "any minor or certificate (or null)",
+  "completed_courses": ["array", "of", "ALL", "completed", "course", "codes"],
+  "in_progress_courses": ["courses", "currently", "taking"],
+  "planned_courses": ["courses", "planned", "for", "future"],
+  "total_credits_earned": number,
+  "gpa": number (or null if not shown)
+}
+
+CRITICAL INSTRUCTIONS:
+1. For "completed_courses": Include EVERY course that shows as completed/passed with a grade. Look through the ENTIRE document.
+2. This includes all courses with grades like A, AB, B, BC, C, etc. - ANY course with a passing grade.
+3. Do NOT skip any courses - if it has a grade and credits earned, it goes in "completed_courses".
+4. Extract course codes exactly as shown (e.g., "COMP SCI 300", "MATH 340", "COMP SCI 354", "COMP SCI 400").
+5. Be thorough - students often have 20-40+ completed courses. Don't stop after finding just a few.
+
+Return ONLY the JSON object, no other text."""
+
+DARS_REQUEST = "Extract the DARS data from this report."
+
+
+def stable_json(value) -> str:
+    """JSON with sorted keys and no insignificant whitespace, so equal values render to equal bytes."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _field(course, name: str):
+    """Read a field from a course dict or a uw_records.Course."""
+    return course.get(name) if isinstance(course, dict) else getattr(course, name, None)
+
+
+def catalog_entries(courses: Iterable) -> List[Dict]:
+    """Compact, code-ordered view of a catalog for prompts."""
+    entries = {}
+    for course in courses:
+        code = _field(course, 'code')
+        key = canonical_code(code or '')
+        if not code or key in entries:
+            continue
+        prereqs = _field(course, 'prereqs') or 'None'
+        if isinstance(prereqs, (list, tuple)):
+            prereqs = ", ".join(prereqs) or 'None'
+        entries[key] = {
+            "code": code,
+            "name": _field(course, 'name'),
+            "credits": course_credits(course),
+            "prereqs": prereqs[:PREREQ_TEXT_LIMIT]
+        }
+    return [entries[key] for key in sorted(entries)]
+
+
+def course_table(columns: List[str], rows: Iterable[List], token_budget: Optional[int] = None) -> str:
+    """
+    Pipe-delimited table with a header row, far cheaper in tokens than a
+    JSON object per course.
+
+    Rows are added in order until token_budget (estimated) is reached.
+    """
+    lines = ["|".join(columns)]
+    chars = len(lines[0])
+    for row in rows:
+        line = "|".join("" if value is None else str(value).replace("|", "/").replace("\n", " ") for value in row)
+        chars += len(line) + 1
+        if token_budget is not None and chars > token_budget * CHARS_PER_TOKEN:
+            break
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _subjects(course_codes: Iterable[str]) -> set:
+    subjects = set()
+    for code in course_codes:
+        parts = split_code(code)
+        if parts:
+            subjects.update(parts[0])
+    return subjects
+
+
+def requirement_ranks(required: Iterable[str], electives: Dict[str, Iterable[str]]) -> Dict:
+    """
+    Relevance lookup for a set of requirements.
+
+    Args:
+        required: Required course codes
+        electives: Elective category name -> option codes
+
+    Returns:
+        Dict with "codes" (canonical code -> (rank, what it counts toward))
+        and "subjects" (subject keys the requirements come from)
+    """
+    codes = {}
+    for name, options in electives.items():
+        for code in options:
+            codes[canonical_code(code)] = (ELECTIVE_RANK, name)
+    for code in required:
+        codes[canonical_code(code)] = (REQUIRED_RANK, "required")
+    return {"codes": codes, "subjects": _subjects(list(required) + [
+        code for options in electives.values() for code in options])}
+
+
+def rank_courses(courses: Iterable, ranks: Dict, pinned: Iterable[str] = (),
+                 relevance: Optional[Dict[str, float]] = None) -> List:
+    """
+    Courses ordered by relevance to requirements from requirement_ranks:
+    pinned codes, required, elective options, other courses in the
+    requirements' subjects, then everything else. Within a rank, courses
+    with higher relevance scores (canonical code -> similarity, from
+    course_index) come first, then intro (below 200) courses last and
+    lower numbers first otherwise.
+
+    Returns:
+        (course, what it counts toward or "") pairs
+    """
+    pinned = {canonical_code(code) for code in pinned}
+    relevance = relevance or {}
+    ranked = []
+    for course in courses:
+        code = _field(course, 'code') or ''
+        key = canonical_code(code)
+        rank, counts_toward = ranks["codes"].get(key, (None, ""))
+        if rank is None:
+            rank = MAJOR_SUBJECT_RANK if _subjects([code]) & ranks["subjects"] else OTHER_RANK
+        if key in pinned:
+            rank = CANDIDATE_RANK
+        parts = split_code(code)
+        number = int(parts[1]) if parts else 0
+        ranked.append(((rank, -relevance.get(key, 0.0), number < 200, number, key), course, counts_toward))
+    ranked.sort(key=lambda item: item[0])
+    return [(course, counts_toward) for _, course, counts_toward in ranked]
+
+
+def catalog_table(degree_requirements: Dict, courses: Iterable, token_budget: int = CATALOG_TOKEN_BUDGET) -> str:
+    """
+    Shared catalog block: code|name|credits|prereqs for the courses most
+    relevant to any major's requirements, within token_budget, in code
+    order so it renders identically for every student.
+    """
+    ranks = requirement_ranks(
+        [code for reqs in degree_requirements.values() for code in reqs.get('required_courses', [])],
+        {f"{major}:{name}": category.get('options', [])
+         for major, reqs in degree_requirements.items()
+         for name, category in reqs.get('elective_categories', {}).items()}
+    )
+    rows = []
+    chars = 0
+    for entry, _ in rank_courses(catalog_entries(courses), ranks):
+        row = [entry['code'], (entry['name'] or "")[:NAME_TEXT_LIMIT], entry['credits'], entry['prereqs']]
+        chars += sum(len(str(value)) for value in row) + len(row)
+        if chars > token_budget * CHARS_PER_TOKEN:
+            break
+        rows.append(row)
+    rows.sort(key=lambda row: canonical_code(row[0]))
+    return course_table(["code", "name", "credits", "prereqs"], rows)
+
+
+def remaining_requirements(remaining: Dict) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Required course codes and elective options still needed.
+
+    Args:
+        remaining: degree_audit.remaining_summary output, or a major's
+            DEGREE_REQUIREMENTS entry when there is no audit
+
+    Returns:
+        (required codes, elective category name -> option codes)
+    """
+    if "remaining_required_courses" in remaining:
+        required = remaining["remaining_required_courses"] + remaining.get("in_progress_required_courses", [])
+        electives = {name: category["options"]
+                     for name, category in remaining.get("elective_categories_still_needed", {}).items()}
+    else:
+        required = remaining.get("required_courses", [])
+        electives = {name: category.get("options", [])
+                     for name, category in remaining.get("elective_categories", {}).items()}
+    return required, electives
+
+
+def eligible_table(courses: Iterable, remaining: Dict, candidates: List[Dict] = (),
+                   relevance: Optional[Dict[str, float]] = None,
+                   token_budget: int = ELIGIBLE_TOKEN_BUDGET) -> str:
+    """
+    Per-student table of eligible courses, code|credits|counts_toward,
+    most relevant to the remaining requirements first and cut at
+    token_budget.
+
+    Args:
+        courses: Eligible course dicts
+        remaining: See remaining_requirements
+        candidates: Pre-validated schedules, whose courses are always kept
+        relevance: Similarity of each course to the student, used to order
+            courses within a rank (see rank_courses)
+    """
+    ranked = rank_courses(courses, requirement_ranks(*remaining_requirements(remaining)),
+                          [code for candidate in candidates for code in candidate['courses']], relevance)
+    return course_table(
+        ["code", "credits", "counts_toward"],
+        ([_field(course, 'code'), course_credits(course), counts_toward] for course, counts_toward in ranked),
+        token_budget
+    )
+
+
+_prefixes = OrderedDict()
+_prefixes_lock = threading.Lock()
+
+
+def schedule_system(degree_requirements: Dict, courses: Iterable, semester: str,
+                    catalog_version: str) -> List[Dict]:
+    """
+    Shared system blocks for schedule generation.
+
+    Rendered once per (semester, catalog version); the cache breakpoint sits
+    on the catalog block so instructions, requirements and catalog are
+    cached together.
+
+    Args:
+        degree_requirements: DEGREE_REQUIREMENTS for every major
+        courses: The term's catalog
+        semester: Term the catalog belongs to
+        catalog_version: Snapshot version or content hash of the catalog
+
+    Returns:
+        System content blocks for messages.create
+    """
+    key = (" ".join(semester.split()).title(), catalog_version)
+    with _prefixes_lock:
+        blocks = _prefixes.get(key)
+        if blocks is not None:
+            _prefixes.move_to_end(key)
+            return blocks
+
+    blocks = [
+        {"type": "text", "text": SCHEDULE_INSTRUCTIONS},
+        {"type": "text", "text": f"Degree requirements by major:\n{stable_json(degree_requirements)}"},
+        {
+            "type": "text",
+            "text": f"Course catalog for {key[0]}:\n{catalog_table(degree_requirements, courses)}",
+            "cache_control": CACHE_CONTROL
+        }
+    ]
+    with _prefixes_lock:
+        _prefixes[key] = blocks
+        while len(_prefixes) > PREFIX_CACHE_ENTRIES:
+            _prefixes.popitem(last=False)
+    return blocks
+
+
+def schedule_request(major: str, completed_courses: List[str], target_credits: int, semester: str,
+                     remaining: Dict, eligible_courses: Iterable, candidates: List[Dict],
+                     interests: str = "", relevance: Optional[Dict[str, float]] = None) -> str:
+    """
+    Per-student suffix for schedule generation.
+
+    Args:
+        remaining: degree_audit.remaining_summary output (or the major's requirements)
+        eligible_courses: Course dicts the student can take; pruned to the
+            most relevant within ELIGIBLE_TOKEN_BUDGET
+        candidates: Pre-validated schedules from schedule_solver
+        interests: The student's free-text interests, if any
+        relevance: Similarity of eligible courses to the student (course_index)
+    """
+    interests_line = f"\n- Interests: {' '.join(interests.split())}" if interests and interests.strip() else ""
+    return f"""Student Information:
+- Major: {major}
+- Completed Courses: {', '.join(completed_courses)}
+- Target Credit Hours: {target_credits}
+- Semester: {semester}{interests_line}
+
+Remaining Degree Requirements:
+{stable_json(remaining)}
+
+Eligible Courses (NOT yet completed, prerequisites met):
+{eligible_table(eligible_courses, remaining, candidates, relevance)}
+
+Pre-validated Candidate Schedules:
+{stable_json([{"courses": c["courses"], "total_credits": c["total_credits"]} for c in candidates])}"""
+
+
+def schedule_repair_messages(prompt: str, response_text: str, problems: List[str]) -> List[Dict]:
+    """Conversation asking the model to redo a schedule response that failed validation."""
+    return [
+        {"role": "user", "content": prompt},
+        {"role": "assistant", "content": response_text or "[]"},
+        {"role": "user", "content": SCHEDULE_REPAIR_REQUEST.format(
+            problems="\n".join(f"- {problem}" for problem in problems[:20]))}
+    ]
+
+
+def dars_system() -> List[Dict]:
+    """Shared system block for DARS extraction."""
+    return [{"type": "text", "text": DARS_INSTRUCTIONS, "cache_control": CACHE_CONTROL}]
+
+
+def dars_request(pdf_base64: str) -> List[Dict]:
+    """Per-student DARS message content: the report followed by a short request."""
+    return [
+        {
+            "type": "document",
+            "source": {
+                "type": "base64",
+                "media_type": "application/pdf",
+                "data": pdf_base64
+            }
+        },
+        {"type": "text", "text": DARS_REQUEST}
+    ]
+
+
+class PromptUsage:
+    """Token usage and latency per call kind, including prompt-cache reads and writes."""
+
+    FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kinds = {}
+        self._latencies = {}  # kind -> recent call durations in seconds
+
+    def record(self, kind: str, usage, seconds: Optional[float] = None) -> Optional[Dict]:
+        """
+        Add one response's usage and duration to the totals for a call kind.
+
+        Returns:
+            The token counts read from this response, or None if it had no usage
+        """
+        if seconds is not None:
+            with self._lock:
+                self._latencies.setdefault(kind, deque(maxlen=RECENT_CALLS)).append(seconds)
+        if usage is None:
+            return None
+        counts = {name: getattr(usage, name, None) or 0 for name in self.FIELDS}
+        with self._lock:
+            totals = self._kinds.setdefault(kind, dict.fromkeys(("calls",) + self.FIELDS, 0))
+            totals["calls"] += 1
+            for name, value in counts.items():
+                totals[name] += value
+        return counts
+
+    def status(self) -> Dict:
+        """
+        Totals per call kind, mean tokens per call, the share of prompt
+        tokens served from the cache and latency percentiles of recent calls.
+        """
+        with self._lock:
+            kinds = {kind: dict(totals) for kind, totals in self._kinds.items()}
+            latencies = {kind: sorted(values) for kind, values in self._latencies.items()}
+        for totals in kinds.values():
+            prompt_tokens = (totals["input_tokens"] + totals["cache_read_input_tokens"]
+                             + totals["cache_creation_input_tokens"])
+            totals["cache_read_ratio"] = (round(totals["cache_read_input_tokens"] / prompt_tokens, 3)
+                                          if prompt_tokens else None)
+            totals["prompt_tokens_per_call"] = round(prompt_tokens / totals["calls"]) if totals["calls"] else None
+            totals["output_tokens_per_call"] = (round(totals["output_tokens"] / totals["calls"])
+                                                if totals["calls"] else None)
+        for kind, values in latencies.items():
+            if values:
+                kinds.setdefault(kind, {}).update({
+                    "latency_p50_ms": round(values[len(values) // 2] * 1000),
+                    "latency_p95_ms": round(values[min(len(values) - 1, int(0.95 * len(values)))] * 1000),
+                    "latency_mean_ms": round(sum(values) / len(values) * 1000)
+                })
+        return kinds
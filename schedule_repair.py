@@ -0,0 +1,246 @@
+"""
+Validation and local repair of model-generated schedules.
+
+The model is asked for a bare JSON array, but responses sometimes come
+wrapped in ```json fences, with a sentence before or after, as an object
+holding the array, or cut off mid-array at max_tokens. extract_schedules
+recovers the schedules from all of these.
+
+ScheduleValidator then checks every schedule against the catalog index,
+the student's completed courses, prerequisites and the credit target,
+and repairs what it can locally: course codes are rewritten to their
+catalog form, unknown, duplicate, already-completed and ineligible
+courses are dropped, and total_credits is recomputed from the catalog.
+Only a schedule left empty or outside the credit range is discarded, and
+only a response with no usable schedule at all is worth another model
+call.
+"""
+
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from course_catalog import CourseCatalog, canonical_code
+from prereq_graph import PrereqGraph, normalize
+from schedule_solver import CREDIT_TOLERANCE, course_credits
+from streaming import ArrayObjectStream
+
+
+MAX_REPAIR_PROMPTS = 1  # Extra model calls allowed when no schedule survives validation
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+def _as_schedules(value) -> Optional[List[Dict]]:
+    """A decoded value as a list of schedule dicts, or None if it isn't one."""
+    if isinstance(value, dict):
+        for key in ("schedules", "options", "recommendations"):
+            if isinstance(value.get(key), list):
+                value = value[key]
+                break
+        else:
+            return [value] if "courses" in value else None
+    if isinstance(value, list):
+        schedules = [item for item in value if isinstance(item, dict)]
+        return schedules or None
+    return None
+
+
+def _first_value(text: str, opener: str) -> Optional[List[Dict]]:
+    """Schedules from the first JSON value starting at an opener ('[' or '{') that decodes to some."""
+    decoder = json.JSONDecoder()
+    start = text.find(opener)
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+        except ValueError:
+            pass
+        else:
+            schedules = _as_schedules(value)
+            if schedules:
+                return schedules
+        start = text.find(opener, start + 1)
+    return None
+
+
+def extract_schedules(text: str) -> List[Dict]:
+    """
+    Schedule dicts from a model response, tolerating fences, prose and truncation.
+
+    Tries, in order: the whole text, each fenced block, the first array
+    starting at any '[', every complete object of a truncated array, and
+    finally the first object starting at any '{'. Truncation is tried
+    before lone objects, or a cut-off array would yield only its first
+    schedule.
+
+    Raises:
+        ValueError: If no schedule can be recovered
+    """
+    text = text or ""
+    attempts = [text.strip()] + [block.strip() for block in _FENCE.findall(text)]
+    for attempt in attempts:
+        try:
+            schedules = _as_schedules(json.loads(attempt))
+        except ValueError:
+            continue
+        if schedules:
+            return schedules
+
+    schedules = _first_value(text, "[")
+    if schedules:
+        return schedules
+    # A response cut off at max_tokens still holds its completed objects
+    schedules = _as_schedules(ArrayObjectStream().feed(text))
+    if schedules:
+        return schedules
+    schedules = _first_value(text, "{")
+    if schedules:
+        return schedules
+    raise ValueError(f"No schedules found in model response ({len(text)} characters)")
+
+
+class ScheduleValidator:
+    """
+    Checks and repairs schedules for one student.
+
+    Args:
+        catalog: Indexed term catalog
+        graph: Compiled prerequisite graph of the same catalog
+        completed_courses: Completed (and in-progress) course codes
+        target_credits: Desired credit hours
+        tolerance: Allowed distance from target_credits
+    """
+
+    def __init__(self, catalog: CourseCatalog, graph: PrereqGraph, completed_courses: Iterable[str],
+                 target_credits: int, tolerance: int = CREDIT_TOLERANCE):
+        self.catalog = catalog
+        self.completed = catalog.keys(completed_courses)
+        self.eligible = graph.eligible(completed_courses)
+        self.low = int(target_credits) - tolerance
+        self.high = int(target_credits) + tolerance
+        self._kept = set()  # Course sets of schedules already accepted
+
+    def repair(self, schedule: Dict) -> Tuple[Optional[Dict], List[str]]:
+        """
+        Validate one schedule and fix what can be fixed locally.
+
+        Schedules repeating the courses of one accepted earlier are unusable.
+
+        Returns:
+            (repaired schedule with course_details, or None if unusable;
+            descriptions of the problems found)
+        """
+        problems = []
+        codes = schedule.get('courses')
+        if isinstance(codes, str):
+            codes = [code.strip() for code in codes.split(',')]
+        if not isinstance(codes, list):
+            return None, ["courses is not a list"]
+
+        courses = []
+        seen = set()
+        for code in codes:
+            course = self.catalog.get(code) if isinstance(code, str) else None
+            if course is None:
+                problems.append(f"{code} is not in the catalog")
+                continue
+            key = canonical_code(course['code'])
+            if key in seen:
+                problems.append(f"{code} is listed twice")
+                continue
+            seen.add(key)
+            if key in self.completed or canonical_code(code) in self.completed:
+                problems.append(f"{code} is already completed")
+            elif normalize(course['code']) not in self.eligible:
+                problems.append(f"{code} has unmet prerequisites")
+            else:
+                if code != course['code']:
+                    problems.append(f"{code} renamed to {course['code']}")
+                courses.append(course)
+
+        if not courses:
+            return None, problems + ["no valid courses"]
+
+        total = sum(course_credits(course) for course in courses)
+        if schedule.get('total_credits') != total:
+            problems.append(f"total_credits {schedule.get('total_credits')} corrected to {total}")
+        if not self.low <= total <= self.high:
+            return None, problems + [f"{total} credits is outside {self.low}-{self.high}"]
+        key = frozenset(canonical_code(course['code']) for course in courses)
+        if key in self._kept:
+            return None, problems + ["same courses as an earlier schedule"]
+        self._kept.add(key)
+
+        repaired = dict(schedule)
+        repaired['name'] = schedule.get('name') or "Recommended Schedule"
+        repaired['rationale'] = schedule.get('rationale') or ""
+        repaired['courses'] = [course['code'] for course in courses]
+        repaired['total_credits'] = total
+        repaired['course_details'] = courses
+        return repaired, problems
+
+    def repair_all(self, schedules: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Validate and repair a list of schedules, dropping unusable ones.
+
+        Returns:
+            (usable schedules, problems found across all of them)
+        """
+        usable = []
+        problems = []
+        for index, schedule in enumerate(schedules, 1):
+            repaired, found = self.repair(schedule)
+            problems.extend(f"schedule {index}: {problem}" for problem in found)
+            if repaired is not None:
+                usable.append(repaired)
+        return usable, problems
+
+
+class RepairStats:
+    """Counts of model responses accepted as-is, repaired locally, or unusable."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"responses": 0, "clean": 0, "repaired": 0, "unusable": 0,
+                       "schedules_dropped": 0, "repair_prompts": 0}
+
+    def record(self, received: int, usable: int, problems: List[str]):
+        """Record one response: schedules received, schedules usable and the problems found."""
+        with self._lock:
+            self.counts["responses"] += 1
+            self.counts["schedules_dropped"] += received - usable
+            if not usable:
+                self.counts["unusable"] += 1
+            elif problems:
+                self.counts["repaired"] += 1
+            else:
+                self.counts["clean"] += 1
+
+    def reprompted(self):
+        with self._lock:
+            self.counts["repair_prompts"] += 1
+
+    def status(self) -> Dict:
+        with self._lock:
+            return dict(self.counts)
+
+
+def validate_response(validator: ScheduleValidator, response_text: str,
+                      stats: Optional[RepairStats] = None) -> Tuple[List[Dict], List[str]]:
+    """
+    Extract, validate and repair the schedules in a complete model response.
+
+    Returns:
+        (usable schedules, problems found); no schedules means the response
+        is unusable and the model should be asked again
+    """
+    try:
+        schedules = extract_schedules(response_text)
+    except ValueError as e:
+        schedules, usable, problems = [], [], [str(e)]
+    else:
+        usable, problems = validator.repair_all(schedules)
+    if stats is not None:
+        stats.record(len(schedules), len(usable), problems)
+    return usable, problems
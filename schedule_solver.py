@@ -0,0 +1,190 @@
+"""
+Deterministic local schedule solver.
+
+Builds schedules that respect completed courses, prerequisites, degree
+requirements and a credit target without calling the model, so candidates
+are ready in milliseconds. Claude can then rank and explain them, or be
+skipped entirely.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from prereq_graph import compile_catalog, normalize
+
+
+CREDIT_TOLERANCE = 2      # Target credit hours ±2 are acceptable
+MAX_CANDIDATES = 16       # Highest-scoring eligible courses considered per search
+MAX_COURSES = 6           # Courses per schedule
+REQUIRED_WEIGHT = 10
+ELECTIVE_WEIGHT = 6
+OTHER_WEIGHT = 1
+REQUIRED = "required"
+
+
+def course_credits(course: Dict) -> int:
+    """Credit hours of a course dict from any of the catalog sources."""
+    credits = course.get('min_credits', course.get('credits', 3))
+    if isinstance(credits, str):
+        match = re.match(r"\d+", credits)
+        return int(match.group()) if match else 3
+    return int(credits)
+
+
+def _subject(course_code: str) -> str:
+    """Subject part of a course code, e.g. 'COMP SCI 300' -> 'COMPSCI'."""
+    return normalize(course_code).rstrip('0123456789')
+
+
+def solve_schedules(courses: List[Dict], degree_reqs: Dict, completed_courses: List[str],
+                    target_credits: int, k: int = 3, tolerance: int = CREDIT_TOLERANCE,
+                    catalog_version: Optional[str] = None) -> List[Dict]:
+    """
+    Build the top-k diverse schedules for a student.
+
+    Args:
+        courses: Catalog course dicts with code, name, credits and prereqs
+        degree_reqs: One major's entry from DEGREE_REQUIREMENTS
+        completed_courses: Completed (and in-progress) course codes
+        target_credits: Desired credit hours
+        k: Number of schedules to return
+        tolerance: Allowed distance from target_credits
+        catalog_version: Snapshot version of the catalog, used to reuse its compiled prerequisite graph
+
+    Returns:
+        List of schedule dicts (name, courses, total_credits, rationale,
+        course_details) in the same shape the model returns
+    """
+    completed = {normalize(code) for code in completed_courses}
+    required = {normalize(code) for code in degree_reqs.get('required_courses', [])}
+
+    # Remaining quota per elective category
+    categories = {}
+    for name, category in degree_reqs.get('elective_categories', {}).items():
+        options = {normalize(code) for code in category.get('options', [])}
+        remaining = category.get('required', 0) - len(options & completed)
+        if remaining > 0:
+            categories[name] = (options, remaining)
+
+    available = compile_catalog(courses, catalog_version).eligible(completed)
+    eligible = []
+    seen = set()
+    for course in courses:
+        code = normalize(course['code'])
+        if code not in available or code in seen:
+            continue
+        seen.add(code)
+        eligible.append(course)
+
+    # Fill remaining credits from the subjects the major's requirements come from
+    major_subjects = {
+        _subject(code)
+        for code in degree_reqs.get('required_courses', []) + [
+            option for category in degree_reqs.get('elective_categories', {}).values()
+            for option in category.get('options', [])
+        ]
+    }
+
+    def category_of(code):
+        if code in required:
+            return REQUIRED
+        for name, (options, _) in categories.items():
+            if code in options:
+                return name
+        return None
+
+    ranked = []
+    for course in eligible:
+        category = category_of(normalize(course['code']))
+        weight = REQUIRED_WEIGHT if category == REQUIRED else ELECTIVE_WEIGHT if category else OTHER_WEIGHT
+        ranked.append(((-weight, _subject(course['code']) not in major_subjects, course['code']), category, course))
+    ranked.sort(key=lambda item: item[0])
+
+    candidates = [course for _, _, course in ranked[:MAX_CANDIDATES]]
+    kinds = [category for _, category, _ in ranked[:MAX_CANDIDATES]]
+    credits = [course_credits(course) for course in candidates]
+
+    low, high = target_credits - tolerance, target_credits + tolerance
+    solutions = []
+    used = {name: 0 for name in categories}
+
+    # Depth-first over course subsets, pruning as soon as credits exceed the
+    # upper bound; elective value is capped by each category's remaining quota
+    def search(start, chosen, total, score):
+        if low <= total:
+            solutions.append((score - abs(total - target_credits) * 0.5, total, tuple(chosen)))
+        if len(chosen) == MAX_COURSES:
+            return
+        for i in range(start, len(candidates)):
+            if total + credits[i] > high:
+                continue
+            kind = kinds[i]
+            if kind == REQUIRED:
+                gain = REQUIRED_WEIGHT
+            elif kind is not None and used[kind] < categories[kind][1]:
+                gain = ELECTIVE_WEIGHT
+                used[kind] += 1
+            else:
+                gain = OTHER_WEIGHT
+                kind = None
+            chosen.append(i)
+            search(i + 1, chosen, total + credits[i], score + gain)
+            chosen.pop()
+            if kind not in (None, REQUIRED):
+                used[kind] -= 1
+
+    search(0, [], 0, 0)
+
+    solutions.sort(key=lambda solution: (-solution[0], solution[2]))
+    return [
+        _describe(tuple(candidates[i] for i in chosen), total, required, categories)
+        for _, total, chosen in _diverse(solutions, k)
+    ]
+
+
+def _diverse(solutions: List, k: int) -> List:
+    """Greedily pick high-scoring solutions that share at most half their courses."""
+    picked = []
+    for max_overlap in (0.5, 0.75, 1.0):
+        for solution in solutions:
+            if len(picked) == k:
+                return picked
+            if any(solution is other for other in picked):
+                continue
+            chosen = set(solution[2])
+            if all(len(chosen & set(other[2])) <= max_overlap * len(chosen) for other in picked):
+                picked.append(solution)
+    return picked
+
+
+def _describe(combo, credits: int, required: set, categories: Dict) -> Dict:
+    """Turn a solution into a schedule dict with a name and rationale."""
+    required_codes = [course['code'] for course in combo if normalize(course['code']) in required]
+    elective_counts = {}
+    for course in combo:
+        for name, (options, _) in categories.items():
+            if normalize(course['code']) in options:
+                elective_counts[name] = elective_counts.get(name, 0) + 1
+
+    if len(required_codes) * 2 >= len(combo):
+        name = "Core Requirements Focus"
+    elif elective_counts:
+        name = f"{max(elective_counts, key=elective_counts.get).replace('_', ' ')} Focus"
+    else:
+        name = "Balanced Exploration"
+
+    parts = []
+    if required_codes:
+        parts.append(f"{len(required_codes)} required course(s) ({', '.join(required_codes)})")
+    for category, count in elective_counts.items():
+        parts.append(f"{count} {category.replace('_', ' ')} option(s)")
+    rationale = "Covers " + ", ".join(parts) if parts else "Eligible courses toward your degree"
+    rationale += f"; all prerequisites are met and it totals {credits} credits."
+
+    return {
+        "name": name,
+        "courses": [course['code'] for course in combo],
+        "total_credits": credits,
+        "rationale": rationale,
+        "course_details": list(combo)
+    }
@@ -0,0 +1,141 @@
+"""
+Bitset meeting-time conflict engine.
+
+Each section's weekly meetings compile into one integer bitmask with a bit
+per 5-minute slot of the week, so two sections overlap exactly when
+`a & b` is non-zero. Conflict-free section assignments for a course list
+are enumerated by backtracking with forward checking.
+"""
+
+from itertools import product
+from typing import Dict, List, Optional
+
+from uw_records import DAY_BITS, DAY_ORDER, NO_TIME, Course, Section
+
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DEFAULT_LIMIT = 50
+
+
+def meeting_mask(days: int, start: int, end: int) -> int:
+    """Bitmask of the 5-minute week slots a meeting occupies; TBA meetings occupy none."""
+    if start == NO_TIME or end == NO_TIME or end <= start:
+        return 0
+    first = start // SLOT_MINUTES
+    length = -(-end // SLOT_MINUTES) - first
+    run = (1 << length) - 1
+
+    mask = 0
+    for index, letter in enumerate(DAY_ORDER):
+        if days & DAY_BITS[letter]:
+            mask |= run << (index * SLOTS_PER_DAY + first)
+    return mask
+
+
+def section_mask(section: Section) -> int:
+    """Bitmask of every weekly slot a section meets in."""
+    mask = 0
+    for meeting in section.meetings:
+        mask |= meeting_mask(meeting.days, meeting.start, meeting.end)
+    return mask
+
+
+class SectionPackage:
+    """One enrollable combination of a course's sections: one of each type (LEC, DIS, LAB, ...)."""
+
+    __slots__ = ("course_code", "sections", "mask")
+
+    def __init__(self, course_code: str, sections: tuple, mask: int):
+        self.course_code = course_code
+        self.sections = sections
+        self.mask = mask
+
+    def to_json(self) -> Dict:
+        return {
+            "course_code": self.course_code,
+            "sections": [
+                {"section_number": section.number, "type": section.type}
+                for section in self.sections
+            ]
+        }
+
+
+def compile_packages(course: Course, open_only: bool = False) -> List[SectionPackage]:
+    """
+    Compile a course's sections into conflict-free packages.
+
+    A student enrolls in one section of each component type, so a package
+    takes one LEC, one DIS, one LAB, ... Packages whose own components
+    overlap are dropped.
+    """
+    by_type = {}
+    for section in course.sections:
+        if open_only and section.seats_available <= 0:
+            continue
+        by_type.setdefault(section.type, []).append((section, section_mask(section)))
+
+    packages = []
+    for combo in product(*by_type.values()):
+        mask = 0
+        for _, component_mask in combo:
+            if mask & component_mask:
+                break
+            mask |= component_mask
+        else:
+            packages.append(SectionPackage(course.code, tuple(section for section, _ in combo), mask))
+    return packages
+
+
+def enumerate_assignments(courses: List[Course], limit: Optional[int] = DEFAULT_LIMIT,
+                          open_only: bool = False) -> List[List[SectionPackage]]:
+    """
+    Enumerate conflict-free section assignments for a course list.
+
+    Courses with the fewest packages are assigned first, and after every
+    choice each remaining course must still have a compatible package, so
+    dead ends are cut immediately.
+
+    Args:
+        courses: Courses to schedule together
+        limit: Stop after this many assignments (None for all)
+        open_only: Skip sections with no open seats
+
+    Returns:
+        List of assignments, each a list of one SectionPackage per course;
+        empty when there are no courses, since nothing was checked
+    """
+    if not courses:
+        return []
+    options = sorted((compile_packages(course, open_only) for course in courses), key=len)
+    if any(not packages for packages in options):
+        return []
+
+    assignments = []
+    chosen = []
+
+    def search(depth: int, used: int) -> bool:
+        if depth == len(options):
+            assignments.append(list(chosen))
+            return limit is not None and len(assignments) >= limit
+
+        for package in options[depth]:
+            if package.mask & used:
+                continue
+            taken = used | package.mask
+            if not all(any(not (other.mask & taken) for other in later) for later in options[depth + 1:]):
+                continue
+            chosen.append(package)
+            done = search(depth + 1, taken)
+            chosen.pop()
+            if done:
+                return True
+        return False
+
+    search(0, 0)
+    return assignments
+
+
+def has_conflict_free_assignment(courses: List[Course], open_only: bool = False) -> bool:
+    """Whether any conflict-free section assignment exists for the courses."""
+    return bool(enumerate_assignments(courses, limit=1, open_only=open_only))
@@ -0,0 +1,85 @@
+"""
+Helpers for streaming model output to the browser.
+
+ArrayObjectStream parses a JSON array incrementally as text arrives from a
+streamed model response and hands back each top-level object as soon as
+its closing brace is seen, so the first schedule can be shown while the
+model is still writing the rest. sse_event formats one Server-Sent Event.
+"""
+
+import json
+from typing import Dict, List
+
+
+class ArrayObjectStream:
+    """
+    Incremental parser for a JSON array of objects.
+
+    Text before the opening '[' (a ```json fence, a stray sentence) is
+    skipped. Only the object currently being read is buffered, and string
+    contents are tracked so braces inside rationales don't confuse depth.
+    """
+
+    def __init__(self):
+        self.started = False   # Seen the opening '['
+        self.complete = False  # Seen the closing ']'
+        self.errors = 0        # Objects that closed but failed to decode
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Consume the next chunk of model output.
+
+        Returns:
+            Objects completed by this chunk, in order
+        """
+        objects = []
+        for char in text:
+            if self.complete:
+                break
+            if not self.started:
+                if char == '[':
+                    self.started = True
+                continue
+
+            if self._depth:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if not self._depth:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in '}]':
+                if not self._depth:
+                    self.complete = char == ']'
+                    continue
+                self._depth -= 1
+                if not self._depth:
+                    objects.extend(self._decode())
+        return objects
+
+    def _decode(self) -> List[Dict]:
+        text = "".join(self._buffer)
+        self._buffer = []
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return []
+        return [value] if isinstance(value, dict) else []
+
+
+def sse_event(event: str, data) -> str:
+    """One Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
@@ -0,0 +1,125 @@
+"""
+Server-side sessions holding one compact record per student.
+
+Flask's default session serializes everything into the signed cookie, so
+a parsed DARS transcript used to travel with every request, including
+section lookups that never read it. configure_sessions moves the session
+into a Flask-Session backend (a cachelib file cache shared by all workers
+on the host, or Redis when SESSION_REDIS_URL is set) and the cookie only
+carries the session ID.
+
+The student record stores each course code once, in one list, with a
+parallel status string ('c' completed, 'i' in progress, 'p' planned). The
+lists the routes read (completed_courses = completed and in progress,
+completed_only, in_progress_courses, planned_courses) are derived from it
+by load_student rather than stored.
+"""
+
+import os
+from typing import Dict, Iterable, Optional
+
+from cachelib import FileSystemCache
+
+from course_catalog import canonical_code
+
+
+SESSION_DIR = os.getenv('SESSION_DIR', os.path.join('.cache', 'sessions'))
+SESSION_LIFETIME = int(os.getenv('SESSION_LIFETIME', 7 * 24 * 3600))  # Seconds a session lives
+SESSION_FILE_LIMIT = 20000  # Sessions kept on disk before cachelib prunes the oldest
+
+COMPLETED, IN_PROGRESS, PLANNED = "c", "i", "p"
+COURSE_FIELDS = ("completed_courses", "completed_only", "in_progress_courses", "planned_courses")
+
+
+def configure_sessions(app):
+    """
+    Store the app's sessions server-side with Flask-Session.
+
+    Args:
+        app: Flask app, configured before its first request
+    """
+    from flask_session import Session
+
+    redis_url = os.getenv('SESSION_REDIS_URL')
+    if redis_url:
+        import redis  # Only needed when sessions are shared across hosts
+        app.config.update(SESSION_TYPE='redis', SESSION_REDIS=redis.from_url(redis_url))
+    else:
+        app.config.update(
+            SESSION_TYPE='cachelib',
+            SESSION_CACHELIB=FileSystemCache(SESSION_DIR, threshold=SESSION_FILE_LIMIT,
+                                             default_timeout=SESSION_LIFETIME, mode=0o600)
+        )
+    app.config.update(
+        PERMANENT_SESSION_LIFETIME=SESSION_LIFETIME,
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE='Lax'
+    )
+    Session(app)
+
+
+def pack_courses(completed: Iterable[str] = (), in_progress: Iterable[str] = (),
+                 planned: Iterable[str] = ()) -> Dict:
+    """
+    Course lists as one de-duplicated code list and a status string.
+
+    A course listed under several statuses keeps the first of completed,
+    in progress, planned.
+
+    Returns:
+        {"courses": [code, ...], "course_status": "cc...ip"}
+    """
+    codes = []
+    status = []
+    seen = set()
+    for flag, group in ((COMPLETED, completed), (IN_PROGRESS, in_progress), (PLANNED, planned)):
+        for code in group or ():
+            key = canonical_code(code)
+            if key in seen:
+                continue
+            seen.add(key)
+            codes.append(code)
+            status.append(flag)
+    return {"courses": codes, "course_status": "".join(status)}
+
+
+def save_student(session, profile: Dict, completed: Iterable[str] = (), in_progress: Iterable[str] = (),
+                 planned: Iterable[str] = ()):
+    """
+    Replace the session's student record.
+
+    Args:
+        session: Flask session
+        profile: Scalar fields (name, email, major, gpa, ...); derived course lists in it are ignored
+        completed: Completed course codes
+        in_progress: Course codes in progress this term
+        planned: Planned course codes
+    """
+    record = {name: value for name, value in profile.items()
+              if value is not None and name not in COURSE_FIELDS and name not in ("courses", "course_status")}
+    record.update(pack_courses(completed, in_progress, planned))
+    session['user'] = record
+
+
+def load_student(session) -> Optional[Dict]:
+    """
+    The session's student with the course lists the routes read.
+
+    Returns:
+        The record's profile fields plus completed_courses (completed and in
+        progress, so neither is suggested again), completed_only,
+        in_progress_courses and planned_courses; None if nobody is signed in
+    """
+    record = session.get('user')
+    if record is None:
+        return None
+
+    student = {name: value for name, value in record.items() if name not in ("courses", "course_status")}
+    lists = {COMPLETED: [], IN_PROGRESS: [], PLANNED: []}
+    for code, flag in zip(record.get('courses', []), record.get('course_status', "")):
+        lists[flag].append(code)
+    student["completed_only"] = lists[COMPLETED]
+    student["in_progress_courses"] = lists[IN_PROGRESS]
+    student["planned_courses"] = lists[PLANNED]
+    student["completed_courses"] = lists[COMPLETED] + lists[IN_PROGRESS]
+    return student
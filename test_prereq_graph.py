@@ -0,0 +1,105 @@
+"""
+Self-check for prerequisite parsing and CNF compilation.
+Run this after touching prereq_graph.py's tokenizer, parser or to_cnf.
+"""
+
+import itertools
+import random
+
+from prereq_graph import MAX_CLAUSES, compile_catalog, evaluate, parse_prereqs, to_cnf
+
+# Prerequisite text as the course search API returns it -> expected CNF
+# (each inner list is one clause, satisfied by any one of its courses)
+CASES = [
+    ("(COMP SCI 300 or 400) and (MATH 222 or 234)",
+     [["COMPSCI300", "COMPSCI400"], ["MATH222", "MATH234"]]),
+    ("COMP SCI 300 or graduate standing",
+     [["COMPSCI300"]]),
+    ("MATH 211, 217, 221, or 275",
+     [["MATH211", "MATH217", "MATH221", "MATH275"]]),
+    ("COMP SCI/E C E 354",
+     [["COMPSCI354", "ECE354"]]),
+    ("Satisfied Quantitative Reasoning (QR) A requirement and MATH 221. "
+     "Not open to students with credit for COMP SCI 220",
+     [["MATH221"]]),
+    ("COMP SCI 400 and (MATH 240 or 475), or graduate/professional standing",
+     [["COMPSCI400"], ["MATH240", "MATH475"]]),
+    ("(COMP SCI 354 and 400) or (E C E 354 and 552)",
+     [["COMPSCI354", "ECE354"], ["COMPSCI354", "ECE552"],
+      ["COMPSCI400", "ECE354"], ["COMPSCI400", "ECE552"]]),
+    ("None", []),
+    ("", []),
+]
+
+
+def cnf(text):
+    return sorted(sorted(clause) for clause in to_cnf(parse_prereqs(text)))
+
+
+def test_cases():
+    print("=== Prerequisite strings ===")
+    for text, expected in CASES:
+        got = cnf(text)
+        assert got == sorted(expected), f"{text!r}: expected {sorted(expected)}, got {got}"
+        print(f"ok  {text[:60]!r}")
+
+
+def test_truncation():
+    print("\n=== CNF truncation ===")
+    # An OR of 7 two-course ANDs expands to 2**7 = 128 clauses
+    pairs = [(f"MATH{300 + i}", f"STAT{300 + i}") for i in range(7)]
+    text = " or ".join(f"(MATH {300 + i} and STAT {300 + i})" for i in range(7))
+    tree = parse_prereqs(text)
+    clauses = to_cnf(tree)
+    assert len(clauses) == MAX_CLAUSES, len(clauses)
+
+    # Every kept clause is a real clause: one course from each pair
+    for clause in clauses:
+        assert len(clause) == len(pairs) and all(len(clause & set(pair)) == 1 for pair in pairs), sorted(clause)
+
+    # Which clauses survive must not depend on string hashing
+    assert clauses[0] == frozenset(course for course, _ in pairs), sorted(clauses[0])
+
+    # Dropping clauses only loosens the check: nobody who meets the full
+    # requirement is rejected
+    courses = [course for pair in pairs for course in pair]
+    rng = random.Random(0)
+    for _ in range(2000):
+        completed = set(rng.sample(courses, rng.randint(0, len(courses))))
+        if evaluate(tree, completed):
+            assert all(clause & completed for clause in clauses), sorted(completed)
+    print(f"ok  {len(clauses)} of {2 ** len(pairs)} clauses kept, none rejecting a qualified student")
+
+
+def test_eligibility():
+    print("\n=== Compiled catalog eligibility ===")
+    courses = [
+        {"code": "COMP SCI 300", "prereqs": "COMP SCI 200"},
+        {"code": "COMP SCI 354", "prereqs": "COMP SCI 300"},
+        {"code": "COMP SCI 400", "prereqs": "COMP SCI 300"},
+        {"code": "COMP SCI 577", "prereqs": "(COMP SCI 354 or 400) and (MATH 222 or 234)"},
+        {"code": "COMP SCI 536", "prereqs": "COMP SCI 354 and 400"},
+    ]
+    graph = compile_catalog(courses)
+    # Completed courses are never eligible again
+    for completed, eligible in [
+        ([], set()),
+        (["COMP SCI 200"], {"COMPSCI300"}),
+        (["COMP SCI 200", "COMP SCI 300", "MATH 222"], {"COMPSCI354", "COMPSCI400"}),
+        (["CS 300", "CS 400", "MATH 234"], {"COMPSCI354", "COMPSCI577"}),
+        (["COMP SCI 300", "COMP SCI 354", "COMP SCI 400"], {"COMPSCI536"}),
+    ]:
+        got = graph.eligible(completed)
+        assert got == eligible, f"{completed}: expected {sorted(eligible)}, got {sorted(got)}"
+        print(f"ok  {completed}")
+
+    # The order courses were completed in doesn't matter
+    for order in itertools.permutations(["COMP SCI 200", "COMP SCI 300", "MATH 222"]):
+        assert graph.eligible(list(order)) == {"COMPSCI354", "COMPSCI400"}
+
+
+if __name__ == "__main__":
+    test_cases()
+    test_truncation()
+    test_eligibility()
+    print("\n✅ Prerequisite parsing checks passed")
@@ -0,0 +1,120 @@
+"""
+Self-check for extracting and repairing model-generated schedules.
+Run this after touching schedule_repair.py.
+"""
+
+import json
+
+from course_catalog import CourseCatalog
+from prereq_graph import compile_catalog
+from schedule_repair import RepairStats, ScheduleValidator, extract_schedules, validate_response
+
+COURSES = [
+    {"code": "COMP SCI 300", "name": "Programming II", "credits": 3, "prereqs": "COMP SCI 200"},
+    {"code": "COMP SCI 354", "name": "Machine Organization", "credits": 3, "prereqs": "COMP SCI 300"},
+    {"code": "COMP SCI 400", "name": "Programming III", "credits": 3, "prereqs": "COMP SCI 300"},
+    {"code": "COMP SCI 577", "name": "Algorithms", "credits": 3, "prereqs": "COMP SCI 400"},
+    {"code": "MATH 340", "name": "Linear Algebra", "credits": 3, "prereqs": "MATH 222"},
+    {"code": "MATH 341", "name": "Multivariable Calc", "credits": 4, "prereqs": "MATH 222"},
+    {"code": "MATH 431", "name": "Probability", "credits": 3, "prereqs": "MATH 222"},
+]
+COMPLETED = ["COMP SCI 200", "COMP SCI 300", "MATH 222"]
+
+GOOD = {"name": "Balanced", "courses": ["COMP SCI 354", "COMP SCI 400", "MATH 340", "MATH 341"],
+        "total_credits": 13, "rationale": "Core CS with math"}
+OTHER = {"name": "Math heavy", "courses": ["COMP SCI 354", "MATH 340", "MATH 341", "MATH 431"],
+         "total_credits": 13, "rationale": "Electives first"}
+
+# Model output -> course lists expected from extract_schedules
+RESPONSES = [
+    ("bare array", json.dumps([GOOD, OTHER]), [GOOD["courses"], OTHER["courses"]]),
+    ("fenced with prose", f"Here are your options:\n```json\n{json.dumps([GOOD])}\n```\nGood luck!",
+     [GOOD["courses"]]),
+    ("wrapped in an object", f'Sure! {json.dumps({"schedules": [GOOD, OTHER]})} Hope this helps.',
+     [GOOD["courses"], OTHER["courses"]]),
+    ("single object", f"One option: {json.dumps(GOOD)}", [GOOD["courses"]]),
+    ("truncated array", json.dumps([GOOD, OTHER, GOOD])[:-40], [GOOD["courses"], OTHER["courses"]]),
+    ("truncated wrapped array", json.dumps({"schedules": [GOOD, OTHER, GOOD]})[:-40],
+     [GOOD["courses"], OTHER["courses"]]),
+]
+
+
+def validator(target=12):
+    return ScheduleValidator(CourseCatalog(COURSES), compile_catalog(COURSES), COMPLETED, target)
+
+
+def test_extract():
+    print("=== extract_schedules ===")
+    for label, text, expected in RESPONSES:
+        got = [schedule["courses"] for schedule in extract_schedules(text)]
+        assert got == expected, f"{label}: expected {expected}, got {got}"
+        print(f"ok  {label}")
+
+    for text in ["", "I can't help with that.", "```json\n[]\n```", '["COMP SCI 354"]']:
+        try:
+            extract_schedules(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"{text!r} should have no schedules")
+    print("ok  responses without schedules raise ValueError")
+
+
+def test_repair():
+    print("\n=== ScheduleValidator.repair ===")
+    repaired, problems = validator().repair({
+        "name": "Messy",
+        "courses": ["cs 354", "COMP SCI 400", "MATH 340", "MATH 341", "COMP SCI 354",
+                    "COMP SCI 300", "COMP SCI 577", "HIST 101"],
+        "total_credits": 15
+    })
+    assert repaired["courses"] == ["COMP SCI 354", "COMP SCI 400", "MATH 340", "MATH 341"], repaired["courses"]
+    assert repaired["total_credits"] == 13
+    assert [course["code"] for course in repaired["course_details"]] == repaired["courses"]
+    assert problems == [
+        "cs 354 renamed to COMP SCI 354",
+        "COMP SCI 354 is listed twice",
+        "COMP SCI 300 is already completed",
+        "COMP SCI 577 has unmet prerequisites",
+        "HIST 101 is not in the catalog",
+        "total_credits 15 corrected to 13",
+    ], problems
+    print("ok  renamed, duplicate, completed, ineligible and unknown courses fixed")
+
+    repaired, problems = validator().repair({"courses": "COMP SCI 354, MATH 431, MATH 340, MATH 341"})
+    assert repaired["courses"] == ["COMP SCI 354", "MATH 431", "MATH 340", "MATH 341"]
+    assert repaired["name"] == "Recommended Schedule" and repaired["total_credits"] == 13
+    print("ok  comma-separated courses and missing fields")
+
+    for schedule, reason in [
+        ({"courses": ["COMP SCI 354"]}, "3 credits is outside 10-14"),
+        ({"courses": ["HIST 101"]}, "no valid courses"),
+        ({"courses": 354}, "courses is not a list"),
+    ]:
+        repaired, problems = validator().repair(schedule)
+        assert repaired is None and problems[-1] == reason, problems
+    print("ok  unusable schedules rejected")
+
+
+def test_duplicates():
+    print("\n=== Duplicate schedules ===")
+    reordered = dict(GOOD, name="Same courses", courses=list(reversed(GOOD["courses"])))
+    usable, problems = validator().repair_all([GOOD, reordered, OTHER])
+    assert [schedule["name"] for schedule in usable] == ["Balanced", "Math heavy"], usable
+    assert "schedule 2: same courses as an earlier schedule" in problems, problems
+    print("ok  a schedule repeating an earlier one's courses is dropped")
+
+    stats = RepairStats()
+    usable, _ = validate_response(validator(), json.dumps([GOOD, GOOD, OTHER]), stats)
+    assert len(usable) == 2
+    validate_response(validator(), "no schedules today", stats)
+    counts = stats.status()
+    assert counts["responses"] == 2 and counts["repaired"] == 1 and counts["unusable"] == 1, counts
+    assert counts["schedules_dropped"] == 1, counts
+    print("ok  validate_response records repaired and unusable responses")
+
+
+if __name__ == "__main__":
+    test_extract()
+    test_repair()
+    test_duplicates()
+    print("\n✅ Schedule repair checks passed")
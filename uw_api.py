@@ -3,14 +3,344 @@ UW-Madison Course API Client
 Uses the public course search API to fetch real course data.
 """
 
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
 import requests
-from typing import Dict, List
+
+from uw_records import Course, courses_from_hits
+
+
+CATALOG_TTL = 15 * 60       # Catalog search results are fresh for 15 minutes
+SECTIONS_TTL = 60           # Seat counts change quickly during registration
+STALE_TTL = 24 * 60 * 60    # Serve stale results for up to a day while revalidating
+SNAPSHOT_DIR = os.getenv('UW_SNAPSHOT_DIR', 'snapshots')
+MAX_PARALLEL_SEARCHES = 8
+REQUEST_TIMEOUT = 10        # Seconds before an upstream request is abandoned
+MAX_RETRIES = 2
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when the circuit breaker is open and enroll.wisc.edu is not called."""
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Jittered exponential backoff delay in seconds for a retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed upstream request is worth retrying and counts against the circuit."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+def search_key(term_code: str, keywords: str, ttl: int) -> str:
+    """
+    Cache key for a search. Catalog and section lookups can run the same
+    query with different TTLs, so each TTL gets its own namespace; a
+    section entry must never serve or overwrite a catalog one.
+    """
+    if ttl == CATALOG_TTL:
+        return f"{term_code}:{keywords}"
+    return f"ttl{ttl}:{term_code}:{keywords}"
+
+
+def normalize_designation(course_code: str) -> str:
+    """Normalize a course code for matching, e.g. ' comp  sci 300' -> 'COMP SCI 300'."""
+    return " ".join(course_code.upper().split())
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["event"].set()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), "coalesced": self.coalesced}
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream is unhealthy.
+
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through
+    (half-open). A successful trial closes the circuit again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream right now."""
+        with self._lock:
+            if self.state == "open" and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.time()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "rejected": self.rejected,
+                "opened_at": self.opened_at
+            }
+
+
+class CatalogCache:
+    """
+    Two-tier cache for course search responses.
+
+    A bounded in-memory LRU of Course records answers warm lookups without
+    touching disk; a SQLite file keeps packed records across restarts. Entries carry their own TTL
+    plus the ETag/Last-Modified validators needed for conditional requests.
+
+    The tiers have separate locks, so get_memory never waits behind a disk
+    read or write in another thread (the async client calls it on its
+    event loop and does disk access in worker threads).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000,
+                 memory_entries: int = 500, stale_ttl: int = STALE_TTL):
+        self.path = path or os.getenv('UW_CACHE_PATH', os.path.join('.cache', 'uw_catalog.sqlite3'))
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.stale_ttl = stale_ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()     # Memory tier
+        self._db_lock = threading.Lock()  # SQLite connection
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # A lost write only costs a refetch, so skip the fsync on every commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        # Rows hold packed Course tuples; search_cache held raw search hits
+        # and is dropped rather than read
+        self._db.execute("DROP TABLE IF EXISTS search_cache")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS search_cache_v2 (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_v2_accessed ON search_cache_v2 (accessed_at)")
+        self._db.commit()
+
+    def get(self, key: str, include_expired: bool = False) -> Optional[Dict]:
+        """
+        Look up a cache entry.
+
+        Args:
+            key: Cache key
+            include_expired: Return the entry however stale it is (last good value)
+
+        Returns:
+            Entry dict with payload, etag, last_modified, fetched_at and
+            expires_at, or None if the key is missing or too stale to serve
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT payload, etag, last_modified, fetched_at, expires_at FROM search_cache_v2 WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                try:
+                    payload = [Course.unpack(course) for course in json.loads(row[0])]
+                except (TypeError, ValueError) as e:
+                    # Unreadable row: drop it so the caller refetches
+                    print(f"Discarding unreadable cache entry {key}: {e}")
+                    self._db.execute("DELETE FROM search_cache_v2 WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                self._db.execute("UPDATE search_cache_v2 SET accessed_at = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            entry = {
+                "payload": payload,
+                "etag": row[1],
+                "last_modified": row[2],
+                "fetched_at": row[3],
+                "expires_at": row[4]
+            }
+            with self._lock:
+                self._remember(key, entry)
+
+        if not include_expired and now > entry["expires_at"] + self.stale_ttl:
+            return None
+        return entry
+
+    def get_memory(self, key: str, include_expired: bool = False) -> Optional[Dict]:
+        """Like get, but only consults the in-memory tier and never touches disk."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+        if not include_expired and time.time() > entry["expires_at"] + self.stale_ttl:
+            return None
+        return entry
+
+    def put(self, key: str, payload: List[Course], ttl: int, etag: Optional[str] = None,
+            last_modified: Optional[str] = None):
+        """Store a fresh list of courses and evict the least recently used entries."""
+        now = time.time()
+        entry = {
+            "payload": payload,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "expires_at": now + ttl
+        }
+        packed = json.dumps([course.pack() for course in payload], separators=(",", ":"))
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache_v2 VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, packed, etag, last_modified, now, now + ttl, now)
+            )
+            self._evict()
+            self._db.commit()
+        with self._lock:
+            self._remember(key, entry)
+
+    def touch(self, key: str, ttl: int):
+        """Extend an entry's lifetime after a 304 Not Modified response."""
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE search_cache_v2 SET fetched_at = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now + ttl, now, key)
+            )
+            self._db.commit()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                entry["fetched_at"] = now
+                entry["expires_at"] = now + ttl
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._db_lock:
+            self._db.execute("DELETE FROM search_cache_v2")
+            self._db.commit()
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key: str, entry: Dict):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM search_cache_v2").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM search_cache_v2 WHERE key IN "
+                "(SELECT key FROM search_cache_v2 ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
 
 
 class UWMadisonAPI:
     """Client for UW-Madison public course search API."""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[CatalogCache] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0',
@@ -18,6 +348,81 @@ class UWMadisonAPI:
         })
         # Try the authenticated endpoint first (requires login)
         self.api_url = "https://enroll.wisc.edu/api/search/v1"
+        self.cache = cache if cache is not None else CatalogCache()
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        self.snapshots = {}  # term code -> indexed full-term snapshot
+        self.single_flight = SingleFlight()
+        self.breaker = CircuitBreaker()
+        self.retries = MAX_RETRIES
+
+    def load_snapshot(self, path: str) -> Dict:
+        """
+        Load a full-term snapshot written by catalog_ingest.py.
+
+        Searches for the snapshot's term are answered locally from then on.
+
+        Returns:
+            The indexed snapshot dict
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        courses = courses_from_hits(data["hits"])
+        by_subject = {}
+        by_designation = {}
+        for course in courses:
+            by_subject.setdefault(course.subject.lower(), []).append(course)
+            by_designation[course.code.lower()] = course
+
+        snapshot = {
+            "version": data["version"],
+            "term_code": data["term_code"],
+            "created_at": data["created_at"],
+            "courses": courses,
+            "by_subject": by_subject,
+            "by_designation": by_designation
+        }
+        self.snapshots[data["term_code"]] = snapshot
+        return snapshot
+
+    def load_latest_snapshots(self, directory: str = SNAPSHOT_DIR) -> List[str]:
+        """
+        Load the latest snapshot for every term found under a snapshot directory.
+
+        Returns:
+            List of loaded snapshot versions
+        """
+        versions = []
+        if not os.path.isdir(directory):
+            return versions
+
+        for term_code in sorted(os.listdir(directory)):
+            latest = os.path.join(directory, term_code, "LATEST")
+            if not os.path.isfile(latest):
+                continue
+            try:
+                with open(latest) as f:
+                    filename = f.read().strip()
+                snapshot = self.load_snapshot(os.path.join(directory, term_code, filename))
+                versions.append(snapshot["version"])
+            except Exception as e:
+                print(f"Snapshot load error for {term_code}: {e}")
+
+        return versions
+
+    def upstream_status(self) -> Dict:
+        """Circuit breaker and request coalescing state, for monitoring."""
+        return {
+            "circuit": self.breaker.status(),
+            "single_flight": self.single_flight.status(),
+            "snapshots": sorted(snapshot["version"] for snapshot in self.snapshots.values())
+        }
+
+    def catalog_version(self, term: str) -> Optional[str]:
+        """Version of the snapshot serving a term, or None if it is served live."""
+        snapshot = self.snapshots.get(self._parse_term(term))
+        return snapshot["version"] if snapshot else None
 
     def get_courses(self, term: str = "Spring 2026", subject: str = "") -> List[Dict]:
         """
@@ -31,42 +436,21 @@ class UWMadisonAPI:
             List of course dicts
         """
         try:
-            term_code = self._parse_term(term)
-
-            # The exact parameters that work in the browser
-            params = {
-                "termCode": term_code,
-                "term": term_code,
-                "keywords": subject.lower(),  # Lowercase seems to work better
-                "openSeats": "ALL"
-            }
-
-            # Try the exact endpoint structure
-            response = self.session.get(f"{self.api_url}/courses", params=params)
-            response.raise_for_status()
-
-            data = response.json()
-            courses = []
-
-            for hit in data.get("hits", []):
-                courses.append({
-                    "code": hit.get("courseDesignationRaw", ""),
-                    "name": hit.get("title", ""),
-                    "credits": hit.get("creditRange", "3"),
-                    "min_credits": hit.get("minimumCredits", 3),
-                    "max_credits": hit.get("maximumCredits", 3),
-                    "prereqs": hit.get("enrollmentPrerequisites", "None"),
-                    "description": hit.get("description", ""),
-                    "subject": hit.get("subject", {}).get("shortDescription", ""),
-                    "course_id": hit.get("courseId", "")
-                })
-
-            return courses
+            return [course.to_json() for course in self.get_course_records(term, subject)]
 
         except Exception as e:
             print(f"API Error: {e}")
             return []
 
+    def get_course_records(self, term: str = "Spring 2026", subject: str = "") -> List[Course]:
+        """
+        Fetch courses as compact Course records (with their sections).
+
+        Raises on upstream failure; get_courses is the forgiving wrapper.
+        """
+        term_code = self._parse_term(term)
+        return self._search(term_code, subject.lower(), CATALOG_TTL)  # Lowercase seems to work better
+
     def get_course_sections(self, course_code: str, term: str = "Spring 2026") -> List[Dict]:
         """
         Fetch course sections with meeting times for a specific course.
@@ -82,44 +466,12 @@ class UWMadisonAPI:
             term_code = self._parse_term(term)
 
             # Search for the specific course
-            params = {
-                "termCode": term_code,
-                "term": term_code,
-                "keywords": course_code.lower(),
-                "openSeats": "ALL"
-            }
-
-            response = self.session.get(f"{self.api_url}/courses", params=params)
-            response.raise_for_status()
-
-            data = response.json()
+            courses = self._search(term_code, course_code.lower(), SECTIONS_TTL)
             sections = []
 
-            for hit in data.get("hits", []):
-                if hit.get("courseDesignationRaw", "").upper() == course_code.upper():
-                    # Get sections from the course
-                    for section in hit.get("sections", []):
-                        meeting_times = []
-
-                        # Parse meeting patterns
-                        for schedule in section.get("schedules", []):
-                            meeting_info = {
-                                "days": schedule.get("days", "TBA"),
-                                "start_time": schedule.get("startTime", "TBA"),
-                                "end_time": schedule.get("endTime", "TBA"),
-                                "location": schedule.get("location", {}).get("room", "TBA"),
-                                "building": schedule.get("location", {}).get("building", "")
-                            }
-                            meeting_times.append(meeting_info)
-
-                        sections.append({
-                            "section_number": section.get("number", ""),
-                            "instructor": ", ".join([inst.get("name", "TBA") for inst in section.get("instructors", [])]) or "TBA",
-                            "meeting_times": meeting_times,
-                            "seats_available": section.get("seatsAvailable", 0),
-                            "total_seats": section.get("totalSeats", 0),
-                            "type": section.get("scheduleType", "LEC")
-                        })
+            for course in courses:
+                if course.code.upper() == course_code.upper():
+                    sections.extend(course.sections_json())
 
             return sections
 
@@ -127,6 +479,196 @@ class UWMadisonAPI:
             print(f"Section API Error: {e}")
             return []
 
+    def get_sections_for_courses(self, course_codes: List[str], term: str = "Spring 2026") -> Dict[str, List[Dict]]:
+        """
+        Fetch sections for many courses with as few searches as possible.
+
+        Args:
+            course_codes: Course codes (e.g., ["COMP SCI 300", "MATH 340"])
+            term: Semester (e.g., "Spring 2026", "Fall 2025")
+
+        Returns:
+            Dict mapping each requested course code to its list of section dicts
+        """
+        records = self.get_course_records_for_codes(course_codes, term)
+        return {
+            code: course.sections_json() if course else []
+            for code, course in records.items()
+        }
+
+    def get_course_records_for_codes(self, course_codes: List[str], term: str = "Spring 2026") -> Dict[str, Optional[Course]]:
+        """
+        Fetch Course records for many courses with as few searches as possible.
+
+        Codes are grouped by subject and each subject is searched once, with
+        all subjects searched concurrently. Courses a subject search did not
+        return are looked up individually.
+
+        Returns:
+            Dict mapping each requested course code to its Course, or None if not found
+        """
+        term_code = self._parse_term(term)
+
+        codes_by_subject = {}
+        for code in course_codes:
+            designation = normalize_designation(code)
+            subject = designation.rsplit(" ", 1)[0]
+            codes_by_subject.setdefault(subject, set()).add(designation)
+
+        index = {}
+        self._index_searches(term_code, list(codes_by_subject), index)
+
+        missing = [
+            designation
+            for designations in codes_by_subject.values()
+            for designation in designations
+            if designation not in index
+        ]
+        if missing:
+            self._index_searches(term_code, missing, index)
+
+        return {code: index.get(normalize_designation(code)) for code in course_codes}
+
+    def _index_searches(self, term_code: str, queries: List[str], index: Dict):
+        """Run searches concurrently and index every course by normalized designation."""
+        def search(query):
+            try:
+                return self._search(term_code, query.lower(), SECTIONS_TTL)
+            except Exception as e:
+                print(f"Section API Error for {query}: {e}")
+                return []
+
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_SEARCHES, len(queries) or 1)) as pool:
+            for courses in pool.map(search, queries):
+                for course in courses:
+                    index.setdefault(normalize_designation(course.code), course)
+
+    def _search(self, term_code: str, keywords: str, ttl: int) -> List[Course]:
+        """
+        Run a course search through the catalog cache.
+
+        Fresh entries are returned straight from the cache. Expired entries
+        are still served while a background thread revalidates them; only a
+        miss waits on enroll.wisc.edu. Terms with a loaded snapshot are
+        answered from it, falling through to the cache and upstream only
+        when the snapshot has no match (e.g. a course added after it was
+        taken). If the upstream fetch fails, the last good cached value is
+        served however old it is.
+        """
+        snapshot = self.snapshots.get(term_code)
+        if snapshot is not None:
+            courses = self._search_snapshot(snapshot, keywords)
+            if courses:
+                return courses
+
+        key = search_key(term_code, keywords, ttl)
+        entry = self.cache.get(key)
+
+        if entry is not None:
+            if time.time() >= entry["expires_at"]:
+                self._revalidate_in_background(key, term_code, keywords, ttl, entry)
+            return entry["payload"]
+
+        try:
+            return self._fetch_resilient(key, term_code, keywords, ttl, None)
+        except Exception:
+            fallback = self.cache.get(key, include_expired=True)
+            if fallback is None:
+                raise
+            print(f"Upstream unavailable, serving last good value for {key}")
+            return fallback["payload"]
+
+    def _fetch_resilient(self, key: str, term_code: str, keywords: str, ttl: int,
+                         entry: Optional[Dict]) -> List[Course]:
+        """Fetch with single-flight coalescing, circuit breaking and jittered retries."""
+        def fetch_with_retries():
+            for attempt in range(self.retries + 1):
+                if not self.breaker.allow():
+                    raise UpstreamUnavailable("enroll.wisc.edu circuit is open")
+                try:
+                    courses = self._fetch(key, term_code, keywords, ttl, entry)
+                except Exception as e:
+                    if not is_retryable(e):
+                        # The upstream answered, so it is healthy even if the request was bad
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_failure()
+                    if attempt == self.retries:
+                        raise
+                    time.sleep(backoff_delay(attempt))
+                else:
+                    self.breaker.record_success()
+                    return courses
+
+        return self.single_flight.do(key, fetch_with_retries)
+
+    def _search_snapshot(self, snapshot: Dict, keywords: str) -> List[Course]:
+        """Answer a keyword search from a full-term snapshot."""
+        if keywords in snapshot["by_subject"]:
+            return snapshot["by_subject"][keywords]
+
+        course = snapshot["by_designation"].get(keywords)
+        if course is not None:
+            return [course]
+
+        return [
+            course for course in snapshot["courses"]
+            if keywords in course.code.lower() or keywords in course.name.lower()
+        ]
+
+    def _fetch(self, key: str, term_code: str, keywords: str, ttl: int,
+               entry: Optional[Dict]) -> List[Course]:
+        """Fetch search results upstream, revalidating against a cached entry if given."""
+        # The exact parameters that work in the browser
+        params = {
+            "termCode": term_code,
+            "term": term_code,
+            "keywords": keywords,
+            "openSeats": "ALL"
+        }
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(f"{self.api_url}/courses", params=params, headers=headers,
+                                    timeout=REQUEST_TIMEOUT)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key, ttl)
+            return entry["payload"]
+
+        response.raise_for_status()
+
+        courses = courses_from_hits(response.json().get("hits", []))
+        self.cache.put(
+            key, courses, ttl,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+        return courses
+
+    def _revalidate_in_background(self, key: str, term_code: str, keywords: str,
+                                  ttl: int, entry: Dict):
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            try:
+                self._fetch_resilient(key, term_code, keywords, ttl, entry)
+            except Exception as e:
+                print(f"Cache revalidation error for {key}: {e}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=revalidate, daemon=True).start()
+
     def _parse_term(self, term: str) -> str:
         """Convert 'Spring 2026' to '1262'."""
         seasons = {"Spring": "2", "Summer": "3", "Fall": "4"}
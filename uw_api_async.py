@@ -0,0 +1,266 @@
+"""
+Asyncio UW-Madison Course API Client
+Async counterpart of UWMadisonAPI for fanning out many searches at once.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from uw_api import (
+    CATALOG_TTL,
+    SECTIONS_TTL,
+    UpstreamUnavailable,
+    UWMadisonAPI,
+    backoff_delay,
+    search_key,
+)
+from uw_records import Course, courses_from_hits
+
+
+class AsyncUWMadisonAPI:
+    """
+    Async client for the UW-Madison course search API.
+
+    Shares the catalog cache and loaded snapshots of a UWMadisonAPI, and keeps
+    one keep-alive aiohttp connection pool on a long-lived event loop thread
+    so sync callers (Flask routes) can submit work without paying for a new
+    loop or new connections on every request.
+
+    The shared cache's SQLite tier is blocking, so on the loop only its
+    memory tier is read directly; disk reads and writes run on a small
+    thread pool and never stall requests already in flight.
+    """
+
+    def __init__(self, api: Optional[UWMadisonAPI] = None, concurrency: int = 16,
+                 timeout: float = 10, connection_limit: int = 32):
+        self.api = api or UWMadisonAPI()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self._session = None
+        self._semaphore = None
+        self._revalidating = set()
+        self._in_flight = {}
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._disk = ThreadPoolExecutor(max_workers=2, thread_name_prefix="uw-cache")
+
+    async def get_courses(self, term: str = "Spring 2026", subject: str = "") -> List[Dict]:
+        """
+        Fetch courses from UW-Madison API.
+
+        Args:
+            term: Semester (e.g., "Spring 2026", "Fall 2025")
+            subject: Subject code (e.g., "comp sci", "math")
+
+        Returns:
+            List of course dicts
+        """
+        try:
+            term_code = self.api._parse_term(term)
+            courses = await self._search(term_code, subject.lower(), CATALOG_TTL)
+            return [course.to_json() for course in courses]
+
+        except Exception as e:
+            print(f"API Error: {e}")
+            return []
+
+    async def get_course_sections(self, course_code: str, term: str = "Spring 2026") -> List[Dict]:
+        """
+        Fetch course sections with meeting times for a specific course.
+
+        Args:
+            course_code: Course code (e.g., "COMP SCI 300")
+            term: Semester (e.g., "Spring 2026", "Fall 2025")
+
+        Returns:
+            List of section dicts with meeting times
+        """
+        try:
+            term_code = self.api._parse_term(term)
+            courses = await self._search(term_code, course_code.lower(), SECTIONS_TTL)
+            sections = []
+
+            for course in courses:
+                if course.code.upper() == course_code.upper():
+                    sections.extend(course.sections_json())
+
+            return sections
+
+        except Exception as e:
+            print(f"Section API Error: {e}")
+            return []
+
+    async def get_courses_for_subjects(self, subjects: List[str], term: str = "Spring 2026") -> Dict[str, List[Dict]]:
+        """Fetch several subjects' courses concurrently, keyed by subject."""
+        results = await asyncio.gather(*(self.get_courses(term, subject) for subject in subjects))
+        return dict(zip(subjects, results))
+
+    async def close(self):
+        """Close the shared connection pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # Sync wrappers for Flask routes
+
+    def fetch_courses(self, subjects: List[str], term: str = "Spring 2026") -> Dict[str, List[Dict]]:
+        """
+        Fetch several subjects at once from synchronous code.
+
+        Returns:
+            Dict mapping each subject to its list of course dicts
+        """
+        return self.run(self.get_courses_for_subjects(subjects, term))
+
+    def fetch_course_sections(self, course_code: str, term: str = "Spring 2026") -> List[Dict]:
+        """Fetch one course's sections from synchronous code."""
+        return self.run(self.get_course_sections(course_code, term))
+
+    def run(self, coro):
+        """Run a coroutine on the client's event loop thread and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+            return self._loop
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._session = aiohttp.ClientSession(
+                headers=dict(self.api.session.headers),
+                connector=aiohttp.TCPConnector(limit=self.connection_limit, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def _search(self, term_code: str, keywords: str, ttl: int) -> List[Course]:
+        """Run a course search through the shared snapshot, then the catalog cache if the snapshot has no match."""
+        snapshot = self.api.snapshots.get(term_code)
+        if snapshot is not None:
+            courses = self.api._search_snapshot(snapshot, keywords)
+            if courses:
+                return courses
+
+        key = search_key(term_code, keywords, ttl)
+        entry = await self._cache_get(key)
+
+        if entry is not None:
+            if time.time() >= entry["expires_at"] and key not in self._revalidating:
+                self._revalidating.add(key)
+                asyncio.ensure_future(self._revalidate(key, term_code, keywords, ttl, entry))
+            return entry["payload"]
+
+        try:
+            return await self._fetch_resilient(key, term_code, keywords, ttl, None)
+        except Exception:
+            fallback = await self._cache_get(key, include_expired=True)
+            if fallback is None:
+                raise
+            print(f"Upstream unavailable, serving last good value for {key}")
+            return fallback["payload"]
+
+    async def _fetch_resilient(self, key: str, term_code: str, keywords: str, ttl: int,
+                               entry: Optional[Dict]) -> List[Course]:
+        """Fetch with in-flight coalescing, the shared circuit breaker and jittered retries."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.api.single_flight.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._fetch_with_retries(key, term_code, keywords, ttl, entry))
+        self._in_flight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _fetch_with_retries(self, key: str, term_code: str, keywords: str, ttl: int,
+                                  entry: Optional[Dict]) -> List[Course]:
+        breaker = self.api.breaker
+        for attempt in range(self.api.retries + 1):
+            if not breaker.allow():
+                raise UpstreamUnavailable("enroll.wisc.edu circuit is open")
+            try:
+                courses = await self._fetch(key, term_code, keywords, ttl, entry)
+            except Exception as e:
+                if not self._is_retryable(e):
+                    # The upstream answered, so it is healthy even if the request was bad
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt == self.api.retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+            else:
+                breaker.record_success()
+                return courses
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+            return True
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status == 429 or error.status >= 500
+        return False
+
+    async def _fetch(self, key: str, term_code: str, keywords: str, ttl: int,
+                     entry: Optional[Dict]) -> List[Course]:
+        params = {
+            "termCode": term_code,
+            "term": term_code,
+            "keywords": keywords,
+            "openSeats": "ALL"
+        }
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        session = await self._get_session()
+        async with self._semaphore:
+            async with session.get(f"{self.api.api_url}/courses", params=params, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    await self._on_disk(self.api.cache.touch, key, ttl)
+                    return entry["payload"]
+
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+
+        courses = courses_from_hits(data.get("hits", []))
+        await self._on_disk(
+            self.api.cache.put, key, courses, ttl,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified")
+        )
+        return courses
+
+    async def _cache_get(self, key: str, include_expired: bool = False) -> Optional[Dict]:
+        """Cache lookup that only leaves the loop when the memory tier misses."""
+        entry = self.api.cache.get_memory(key, include_expired)
+        if entry is not None:
+            return entry
+        return await self._on_disk(self.api.cache.get, key, include_expired)
+
+    async def _on_disk(self, fn, *args):
+        """Run a blocking cache call on the disk thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._disk, fn, *args)
+
+    async def _revalidate(self, key: str, term_code: str, keywords: str, ttl: int, entry: Dict):
+        try:
+            await self._fetch_resilient(key, term_code, keywords, ttl, entry)
+        except Exception as e:
+            print(f"Cache revalidation error for {key}: {e}")
+        finally:
+            self._revalidating.discard(key)
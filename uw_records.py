@@ -0,0 +1,242 @@
+"""
+Compact course, section and meeting records.
+
+Search hits are converted once into slotted records with interned strings
+and integer-encoded days and times, so a full term catalog held in memory
+costs a fraction of the per-hit dicts. `to_json()` produces the dicts the
+API routes return.
+"""
+
+import re
+import sys
+from typing import Dict, List, Tuple
+
+
+DAY_BITS = {"M": 1, "T": 2, "W": 4, "R": 8, "F": 16, "S": 32, "U": 64}
+DAY_ORDER = "MTWRFSU"
+NO_TIME = -1
+
+_TIME_PATTERN = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*([AaPp][Mm])?\s*$")
+
+
+def intern(value) -> str:
+    """Intern a repeated string field; non-strings become ''."""
+    return sys.intern(value) if isinstance(value, str) else ""
+
+
+def encode_days(days) -> int:
+    """Encode a days string as a bitmask, e.g. 'MWF' -> 21. 'TBA' -> 0."""
+    if not isinstance(days, str):
+        return 0
+    mask = 0
+    for letter in days.upper():
+        mask |= DAY_BITS.get(letter, 0)
+    return mask
+
+
+def decode_days(mask: int) -> str:
+    """Decode a days bitmask back to a string, e.g. 21 -> 'MWF'. 0 -> 'TBA'."""
+    if not mask:
+        return "TBA"
+    return "".join(letter for letter in DAY_ORDER if mask & DAY_BITS[letter])
+
+
+def encode_time(value) -> int:
+    """
+    Encode a meeting time as minutes since midnight.
+
+    Accepts milliseconds since midnight (as the search API returns them),
+    '14:30' or '2:30 PM'. Anything unparseable, including 'TBA', is NO_TIME.
+    """
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        minutes = int(value) // 60000 if value >= 24 * 60 else int(value)
+        return minutes if 0 <= minutes < 24 * 60 else NO_TIME
+    if not isinstance(value, str):
+        return NO_TIME
+
+    match = _TIME_PATTERN.match(value)
+    if match is None:
+        return NO_TIME
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.upper() == "PM" else 0)
+    if hour >= 24 or minute >= 60:
+        return NO_TIME
+    return hour * 60 + minute
+
+
+def format_time(minutes: int) -> str:
+    """Format minutes since midnight as '9:55 AM'. NO_TIME -> 'TBA'."""
+    if minutes == NO_TIME:
+        return "TBA"
+    hour, minute = divmod(minutes, 60)
+    meridiem = "AM" if hour < 12 else "PM"
+    return f"{hour % 12 or 12}:{minute:02d} {meridiem}"
+
+
+class Meeting:
+    """One weekly meeting pattern of a section."""
+
+    __slots__ = ("days", "start", "end", "room", "building")
+
+    def __init__(self, days: int, start: int, end: int, room: str, building: str):
+        self.days = days
+        self.start = start
+        self.end = end
+        self.room = room
+        self.building = building
+
+    @classmethod
+    def from_schedule(cls, schedule: Dict) -> "Meeting":
+        location = schedule.get("location") or {}
+        return cls(
+            encode_days(schedule.get("days", "TBA")),
+            encode_time(schedule.get("startTime")),
+            encode_time(schedule.get("endTime")),
+            intern(location.get("room", "TBA")),
+            intern(location.get("building", ""))
+        )
+
+    def to_json(self) -> Dict:
+        return {
+            "days": decode_days(self.days),
+            "start_time": format_time(self.start),
+            "end_time": format_time(self.end),
+            "location": self.room,
+            "building": self.building
+        }
+
+    def pack(self) -> Tuple:
+        return (self.days, self.start, self.end, self.room, self.building)
+
+    @classmethod
+    def unpack(cls, row) -> "Meeting":
+        days, start, end, room, building = row
+        return cls(days, start, end, intern(room), intern(building))
+
+
+class Section:
+    """One enrollable section (LEC, DIS, LAB, ...) of a course."""
+
+    __slots__ = ("number", "type", "instructor", "seats_available", "total_seats", "meetings")
+
+    def __init__(self, number: str, type: str, instructor: str, seats_available: int,
+                 total_seats: int, meetings: Tuple[Meeting, ...]):
+        self.number = number
+        self.type = type
+        self.instructor = instructor
+        self.seats_available = seats_available
+        self.total_seats = total_seats
+        self.meetings = meetings
+
+    @classmethod
+    def from_hit_section(cls, section: Dict) -> "Section":
+        instructor = ", ".join([inst.get("name", "TBA") for inst in section.get("instructors", [])]) or "TBA"
+        return cls(
+            intern(section.get("number", "")),
+            intern(section.get("scheduleType", "LEC")),
+            intern(instructor),
+            section.get("seatsAvailable", 0),
+            section.get("totalSeats", 0),
+            tuple(Meeting.from_schedule(schedule) for schedule in section.get("schedules", []))
+        )
+
+    def to_json(self) -> Dict:
+        return {
+            "section_number": self.number,
+            "instructor": self.instructor,
+            "meeting_times": [meeting.to_json() for meeting in self.meetings],
+            "seats_available": self.seats_available,
+            "total_seats": self.total_seats,
+            "type": self.type
+        }
+
+    def pack(self) -> Tuple:
+        return (self.number, self.type, self.instructor, self.seats_available, self.total_seats,
+                [meeting.pack() for meeting in self.meetings])
+
+    @classmethod
+    def unpack(cls, row) -> "Section":
+        number, type, instructor, seats_available, total_seats, meetings = row
+        return cls(intern(number), intern(type), intern(instructor), seats_available, total_seats,
+                   tuple(Meeting.unpack(meeting) for meeting in meetings))
+
+
+class Course:
+    """A catalog course and its sections for one term."""
+
+    __slots__ = ("code", "name", "credits", "min_credits", "max_credits", "prereqs",
+                 "description", "subject", "course_id", "sections")
+
+    def __init__(self, code: str, name: str, credits: str, min_credits: int, max_credits: int,
+                 prereqs: str, description: str, subject: str, course_id: str,
+                 sections: Tuple[Section, ...] = ()):
+        self.code = code
+        self.name = name
+        self.credits = credits
+        self.min_credits = min_credits
+        self.max_credits = max_credits
+        self.prereqs = prereqs
+        self.description = description
+        self.subject = subject
+        self.course_id = course_id
+        self.sections = sections
+
+    @classmethod
+    def from_hit(cls, hit: Dict) -> "Course":
+        """Convert a search hit into a Course record."""
+        return cls(
+            intern(hit.get("courseDesignationRaw", "")),
+            hit.get("title", ""),
+            intern(hit.get("creditRange", "3")),
+            hit.get("minimumCredits", 3),
+            hit.get("maximumCredits", 3),
+            hit.get("enrollmentPrerequisites", "None"),
+            hit.get("description", ""),
+            intern((hit.get("subject") or {}).get("shortDescription", "")),
+            hit.get("courseId", ""),
+            tuple(Section.from_hit_section(section) for section in hit.get("sections", []))
+        )
+
+    def to_json(self) -> Dict:
+        """Course dict as returned by UWMadisonAPI.get_courses."""
+        return {
+            "code": self.code,
+            "name": self.name,
+            "credits": self.credits,
+            "min_credits": self.min_credits,
+            "max_credits": self.max_credits,
+            "prereqs": self.prereqs,
+            "description": self.description,
+            "subject": self.subject,
+            "course_id": self.course_id
+        }
+
+    def sections_json(self) -> List[Dict]:
+        """Section dicts as returned by UWMadisonAPI.get_course_sections."""
+        return [section.to_json() for section in self.sections]
+
+    def pack(self) -> Tuple:
+        """Compact positional form for on-disk storage."""
+        return (self.code, self.name, self.credits, self.min_credits, self.max_credits, self.prereqs,
+                self.description, self.subject, self.course_id,
+                [section.pack() for section in self.sections])
+
+    @classmethod
+    def unpack(cls, row) -> "Course":
+        (code, name, credits, min_credits, max_credits, prereqs,
+         description, subject, course_id, sections) = row
+        return cls(intern(code), name, intern(credits), min_credits, max_credits, prereqs,
+                   description, intern(subject), course_id,
+                   tuple(Section.unpack(section) for section in sections))
+
+    def __repr__(self) -> str:
+        return f"Course({self.code!r}, {self.name!r})"
+
+
+def courses_from_hits(hits: List[Dict]) -> List[Course]:
+    """Convert a page of search hits into Course records."""
+    return [Course.from_hit(hit) for hit in hits]
+
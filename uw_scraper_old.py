@@ -25,6 +25,7 @@ class UWMadisonScraper:
         self.authenticated = False
         self.netid = None
         self.base_url = "https://public.enroll.wisc.edu"
+        self.api_url = f"{self.base_url}/api/search/v1"
 
     def authenticate(self, netid: str, password: str, duo_code: str) -> bool:
         """
@@ -111,7 +112,7 @@ class UWMadisonScraper:
             term_code = self._parse_term(term)
 
             # UW-Madison uses a public course search API
-            api_url = "https://public.enroll.wisc.edu/api/search/v1/courses"
+            api_url = f"{self.api_url}/courses"
 
             params = {
                 "term": term_code,